@@ -9,9 +9,48 @@ and common database administration tasks.
 
 import pymysql
 import pymysql.cursors
+from pymysql.constants import SERVER_STATUS, FIELD_TYPE, FLAG
+import io
+import csv
+import array
+import os
+import sys
+import argparse
+import asyncio
+import re
 import time
+import math
+import gzip
+import json
+import bisect
+import struct
+import sqlite3
+import hashlib
 import logging
-from typing import List, Dict, Any, Tuple, Optional, Union
+import functools
+import tempfile
+import threading
+from queue import Queue, Empty, Full
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional, Union, Iterator
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # Configure logging
 logging.basicConfig(
@@ -20,12 +59,942 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mysql_ops")
 
+# Counters reported as per-second rates by health_check
+HEALTH_RATE_COUNTERS = (
+    'Questions', 'Queries', 'Com_select', 'Com_insert', 'Com_update', 'Com_delete',
+    'Com_replace', 'Com_commit', 'Com_rollback', 'Slow_queries', 'Threads_created',
+    'Connections', 'Aborted_connects', 'Aborted_clients', 'Bytes_received', 'Bytes_sent',
+    'Created_tmp_disk_tables', 'Select_full_join', 'Select_scan', 'Sort_merge_passes',
+    'Innodb_rows_read', 'Innodb_rows_inserted', 'Innodb_rows_updated', 'Innodb_rows_deleted',
+    'Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_reads', 'Innodb_data_fsyncs'
+)
+
+# Column types that allow splitting a table into numeric primary key ranges
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+
+# Variables read by health_check in addition to the full global status
+HEALTH_VARIABLES = ('version', 'max_connections', 'innodb_buffer_pool_size', 'read_only')
+
+GLOBAL_SNAPSHOT_SQL = f"""
+    SELECT 'status' AS source, VARIABLE_NAME AS name, VARIABLE_VALUE AS value
+    FROM performance_schema.global_status
+    UNION ALL
+    SELECT 'variable', VARIABLE_NAME, VARIABLE_VALUE
+    FROM performance_schema.global_variables
+    WHERE VARIABLE_NAME IN ({', '.join(repr(name) for name in HEALTH_VARIABLES)})
+    UNION ALL
+    SELECT 'replication', CHANNEL_NAME, SERVICE_STATE
+    FROM performance_schema.replication_connection_status
+"""
+
+
+def parse_global_snapshot(rows: List[Dict[str, Any]], timestamp: float = None) -> Dict[str, Any]:
+    """
+    Turn the rows of GLOBAL_SNAPSHOT_SQL into a snapshot dictionary
+    
+    Args:
+        rows: Rows with 'source', 'name' and 'value' keys
+        timestamp: Monotonic time the rows were read at
+        
+    Returns:
+        Dict: 'status', 'variables', 'replica' and 'timestamp' entries
+    """
+    snapshot = {
+        'status': {},
+        'variables': {},
+        'replica': False,
+        'timestamp': time.monotonic() if timestamp is None else timestamp
+    }
+    for row in rows:
+        if row['source'] == 'status':
+            snapshot['status'][row['name']] = row['value']
+        elif row['source'] == 'variable':
+            snapshot['variables'][row['name']] = row['value']
+        else:
+            snapshot['replica'] = True
+    return snapshot
+
+
+def _to_number(value: Any) -> float:
+    """Convert a status value to a number, treating missing or non-numeric values as 0"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def compute_counter_rates(previous: Optional[Dict[str, Any]], current: Dict[str, Any],
+                          counters: Tuple[str, ...] = HEALTH_RATE_COUNTERS) -> Dict[str, float]:
+    """
+    Compute per-second rates of status counters between two snapshots
+    
+    Args:
+        previous: Earlier snapshot (None if there is none yet)
+        current: Current snapshot
+        counters: Status counter names to compute rates for
+        
+    Returns:
+        Dict: Lower-cased counter names mapped to per-second rates plus
+              'interval_seconds'; empty if no rate can be computed
+    """
+    if not previous:
+        return {}
+    elapsed = current['timestamp'] - previous['timestamp']
+    prev_status, cur_status = previous['status'], current['status']
+    # A server restart resets every counter, so the deltas would be meaningless
+    if elapsed <= 0 or _to_number(cur_status.get('Uptime')) < _to_number(prev_status.get('Uptime')):
+        return {}
+    
+    rates = {'interval_seconds': round(elapsed, 3)}
+    for name in counters:
+        if name in cur_status and name in prev_status:
+            delta = _to_number(cur_status[name]) - _to_number(prev_status[name])
+            rates[name.lower()] = round(max(delta, 0.0) / elapsed, 3)
+    return rates
+
+
+def build_replication_health(status: Dict[str, Any], heartbeat_lag_ms: float = None,
+                             lag_warning_seconds: float = 300) -> Dict[str, Any]:
+    """
+    Evaluate replication health from a SHOW SLAVE STATUS row
+    
+    Args:
+        status: Replication status row (empty if the server is not a replica)
+        heartbeat_lag_ms: Optional end-to-end lag measured by a heartbeat,
+                          used instead of Seconds_Behind_Master when given
+        lag_warning_seconds: Lag above which the status becomes 'Warning'
+        
+    Returns:
+        Dict: Replication health information
+    """
+    if not status:
+        return {'status': 'Not a replica'}
+    
+    health = {
+        'status': 'Healthy',
+        'io_running': status.get('Slave_IO_Running', 'No'),
+        'sql_running': status.get('Slave_SQL_Running', 'No'),
+        'seconds_behind_master': status.get('Seconds_Behind_Master', 'NULL'),
+        'last_error': status.get('Last_Error', ''),
+        'last_io_error': status.get('Last_IO_Error', ''),
+        'last_sql_error': status.get('Last_SQL_Error', '')
+    }
+    
+    if heartbeat_lag_ms is not None:
+        health['heartbeat_lag_ms'] = heartbeat_lag_ms
+    
+    if health['io_running'] != 'Yes' or health['sql_running'] != 'Yes':
+        health['status'] = 'Error'
+    elif heartbeat_lag_ms is not None:
+        # Seconds_Behind_Master reads 0 while the IO thread itself is behind; the heartbeat does not
+        if heartbeat_lag_ms > lag_warning_seconds * 1000:
+            health['status'] = 'Warning'
+    elif health['seconds_behind_master'] not in ('NULL', None) and \
+            int(health['seconds_behind_master']) > lag_warning_seconds:
+        health['status'] = 'Warning'
+    
+    return health
+
+
+def build_health_report(snapshot: Dict[str, Any], previous: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Build the health check report from a global snapshot
+    
+    Args:
+        snapshot: Snapshot from MySQLClient.get_global_snapshot
+        previous: Optional earlier snapshot used to compute rates
+        
+    Returns:
+        Dict: Health check results (without replication details)
+    """
+    status = snapshot['status']
+    variables = snapshot['variables']
+    rates = compute_counter_rates(previous, snapshot)
+    
+    health = {
+        'status': 'Healthy',
+        'version': variables.get('version', 'Unknown'),
+        'uptime': status.get('Uptime', '0'),
+        'connections': {
+            'max_connections': variables.get('max_connections', '0'),
+            'current_connections': status.get('Threads_connected', '0'),
+            'connection_errors': {k: v for k, v in status.items() if k.startswith('Connection_errors')}
+        },
+        'memory': {
+            'innodb_buffer_pool_size': variables.get('innodb_buffer_pool_size', '0'),
+            'innodb_buffer_pool_usage': {k: v for k, v in status.items() if k.startswith('Innodb_buffer_pool')}
+        },
+        'threads': {
+            'running': status.get('Threads_running', '0'),
+            'connected': status.get('Threads_connected', '0'),
+            'created': status.get('Threads_created', '0')
+        },
+        'queries': {
+            'slow_queries': status.get('Slow_queries', '0'),
+            'questions': status.get('Questions', '0'),
+            'com_select': status.get('Com_select', '0'),
+            'com_insert': status.get('Com_insert', '0'),
+            'com_update': status.get('Com_update', '0'),
+            'com_delete': status.get('Com_delete', '0')
+        },
+        'rates': rates
+    }
+    
+    # Hit ratio over the interval when possible, otherwise since startup
+    if rates and rates.get('innodb_buffer_pool_read_requests'):
+        requests, reads = rates['innodb_buffer_pool_read_requests'], rates.get('innodb_buffer_pool_reads', 0.0)
+    else:
+        requests = _to_number(status.get('Innodb_buffer_pool_read_requests'))
+        reads = _to_number(status.get('Innodb_buffer_pool_reads'))
+    health['memory']['buffer_pool_hit_ratio'] = round(1 - reads / requests, 6) if requests else None
+    
+    if rates:
+        health['queries']['qps'] = rates.get('questions', 0.0)
+        health['threads']['created_per_sec'] = rates.get('threads_created', 0.0)
+    
+    # Check for high thread usage
+    max_connections = int(_to_number(health['connections']['max_connections']))
+    current_connections = int(_to_number(health['connections']['current_connections']))
+    if max_connections and current_connections > max_connections * 0.8:
+        health['status'] = 'Warning'
+        health['warnings'] = health.get('warnings', []) + [f'High connection usage: {current_connections}/{max_connections}']
+    
+    # Check for high thread running
+    threads_running = int(_to_number(health['threads']['running']))
+    if threads_running > 30:
+        health['status'] = 'Warning'
+        health['warnings'] = health.get('warnings', []) + [f'High number of running threads: {threads_running}']
+    
+    # Threads are expensive to create; a sustained creation rate means thread_cache_size is too small
+    if rates.get('threads_created', 0.0) > 10:
+        health['status'] = 'Warning'
+        health['warnings'] = health.get('warnings', []) + [f"High thread creation rate: {rates['threads_created']}/s"]
+    
+    return health
+
+
+LOCK_WAITS_SQL = """
+    SELECT /*+ MAX_EXECUTION_TIME({timeout}) */
+           w.REQUESTING_ENGINE_TRANSACTION_ID AS waiting_trx_id,
+           w.BLOCKING_ENGINE_TRANSACTION_ID AS blocking_trx_id,
+           rl.OBJECT_SCHEMA AS object_schema, rl.OBJECT_NAME AS object_name,
+           rl.INDEX_NAME AS index_name, rl.LOCK_TYPE AS lock_type,
+           rl.LOCK_MODE AS waiting_lock_mode, bl.LOCK_MODE AS blocking_lock_mode,
+           rl.LOCK_DATA AS lock_data,
+           rt.trx_mysql_thread_id AS waiting_pid, rt.trx_query AS waiting_query,
+           TIMESTAMPDIFF(SECOND, rt.trx_wait_started, NOW()) AS wait_seconds,
+           wth.PROCESSLIST_USER AS waiting_user, wth.PROCESSLIST_HOST AS waiting_host,
+           bt.trx_mysql_thread_id AS blocking_pid, bt.trx_query AS blocking_query,
+           bt.trx_state AS blocking_state, bt.trx_rows_locked AS blocking_rows_locked,
+           TIMESTAMPDIFF(SECOND, bt.trx_started, NOW()) AS blocking_trx_seconds,
+           bth.PROCESSLIST_USER AS blocking_user, bth.PROCESSLIST_HOST AS blocking_host,
+           bth.PROCESSLIST_COMMAND AS blocking_command
+    FROM performance_schema.data_lock_waits w
+    JOIN performance_schema.data_locks rl
+        ON rl.ENGINE_LOCK_ID = w.REQUESTING_ENGINE_LOCK_ID AND rl.ENGINE = w.ENGINE
+    JOIN performance_schema.data_locks bl
+        ON bl.ENGINE_LOCK_ID = w.BLOCKING_ENGINE_LOCK_ID AND bl.ENGINE = w.ENGINE
+    LEFT JOIN information_schema.INNODB_TRX rt ON rt.trx_id = w.REQUESTING_ENGINE_TRANSACTION_ID
+    LEFT JOIN information_schema.INNODB_TRX bt ON bt.trx_id = w.BLOCKING_ENGINE_TRANSACTION_ID
+    LEFT JOIN performance_schema.threads wth ON wth.THREAD_ID = w.REQUESTING_THREAD_ID
+    LEFT JOIN performance_schema.threads bth ON bth.THREAD_ID = w.BLOCKING_THREAD_ID
+    LIMIT %s
+"""
+
+# Aggregates a bounded sample of data_locks so a lock storm with millions of rows is not scanned in full
+LOCK_COUNTS_SQL = """
+    SELECT /*+ MAX_EXECUTION_TIME({timeout}) */
+           OBJECT_SCHEMA AS object_schema, OBJECT_NAME AS object_name,
+           SUM(LOCK_TYPE = 'TABLE') AS table_locks, SUM(LOCK_TYPE = 'RECORD') AS record_locks,
+           SUM(LOCK_STATUS = 'WAITING') AS waiting, COUNT(*) AS total
+    FROM (SELECT OBJECT_SCHEMA, OBJECT_NAME, LOCK_TYPE, LOCK_STATUS
+          FROM performance_schema.data_locks LIMIT %s) sample
+    GROUP BY OBJECT_SCHEMA, OBJECT_NAME
+    ORDER BY total DESC
+"""
+
+
+def build_lock_wait_tree(waits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build blocking chains from lock wait rows
+    
+    Args:
+        waits: Rows shaped like LOCK_WAITS_SQL output
+        
+    Returns:
+        List[Dict]: Root blockers (transactions that block others but are not
+                    waiting themselves), each with nested 'waiters', ordered by
+                    the number of transactions blocked behind them
+    """
+    nodes = {}
+    children = {}
+    waiting = set()
+    
+    for row in waits:
+        blocker = row['blocking_trx_id']
+        waiter = row['waiting_trx_id']
+        nodes.setdefault(blocker, {
+            'trx_id': blocker,
+            'pid': row.get('blocking_pid'),
+            'user': row.get('blocking_user'),
+            'host': row.get('blocking_host'),
+            'command': row.get('blocking_command'),
+            'query': row.get('blocking_query'),
+            'state': row.get('blocking_state'),
+            'trx_seconds': row.get('blocking_trx_seconds'),
+            'rows_locked': row.get('blocking_rows_locked')
+        })
+        node = nodes.setdefault(waiter, {'trx_id': waiter})
+        node.update({
+            'pid': row.get('waiting_pid'),
+            'user': row.get('waiting_user'),
+            'host': row.get('waiting_host'),
+            'query': row.get('waiting_query'),
+            'wait_seconds': row.get('wait_seconds'),
+            'waiting_for': {
+                'table': f"{row.get('object_schema')}.{row.get('object_name')}",
+                'index': row.get('index_name'),
+                'lock_type': row.get('lock_type'),
+                'lock_mode': row.get('waiting_lock_mode'),
+                'blocked_by_mode': row.get('blocking_lock_mode'),
+                'lock_data': row.get('lock_data')
+            }
+        })
+        waiting.add(waiter)
+        edges = children.setdefault(blocker, [])
+        if waiter not in edges:
+            edges.append(waiter)
+    
+    def expand(trx_id, path):
+        node = dict(nodes[trx_id])
+        node['waiters'] = []
+        node['blocked_count'] = 0
+        for child in children.get(trx_id, []):
+            if child in path:
+                # Deadlock cycle caught before InnoDB resolves it
+                node['cycle'] = True
+                continue
+            subtree = expand(child, path | {child})
+            node['waiters'].append(subtree)
+            node['blocked_count'] += 1 + subtree['blocked_count']
+        return node
+    
+    roots = [trx_id for trx_id in children if trx_id not in waiting]
+    if not roots and children:
+        # Every blocker is also waiting: a pure cycle, report from any member
+        roots = [next(iter(children))]
+    trees = [expand(trx_id, {trx_id}) for trx_id in roots]
+    return sorted(trees, key=lambda tree: tree['blocked_count'], reverse=True)
+
+
+# Upper bounds in seconds of the latency histogram buckets used by QueryStatsCollector
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+_DIGEST_PATTERNS = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'" + '|' + r'"(?:[^"\\]|\\.|"")*"'), '?'),
+    (re.compile(r'/\*.*?\*/|--[^\n]*|#[^\n]*', re.S), ' '),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b|(?<![\w`])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b|%s|%\(\w+\)s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+'), r'\1'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_query(query: str) -> str:
+    """
+    Normalize a statement into a digest text
+    
+    Comments are removed, literals and placeholders become '?', value lists
+    and multi-row VALUES collapse to '(...)' and whitespace is squeezed, so
+    statements differing only in their values share one digest.
+    
+    Args:
+        query: SQL statement
+        
+    Returns:
+        str: Normalized statement text
+    """
+    for pattern, replacement in _DIGEST_PATTERNS:
+        query = pattern.sub(replacement, query)
+    return query.strip().rstrip(';').strip()
+
+
+class QueryStatsCollector:
+    """Low-overhead per-digest latency histograms, row and error counts for MySQLClient calls"""
+    
+    def __init__(self, track_bytes: bool = False, max_digests: int = 10000):
+        """
+        Initialize the collector
+        
+        Args:
+            track_bytes: Estimate bytes received by summing result value sizes
+                         (costs a pass over every result)
+            max_digests: Maximum number of distinct digests kept; further
+                         digests are counted under '<other>'
+        """
+        self.track_bytes = track_bytes
+        self.max_digests = max_digests
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._clients = []
+    
+    def attach(self, client: 'MySQLClient') -> 'QueryStatsCollector':
+        """
+        Start collecting statistics for a client's calls
+        
+        Args:
+            client: Client to instrument
+            
+        Returns:
+            QueryStatsCollector: self, for chaining
+        """
+        self._clients.append((client, client.add_query_hook(after=self.record)))
+        return self
+    
+    def detach(self) -> None:
+        """Stop collecting statistics for all attached clients"""
+        for client, handle in self._clients:
+            client.remove_query_hook(handle)
+        self._clients = []
+    
+    def record(self, event: Dict[str, Any]) -> None:
+        """
+        Record a finished statement (used as an after hook)
+        
+        Args:
+            event: Hook event with 'method', 'query', 'duration', 'rows' and 'error'
+        """
+        digest = normalize_query(event['query'])
+        duration = event['duration']
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        received = 0
+        if self.track_bytes and event.get('result'):
+            received = _estimate_result_bytes(event['result'])
+        
+        with self._lock:
+            stats = self._stats.get(digest)
+            if stats is None:
+                if len(self._stats) >= self.max_digests:
+                    digest = '<other>'
+                    stats = self._stats.get(digest)
+                if stats is None:
+                    stats = self._stats[digest] = {
+                        'method': event['method'],
+                        'calls': 0,
+                        'errors': 0,
+                        'rows': 0,
+                        'bytes_sent': 0,
+                        'bytes_received': 0,
+                        'total_time': 0.0,
+                        'min_time': duration,
+                        'max_time': 0.0,
+                        'histogram': [0] * len(LATENCY_BUCKETS)
+                    }
+            stats['calls'] += 1
+            stats['rows'] += event.get('rows') or 0
+            stats['bytes_sent'] += len(event['query'])
+            stats['bytes_received'] += received
+            stats['total_time'] += duration
+            stats['min_time'] = min(stats['min_time'], duration)
+            stats['max_time'] = max(stats['max_time'], duration)
+            stats['histogram'][bucket] += 1
+            if event.get('error') is not None:
+                stats['errors'] += 1
+    
+    def reset(self) -> None:
+        """Discard all collected statistics"""
+        with self._lock:
+            self._stats = {}
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the collected statistics with derived averages and percentiles
+        
+        Returns:
+            Dict: Digest text mapped to its statistics
+        """
+        with self._lock:
+            stats = {digest: dict(values, histogram=list(values['histogram']))
+                     for digest, values in self._stats.items()}
+        for values in stats.values():
+            values['avg_time'] = values['total_time'] / values['calls'] if values['calls'] else 0.0
+            for percentile in (50, 95, 99):
+                values[f'p{percentile}_time'] = _histogram_percentile(values['histogram'], percentile)
+            values['histogram'] = {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS, values['histogram'])
+            }
+        return stats
+    
+    def top(self, n: int = 10, by: str = 'total_time') -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the digests that dominate a metric
+        
+        Args:
+            n: Number of digests to return
+            by: Statistic to rank by (total_time, calls, rows, errors, max_time, ...)
+            
+        Returns:
+            List[Tuple]: (digest, statistics) pairs, highest first
+        """
+        return sorted(self.snapshot().items(), key=lambda item: item[1][by], reverse=True)[:n]
+    
+    def to_json(self, **kwargs) -> str:
+        """
+        Export the collected statistics as JSON
+        
+        Args:
+            **kwargs: Extra arguments for json.dumps (e.g. indent)
+            
+        Returns:
+            str: JSON document mapping digests to statistics
+        """
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+def _histogram_percentile(histogram: List[int], percentile: float) -> Optional[float]:
+    """Estimate a percentile as the upper bound of the bucket containing it"""
+    total = sum(histogram)
+    if not total:
+        return None
+    threshold = total * percentile / 100.0
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram):
+        seen += count
+        if seen >= threshold:
+            return bound if bound != float('inf') else LATENCY_BUCKETS[-2]
+    return LATENCY_BUCKETS[-2]
+
+
+def _estimate_result_bytes(result: List[Any]) -> int:
+    """Roughly estimate the payload size of a result set"""
+    if isinstance(result, ColumnarResult):
+        result = zip(*(result.data[column] for column in result.columns))
+    size = 0
+    for row in result:
+        for value in (row.values() if isinstance(row, dict) else row):
+            if value is None:
+                continue
+            size += len(value) if isinstance(value, (str, bytes)) else 8
+    return size
+
+
+RESULT_MODES = ('dict', 'tuple', 'columnar')
+
+_INTEGER_FIELD_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.INT24,
+                        FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR}
+_FLOAT_FIELD_TYPES = {FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE, FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+
+
+@functools.lru_cache(maxsize=256)
+def _row_type(columns: Tuple[str, ...]):
+    """Return a namedtuple class for a column list, shared by all results with these columns"""
+    return namedtuple('Row', columns, rename=True)
+
+
+class ColumnarResult:
+    """Column-oriented query result: column names once, one array per column"""
+    
+    __slots__ = ('columns', 'data', 'rows')
+    
+    def __init__(self, columns: List[str], data: Dict[str, Any], rows: int):
+        """
+        Args:
+            columns: Column names in result order
+            data: Column names mapped to their values (NumPy array, array.array or list)
+            rows: Number of rows
+        """
+        self.columns = columns
+        self.data = data
+        self.rows = rows
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def __getitem__(self, column: str) -> Any:
+        return self.data[column]
+    
+    def __repr__(self) -> str:
+        return f"ColumnarResult(columns={self.columns!r}, rows={self.rows})"
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Convert back to the default list of dictionaries"""
+        values = [self.data[column] for column in self.columns]
+        return [dict(zip(self.columns, row)) for row in zip(*values)]
+
+
+def _column_array(values: tuple, type_code: int) -> Any:
+    """Pack one column into a NumPy or typed array when it is numeric and has no NULLs"""
+    if type_code in _INTEGER_FIELD_TYPES:
+        typecode, dtype = 'q', 'int64'
+    elif type_code in _FLOAT_FIELD_TYPES:
+        # DECIMAL becomes float64 here; use the 'dict' or 'tuple' mode for exact values
+        typecode, dtype = 'd', 'float64'
+    else:
+        return list(values)
+    if None in values:
+        return list(values)
+    try:
+        if np is not None:
+            return np.fromiter(values, dtype=dtype, count=len(values))
+        return array.array(typecode, values if typecode == 'q' else map(float, values))
+    except (OverflowError, TypeError, ValueError):
+        # BIGINT UNSIGNED values beyond the int64 range
+        return list(values)
+
+
+def build_result(description: tuple, rows: List[tuple], result_mode: str) -> Any:
+    """
+    Shape tuple rows from a plain cursor into the requested result mode
+    
+    Args:
+        description: cursor.description of the query
+        rows: Rows as tuples
+        result_mode: 'tuple' for namedtuple rows or 'columnar' for a ColumnarResult
+        
+    Returns:
+        List of namedtuples, or a ColumnarResult
+    """
+    columns = [column[0] for column in description or ()]
+    if result_mode == 'tuple':
+        return list(map(_row_type(tuple(columns))._make, rows))
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {name: _column_array(column_values, field[1])
+            for name, column_values, field in zip(columns, values, description or ())}
+    return ColumnarResult(columns, data, len(rows))
+
+
+class PoolTimeoutError(pymysql.err.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections"""
+    
+    def __init__(self, host: str, port: int = 3306, user: str = 'root',
+                 password: str = '', database: str = None, charset: str = 'utf8mb4',
+                 connect_timeout: int = 10, cursorclass=None,
+                 min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300, max_lifetime: float = 3600,
+                 ping_on_checkout: bool = True, checkout_timeout: float = 30,
+                 **connect_kwargs):
+        """
+        Initialize connection pool parameters
+        
+        Args:
+            host: MySQL server hostname or IP
+            port: MySQL server port
+            user: MySQL username
+            password: MySQL password
+            database: Optional default database for pooled connections
+            charset: Character set for connections
+            connect_timeout: Connection timeout in seconds
+            cursorclass: Custom cursor class (default: DictCursor)
+            min_size: Number of connections kept open while idle
+            max_size: Maximum number of connections open at the same time
+            idle_timeout: Seconds an idle connection above min_size is kept
+            max_lifetime: Seconds after which a connection is recycled
+            ping_on_checkout: Check connection liveness before handing it out
+            checkout_timeout: Default seconds to wait for a free connection
+            **connect_kwargs: Extra keyword arguments for pymysql.connect
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        
+        self.host = host
+        self.port = port
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_on_checkout = ping_on_checkout
+        self.checkout_timeout = checkout_timeout
+        self._connect_args = dict(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=database,
+            charset=charset,
+            connect_timeout=connect_timeout,
+            cursorclass=cursorclass or pymysql.cursors.DictCursor,
+            **connect_kwargs
+        )
+        
+        self._lock = threading.Condition(threading.Lock())
+        # Idle connections as (connection, created_at, last_used), most recently used last
+        self._idle = deque()
+        self._created_at = {}
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkout_timeouts': 0,
+            'failed_pings': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'peak_in_use': 0
+        }
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def size(self) -> int:
+        """Number of connections currently owned by the pool"""
+        with self._lock:
+            return self._in_use + len(self._idle)
+    
+    def fill(self) -> int:
+        """
+        Open connections until min_size connections are available
+        
+        Returns:
+            int: Number of connections opened
+        """
+        opened = 0
+        while True:
+            with self._lock:
+                if self._closed or self._in_use + len(self._idle) >= self.min_size:
+                    return opened
+                # Reserve the slot so concurrent fills do not overshoot
+                self._in_use += 1
+            try:
+                conn = self._create_connection()
+            except pymysql.Error:
+                with self._lock:
+                    self._in_use -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self._in_use -= 1
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+                self._lock.notify()
+            opened += 1
+    
+    def acquire(self, timeout: float = None):
+        """
+        Check out a connection from the pool
+        
+        Args:
+            timeout: Seconds to wait for a free connection (default: checkout_timeout)
+        
+        Returns:
+            A live pymysql connection that must be given back with release()
+        
+        Raises:
+            PoolTimeoutError: If no connection became available in time
+            pymysql.Error: If a new connection could not be established
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        waited = False
+        
+        while True:
+            conn = None
+            create = False
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise pymysql.err.InterfaceError("Connection pool is closed")
+                    if self._idle:
+                        conn, created_at, last_used = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use < self.max_size:
+                        self._in_use += 1
+                        create = True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats['checkout_timeouts'] += 1
+                        raise PoolTimeoutError(
+                            2013, f"Timed out after {timeout}s waiting for a connection to {self.host}:{self.port}")
+                    waited = True
+                    self._lock.wait(remaining)
+            
+            if create:
+                try:
+                    conn = self._create_connection()
+                except pymysql.Error:
+                    with self._lock:
+                        self._in_use -= 1
+                        self._lock.notify()
+                    raise
+            elif not self._is_usable(conn, created_at, last_used):
+                self._discard(conn)
+                continue
+            
+            wait_time = time.monotonic() - started
+            with self._lock:
+                self._stats['checkouts'] += 1
+                if waited:
+                    self._stats['waits'] += 1
+                self._stats['wait_time_total'] += wait_time
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+                self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+            return conn
+    
+    def release(self, conn, discard: bool = False) -> None:
+        """
+        Give a checked out connection back to the pool
+        
+        Args:
+            conn: Connection obtained from acquire()
+            discard: Close the connection instead of reusing it
+        """
+        if not discard and conn.open:
+            try:
+                # Do not leak an open transaction (and its snapshot) to the next user
+                if conn.server_status and conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn.rollback()
+            except pymysql.Error as e:
+                logger.debug(f"Rollback on release failed, discarding connection: {e}")
+                discard = True
+        else:
+            discard = True
+        
+        with self._lock:
+            if not discard and not self._closed:
+                self._in_use -= 1
+                self._idle.append((conn, self._created_at.get(id(conn), time.monotonic()), time.monotonic()))
+                self._lock.notify()
+                return
+        self._discard(conn)
+    
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        Context manager that checks out a connection and releases it afterwards
+        
+        Connections that raised a connection-level error are closed instead
+        of being returned to the pool.
+        
+        Args:
+            timeout: Seconds to wait for a free connection
+        """
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+    
+    def prune(self) -> int:
+        """
+        Close idle connections that exceeded idle_timeout or max_lifetime
+        
+        Returns:
+            int: Number of connections closed
+        """
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            total = self._in_use + len(self._idle)
+            keep = deque()
+            # Oldest idle connections are at the left side of the deque
+            for conn, created_at, last_used in self._idle:
+                if (self.max_lifetime and now - created_at > self.max_lifetime) or \
+                        (self.idle_timeout and now - last_used > self.idle_timeout and total > self.min_size):
+                    expired.append(conn)
+                    total -= 1
+                else:
+                    keep.append((conn, created_at, last_used))
+            self._idle = keep
+        for conn in expired:
+            self._discard(conn, counted=False)
+        return len(expired)
+    
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            self._lock.notify_all()
+        for conn in idle:
+            self._discard(conn, counted=False)
+        logger.info(f"Connection pool for {self.host}:{self.port} closed")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage statistics
+        
+        Returns:
+            Dict: Pool size, usage counters and checkout wait times
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'size': self._in_use + len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            })
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+    
+    def _create_connection(self):
+        """Open a new connection and register its creation time"""
+        conn = pymysql.connect(**self._connect_args)
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats['connections_created'] += 1
+        logger.debug(f"Opened pooled connection to {self.host}:{self.port}")
+        return conn
+    
+    def _is_usable(self, conn, created_at: float, last_used: float) -> bool:
+        """Check whether an idle connection may be handed out again"""
+        now = time.monotonic()
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return False
+        if self.idle_timeout and now - last_used > self.idle_timeout:
+            return False
+        if not conn.open:
+            return False
+        if self.ping_on_checkout:
+            try:
+                conn.ping(reconnect=False)
+            except pymysql.Error:
+                with self._lock:
+                    self._stats['failed_pings'] += 1
+                return False
+        return True
+    
+    def _discard(self, conn, counted: bool = True) -> None:
+        """Close a connection and drop it from the pool accounting"""
+        try:
+            if conn.open:
+                conn.close()
+        except pymysql.Error:
+            pass
+        with self._lock:
+            if counted:
+                self._in_use -= 1
+            self._created_at.pop(id(conn), None)
+            self._stats['connections_closed'] += 1
+            self._lock.notify()
+
+
 class MySQLClient:
     """MySQL operations client using pymysql"""
     
     def __init__(self, host: str, port: int = 3306, user: str = 'root', 
                  password: str = '', charset: str = 'utf8mb4', 
-                 connect_timeout: int = 10, cursorclass=None):
+                 connect_timeout: int = 10, cursorclass=None,
+                 read_timeout: int = None, pool: ConnectionPool = None):
         """
         Initialize MySQL client connection parameters
         
@@ -37,6 +1006,8 @@ class MySQLClient:
             charset: Character set for connection
             connect_timeout: Connection timeout in seconds
             cursorclass: Custom cursor class (default: DictCursor)
+            read_timeout: Optional timeout in seconds for reading from and writing to the server
+            pool: Optional connection pool to run queries on instead of a single connection
         """
         self.host = host
         self.port = port
@@ -45,7 +1016,56 @@ class MySQLClient:
         self.charset = charset
         self.connect_timeout = connect_timeout
         self.cursorclass = cursorclass or pymysql.cursors.DictCursor
+        self.read_timeout = read_timeout
         self.conn = None
+        self.pool = pool
+        self._owns_pool = False
+        self._health_snapshot = None
+        self._hooks = []
+        self._metadata_cache = None
+        
+    def enable_pool(self, min_size: int = 1, max_size: int = 10, database: str = None,
+                    **pool_kwargs) -> ConnectionPool:
+        """
+        Run all queries of this client on a thread-safe connection pool
+        
+        Args:
+            min_size: Number of connections kept open while idle
+            max_size: Maximum number of concurrent connections
+            database: Optional default database for pooled connections
+            **pool_kwargs: Extra ConnectionPool options (idle_timeout, max_lifetime, ...)
+            
+        Returns:
+            ConnectionPool: The pool used by this client
+        """
+        if self.pool is not None and self._owns_pool:
+            self.pool.close()
+        pool_kwargs.setdefault('read_timeout', self.read_timeout)
+        pool_kwargs.setdefault('write_timeout', self.read_timeout)
+        self.pool = ConnectionPool(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=database,
+            charset=self.charset,
+            connect_timeout=self.connect_timeout,
+            cursorclass=self.cursorclass,
+            min_size=min_size,
+            max_size=max_size,
+            **pool_kwargs
+        )
+        self._owns_pool = True
+        return self.pool
+        
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool usage statistics
+        
+        Returns:
+            Dict: Pool statistics, empty if the client is not pooled
+        """
+        return self.pool.stats() if self.pool is not None else {}
         
     def connect(self, database: str = None) -> bool:
         """
@@ -57,28 +1077,65 @@ class MySQLClient:
         Returns:
             bool: True if connection successful, False otherwise
         """
+        if self.pool is not None:
+            try:
+                self.pool.fill()
+                logger.info(f"Connection pool ready for MySQL server at {self.host}:{self.port}")
+                return True
+            except pymysql.Error as e:
+                logger.error(f"Failed to connect to MySQL server: {e}")
+                return False
+        
         try:
-            self.conn = pymysql.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=database,
-                charset=self.charset,
-                connect_timeout=self.connect_timeout,
-                cursorclass=self.cursorclass
-            )
+            self.conn = self.new_connection(database)
             logger.info(f"Connected to MySQL server at {self.host}:{self.port}")
             return True
         except pymysql.Error as e:
             logger.error(f"Failed to connect to MySQL server: {e}")
             return False
     
+    def new_connection(self, database: str = None, **kwargs):
+        """
+        Open a dedicated connection with this client's parameters
+        
+        The connection is not managed by the client and must be closed by the
+        caller. Used for work that needs its own session, such as snapshot
+        transactions or background writers.
+        
+        Args:
+            database: Optional database name to connect to
+            **kwargs: Overrides for pymysql.connect arguments
+            
+        Returns:
+            A new pymysql connection
+            
+        Raises:
+            pymysql.Error: If the connection could not be established
+        """
+        params = dict(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=database,
+            charset=self.charset,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            write_timeout=self.read_timeout,
+            cursorclass=self.cursorclass
+        )
+        params.update(kwargs)
+        return pymysql.connect(**params)
+    
     def disconnect(self) -> None:
         """Close MySQL connection if open"""
         if self.conn and self.conn.open:
             self.conn.close()
             logger.info(f"Disconnected from MySQL server at {self.host}:{self.port}")
+        if self.pool is not None and self._owns_pool:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
     
     def reconnect(self, database: str = None) -> bool:
         """
@@ -90,35 +1147,76 @@ class MySQLClient:
         Returns:
             bool: True if reconnection successful, False otherwise
         """
+        if self.pool is not None:
+            self.pool.prune()
+            return self.connect(database)
         self.disconnect()
         return self.connect(database)
     
-    def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a connection to run statements on
+        
+        Uses a pooled connection when a pool is configured, otherwise the
+        client's own connection, which is (re)established on demand.
+        
+        Raises:
+            pymysql.Error: If no connection could be established
+        """
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        
+        if not self.conn or not self.conn.open:
+            logger.warning("Not connected to MySQL server. Attempting to reconnect...")
+            if not self.connect():
+                raise pymysql.err.OperationalError(2003, "Failed to reconnect to MySQL server")
+        yield self.conn
+    
+    def execute_query(self, query: str, params: tuple = None, result_mode: str = 'dict') -> Any:
         """
         Execute a SELECT query and return results
         
         Args:
             query: SQL query to execute
             params: Parameters for the query
+            result_mode: 'dict' (list of dictionaries), 'tuple' (list of
+                         namedtuples) or 'columnar' (ColumnarResult with
+                         NumPy or typed arrays for numeric columns)
             
         Returns:
-            List of dictionaries containing query results
+            List of dictionaries containing query results, or the shape
+            selected by result_mode
         """
-        if not self.conn or not self.conn.open:
-            logger.warning("Not connected to MySQL server. Attempting to reconnect...")
-            if not self.connect():
-                logger.error("Failed to reconnect to MySQL server")
-                return []
-        
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params)
-                result = cursor.fetchall()
-                logger.debug(f"Query executed successfully: {query}")
-                return result
+            return self._execute_query(query, params, result_mode)
         except pymysql.Error as e:
             logger.error(f"Error executing query: {e}")
-            return []
+            return ColumnarResult([], {}, 0) if result_mode == 'columnar' else []
+    
+    def _execute_query(self, query: str, params: tuple = None, result_mode: str = 'dict') -> Any:
+        """Execute a SELECT query like execute_query, but raise pymysql.Error on failure"""
+        if result_mode not in RESULT_MODES:
+            raise ValueError(f"Unknown result mode '{result_mode}', expected one of {', '.join(RESULT_MODES)}")
+        event = self._hook_start('execute_query', query, params) if self._hooks else None
+        try:
+            with self.connection() as conn:
+                cursorclass = None if result_mode == 'dict' else pymysql.cursors.Cursor
+                with conn.cursor(cursorclass) as cursor:
+                    cursor.execute(query, params)
+                    result = cursor.fetchall()
+                    if result_mode != 'dict':
+                        result = build_result(cursor.description, result, result_mode)
+                    logger.debug(f"Query executed successfully: {query}")
+                    if event:
+                        self._hook_finish(event, rows=len(result), result=result)
+                    return result
+        except pymysql.Error as e:
+            if event:
+                self._hook_finish(event, error=e)
+            raise
     
     def execute_write(self, query: str, params: tuple = None) -> int:
         """
@@ -131,23 +1229,33 @@ class MySQLClient:
         Returns:
             int: Number of affected rows
         """
-        if not self.conn or not self.conn.open:
-            logger.warning("Not connected to MySQL server. Attempting to reconnect...")
-            if not self.connect():
-                logger.error("Failed to reconnect to MySQL server")
-                return 0
-        
         try:
-            with self.conn.cursor() as cursor:
-                affected_rows = cursor.execute(query, params)
-                self.conn.commit()
-                logger.debug(f"Write query executed successfully: {query}")
-                return affected_rows
+            return self._execute_write(query, params)
         except pymysql.Error as e:
             logger.error(f"Error executing write query: {e}")
-            self.conn.rollback()
             return 0
     
+    def _execute_write(self, query: str, params: tuple = None) -> int:
+        """Execute a write query like execute_write, but raise pymysql.Error on failure"""
+        event = self._hook_start('execute_write', query, params) if self._hooks else None
+        try:
+            with self.connection() as conn:
+                try:
+                    with conn.cursor() as cursor:
+                        affected_rows = cursor.execute(query, params)
+                    conn.commit()
+                except pymysql.Error:
+                    self._rollback(conn)
+                    raise
+                logger.debug(f"Write query executed successfully: {query}")
+                if event:
+                    self._hook_finish(event, rows=affected_rows)
+                return affected_rows
+        except pymysql.Error as e:
+            if event:
+                self._hook_finish(event, error=e)
+            raise
+    
     def execute_many(self, query: str, params_list: List[tuple]) -> int:
         """
         Execute a batch write query and return affected row count
@@ -159,23 +1267,209 @@ class MySQLClient:
         Returns:
             int: Number of affected rows
         """
-        if not self.conn or not self.conn.open:
-            logger.warning("Not connected to MySQL server. Attempting to reconnect...")
-            if not self.connect():
-                logger.error("Failed to reconnect to MySQL server")
-                return 0
-        
+        event = self._hook_start('execute_many', query, params_list) if self._hooks else None
         try:
-            with self.conn.cursor() as cursor:
-                affected_rows = cursor.executemany(query, params_list)
-                self.conn.commit()
+            with self.connection() as conn:
+                try:
+                    with conn.cursor() as cursor:
+                        affected_rows = cursor.executemany(query, params_list)
+                    conn.commit()
+                except pymysql.Error:
+                    self._rollback(conn)
+                    raise
                 logger.debug(f"Batch query executed successfully: {query}")
+                if event:
+                    self._hook_finish(event, rows=affected_rows)
                 return affected_rows
         except pymysql.Error as e:
             logger.error(f"Error executing batch query: {e}")
-            self.conn.rollback()
+            if event:
+                self._hook_finish(event, error=e)
             return 0
     
+    def add_query_hook(self, before=None, after=None) -> Tuple[Any, Any]:
+        """
+        Register callbacks run around execute_query, execute_write, execute_many and iter_query
+        
+        Both callbacks receive the same event dictionary. before() sees
+        'method', 'query', 'params', 'host' and 'port'; after() additionally
+        sees 'duration' (seconds), 'rows', 'error' and, for execute_query,
+        'result'. Exceptions raised by hooks are logged and ignored.
+        
+        Args:
+            before: Optional callable invoked before the statement runs
+            after: Optional callable invoked after it finished or failed
+            
+        Returns:
+            Tuple: Handle to pass to remove_query_hook
+        """
+        handle = (before, after)
+        self._hooks = self._hooks + [handle]
+        return handle
+    
+    def remove_query_hook(self, handle: Tuple[Any, Any]) -> None:
+        """
+        Unregister callbacks added with add_query_hook
+        
+        Args:
+            handle: Handle returned by add_query_hook
+        """
+        self._hooks = [hook for hook in self._hooks if hook is not handle]
+    
+    def _hook_start(self, method: str, query: str, params: Any) -> Dict[str, Any]:
+        """Create the hook event for a statement and run the before callbacks"""
+        event = {
+            'method': method,
+            'query': query,
+            'params': params,
+            'host': self.host,
+            'port': self.port,
+            'hooks': self._hooks
+        }
+        for before, _ in event['hooks']:
+            if before is not None:
+                try:
+                    before(event)
+                except Exception as e:
+                    logger.warning(f"Query hook failed: {e}")
+        event['started'] = time.perf_counter()
+        return event
+    
+    def _hook_finish(self, event: Dict[str, Any], rows: int = 0, result: Any = None,
+                     error: Exception = None) -> None:
+        """Complete the hook event for a statement and run the after callbacks"""
+        event['duration'] = time.perf_counter() - event['started']
+        event['rows'] = rows
+        event['result'] = result
+        event['error'] = error
+        for _, after in event['hooks']:
+            if after is not None:
+                try:
+                    after(event)
+                except Exception as e:
+                    logger.warning(f"Query hook failed: {e}")
+    
+    @staticmethod
+    def _rollback(conn) -> None:
+        """Roll back the current transaction, ignoring a connection that is already gone"""
+        try:
+            conn.rollback()
+        except pymysql.Error as e:
+            logger.debug(f"Rollback failed: {e}")
+    
+    @contextmanager
+    def _stream_cursor(self, query: str, params: tuple = None, tuples: bool = False):
+        """
+        Context manager yielding an executed unbuffered (server-side) cursor
+        
+        The connection stays busy until the cursor is closed; unread rows are
+        drained on close so the connection can be reused afterwards. Rows are
+        tuples if requested, otherwise in the client's cursor format.
+        """
+        if not tuples and issubclass(self.cursorclass, pymysql.cursors.DictCursorMixin):
+            cursor_class = pymysql.cursors.SSDictCursor
+        else:
+            cursor_class = pymysql.cursors.SSCursor
+        
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_class)
+            try:
+                cursor.execute(query, params)
+                yield cursor
+            finally:
+                cursor.close()
+    
+    def iter_query(self, query: str, params: tuple = None, batch_size: int = 1000,
+                   batched: bool = False) -> Iterator[Any]:
+        """
+        Execute a SELECT query and lazily yield its rows with constant memory
+        
+        Rows are read from an unbuffered server-side cursor batch_size rows at
+        a time. Without a pool, the client's connection cannot run other
+        queries until the iterator is exhausted or closed.
+        
+        Args:
+            query: SQL query to execute
+            params: Parameters for the query
+            batch_size: Number of rows fetched from the server per round trip
+            batched: Yield lists of up to batch_size rows instead of single rows
+            
+        Yields:
+            Rows (or lists of rows when batched) in the client's cursor format
+            
+        Raises:
+            pymysql.Error: If the stream fails after rows were already yielded
+        """
+        event = self._hook_start('iter_query', query, params) if self._hooks else None
+        streamed = False
+        count = 0
+        try:
+            with self._stream_cursor(query, params) as cursor:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    streamed = True
+                    count += len(rows)
+                    if batched:
+                        yield rows
+                    else:
+                        yield from rows
+                logger.debug(f"Query streamed successfully: {query}")
+                if event:
+                    self._hook_finish(event, rows=count)
+        except pymysql.Error as e:
+            logger.error(f"Error streaming query: {e}")
+            if event:
+                self._hook_finish(event, rows=count, error=e)
+            # A partially consumed result must not look like a complete one
+            if streamed:
+                raise
+    
+    def bulk_insert(self, table: str, columns: List[str], rows, database: str = None,
+                    **options) -> Dict[str, Any]:
+        """
+        Bulk insert rows from any iterable in packet-sized, periodically committed chunks
+        
+        Unlike execute_many, a failing chunk does not lose the whole batch;
+        its row range is reported in 'failed_chunks'.
+        
+        Args:
+            table: Target table name
+            columns: Column names matching the values of each row
+            rows: Iterable or generator of row sequences
+            database: Database of the target table
+            **options: Extra BulkLoader options (connections, commit_every, method, ...)
+            
+        Returns:
+            Dict: Load statistics including rows_loaded, rows_per_sec and failed_chunks
+        """
+        try:
+            return BulkLoader(self, table, columns, database=database, **options).load(rows)
+        except pymysql.Error as e:
+            logger.error(f"Failed to bulk insert into '{table}': {e}")
+            return {'rows': 0, 'rows_loaded': 0, 'rows_affected': 0, 'failed_chunks': [], 'error': str(e)}
+    
+    def export_query(self, query: str, path: str, params: tuple = None, **options) -> Dict[str, Any]:
+        """
+        Stream a query's result into a CSV, JSON Lines or Parquet file without staging it in memory
+        
+        Args:
+            query: SELECT statement
+            path: Output file; the format follows the extension (.csv, .csv.gz,
+                  .jsonl, .jsonl.gz, .parquet)
+            params: Parameters for the query
+            **options: Extra QueryExporter options (format, batch_size, parquet_compression, ...)
+            
+        Returns:
+            Dict: Export statistics including rows and rows_per_sec; empty if the export failed
+        """
+        try:
+            return QueryExporter(self, query, path, params, **options).run()
+        except (pymysql.Error, OSError, ValueError, RuntimeError) as e:
+            logger.error(f"Failed to export query to '{path}': {e}")
+            return {}
+    
     def get_version(self) -> str:
         """
         Get MySQL server version
@@ -198,44 +1492,60 @@ class MySQLClient:
         result = self.execute_query("SHOW DATABASES")
         return [row['Database'] for row in result]
     
-    def get_tables(self, database: str) -> List[str]:
+    @property
+    def metadata_cache(self) -> 'SchemaMetadataCache':
+        """Schema metadata cache used by the use_cache variants of the introspection helpers"""
+        if self._metadata_cache is None:
+            self._metadata_cache = SchemaMetadataCache(self)
+        return self._metadata_cache
+    
+    def get_tables(self, database: str, use_cache: bool = False) -> List[str]:
         """
         Get list of tables in a database
         
         Args:
             database: Database name
+            use_cache: Serve from the bulk-loaded schema metadata cache
             
         Returns:
             List[str]: List of table names
         """
+        if use_cache:
+            return self.metadata_cache.get_tables(database)
         result = self.execute_query(f"SHOW TABLES FROM `{database}`")
         key = f"Tables_in_{database}"
         return [row[key] for row in result]
     
-    def get_table_structure(self, database: str, table: str) -> List[Dict[str, Any]]:
+    def get_table_structure(self, database: str, table: str, use_cache: bool = False) -> List[Dict[str, Any]]:
         """
         Get table structure
         
         Args:
             database: Database name
             table: Table name
+            use_cache: Serve from the bulk-loaded schema metadata cache
             
         Returns:
             List[Dict]: Table structure information
         """
+        if use_cache:
+            return self.metadata_cache.get_columns(database, table)
         return self.execute_query(f"DESCRIBE `{database}`.`{table}`")
     
-    def get_indexes(self, database: str, table: str) -> List[Dict[str, Any]]:
+    def get_indexes(self, database: str, table: str, use_cache: bool = False) -> List[Dict[str, Any]]:
         """
         Get table indexes
         
         Args:
             database: Database name
             table: Table name
+            use_cache: Serve from the bulk-loaded schema metadata cache
             
         Returns:
             List[Dict]: Table indexes information
         """
+        if use_cache:
+            return self.metadata_cache.get_indexes(database, table)
         return self.execute_query(f"SHOW INDEX FROM `{database}`.`{table}`")
     
     def get_process_list(self) -> List[Dict[str, Any]]:
@@ -247,18 +1557,31 @@ class MySQLClient:
         """
         return self.execute_query("SHOW FULL PROCESSLIST")
     
-    def kill_process(self, process_id: int) -> bool:
+    def iter_process_list(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the list of running processes
+        
+        Args:
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: Process information
+        """
+        return self.iter_query("SHOW FULL PROCESSLIST", batch_size=batch_size)
+    
+    def kill_process(self, process_id: int, query_only: bool = False) -> bool:
         """
         Kill a specific process
         
         Args:
             process_id: Process ID to kill
+            query_only: Only abort the running statement (KILL QUERY) and keep the connection
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            self.execute_write(f"KILL {process_id}")
+            self._execute_write(f"KILL {'QUERY ' if query_only else ''}{int(process_id)}")
             logger.info(f"Process {process_id} killed successfully")
             return True
         except pymysql.Error as e:
@@ -366,6 +1689,51 @@ class MySQLClient:
             logger.error(f"Failed to backup database '{database}': {e}")
             return False
     
+    def backup_database_parallel(self, database: str, output_dir: str, threads: int = 4,
+                                 **options) -> bool:
+        """
+        Backup a database with parallel worker connections into compressed per-table files
+        
+        Args:
+            database: Database name
+            output_dir: Output directory for the dump files and manifest.json
+            threads: Number of worker connections
+            **options: Extra ParallelDumper options (chunk_rows, compress_level, ...)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            ParallelDumper(self, database, output_dir, threads=threads, **options).run()
+            logger.info(f"Database '{database}' backed up to '{output_dir}' successfully")
+            return True
+        except (pymysql.Error, OSError, RuntimeError) as e:
+            logger.error(f"Failed to backup database '{database}': {e}")
+            return False
+    
+    def execute_write_chunked(self, database: str, table: str, template: str, params: tuple = None,
+                              **options) -> Dict[str, Any]:
+        """
+        Run a large UPDATE or DELETE in throttled primary key chunks, committing each chunk
+        
+        Args:
+            database: Database name
+            table: Table name
+            template: Statement with '{chunk}' (and optionally '{table}') placeholders,
+                      e.g. "DELETE FROM {table} WHERE {chunk} AND created_at < %s";
+                      a literal '%' must be written as '%%'
+            params: Parameters of the template's own placeholders
+            **options: Extra ChunkedDML options (chunk_seconds, throttle, checkpoint_path, ...)
+            
+        Returns:
+            Dict: Rows affected, chunks and rows/s; empty if the job failed
+        """
+        try:
+            return ChunkedDML(self, database, table, template, params, **options).run()
+        except (pymysql.Error, OSError, ValueError, TimeoutError) as e:
+            logger.error(f"Chunked write on '{database}.{table}' failed: {e}")
+            return {}
+    
     def restore_database(self, database: str, input_file: str) -> bool:
         """
         Restore a database from a mysqldump file (requires system access)
@@ -397,6 +1765,28 @@ class MySQLClient:
             logger.error(f"Failed to restore database '{database}': {e}")
             return False
     
+    def restore_database_parallel(self, database: str, source: str, threads: int = 4,
+                                  **options) -> bool:
+        """
+        Restore a database loading several tables at once
+        
+        Args:
+            database: Database name
+            source: ParallelDumper output directory or a single mysqldump file
+            threads: Number of tables loaded concurrently
+            **options: Extra ParallelRestorer options (defer_indexes, disable_binlog, ...)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            ParallelRestorer(self, database, source, threads=threads, **options).run()
+            logger.info(f"Database '{database}' restored from '{source}' successfully")
+            return True
+        except (pymysql.Error, OSError, RuntimeError, ValueError) as e:
+            logger.error(f"Failed to restore database '{database}': {e}")
+            return False
+    
     # Replication Management
     
     def get_replication_status(self) -> Dict[str, Any]:
@@ -494,32 +1884,29 @@ class MySQLClient:
             logger.error(f"Failed to reset replication: {e}")
             return False
     
-    def check_replication_health(self) -> Dict[str, Any]:
+    def check_replication_health(self, heartbeat: 'HeartbeatMonitor' = None) -> Dict[str, Any]:
         """
         Check replication health
         
+        Args:
+            heartbeat: Optional heartbeat monitor of this replica; its
+                       millisecond lag replaces Seconds_Behind_Master for
+                       the lag check
+            
         Returns:
             Dict: Replication health information
         """
-        status = self.get_replication_status()
-        if not status:
-            return {'status': 'Not a replica'}
-        
-        health = {
-            'status': 'Healthy',
-            'io_running': status.get('Slave_IO_Running', 'No'),
-            'sql_running': status.get('Slave_SQL_Running', 'No'),
-            'seconds_behind_master': status.get('Seconds_Behind_Master', 'NULL'),
-            'last_error': status.get('Last_Error', ''),
-            'last_io_error': status.get('Last_IO_Error', ''),
-            'last_sql_error': status.get('Last_SQL_Error', '')
-        }
-        
-        if health['io_running'] != 'Yes' or health['sql_running'] != 'Yes':
-            health['status'] = 'Error'
-        elif health['seconds_behind_master'] != 'NULL' and int(health['seconds_behind_master']) > 300:
-            health['status'] = 'Warning'
-        
+        heartbeat_lag_ms = None
+        if heartbeat is not None:
+            heartbeat_lag_ms = heartbeat.latest(max_age=2 * heartbeat.interval)
+            if heartbeat_lag_ms is None:
+                try:
+                    heartbeat_lag_ms = heartbeat.measure()
+                except pymysql.Error as e:
+                    logger.warning(f"Heartbeat lag measurement failed: {e}")
+        health = build_replication_health(self.get_replication_status(), heartbeat_lag_ms)
+        if heartbeat is not None and 'heartbeat_lag_ms' in health:
+            health['heartbeat_lag'] = heartbeat.stats(window=300)
         return health
     
     # User Management
@@ -612,14 +1999,29 @@ class MySQLClient:
             logger.error(f"Failed to revoke privileges from '{username}'@'{host}': {e}")
             return False
     
-    def get_users(self) -> List[Dict[str, Any]]:
+    def get_users(self, result_mode: str = 'dict') -> List[Dict[str, Any]]:
         """
         Get list of users
         
+        Args:
+            result_mode: Result shape, see execute_query
+            
         Returns:
             List[Dict]: User information
         """
-        return self.execute_query("SELECT * FROM mysql.user")
+        return self.execute_query("SELECT * FROM mysql.user", result_mode=result_mode)
+    
+    def iter_users(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the list of users
+        
+        Args:
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: User information
+        """
+        return self.iter_query("SELECT * FROM mysql.user", batch_size=batch_size)
     
     # Performance Monitoring
     
@@ -633,24 +2035,62 @@ class MySQLClient:
         Returns:
             List[Dict]: Slow query information
         """
-        return self.execute_query(f"""
+        return self.execute_query(self._slow_queries_sql(limit))
+    
+    def iter_slow_queries(self, limit: int = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream slow queries from slow query log
+        
+        Args:
+            limit: Optional maximum number of queries to return
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: Slow query information
+        """
+        return self.iter_query(self._slow_queries_sql(limit), batch_size=batch_size)
+    
+    @staticmethod
+    def _slow_queries_sql(limit: int = None) -> str:
+        """Build the slow log query shared by get_slow_queries and iter_slow_queries"""
+        limit_clause = f"LIMIT {int(limit)}" if limit is not None else ""
+        return f"""
             SELECT * FROM mysql.slow_log
             ORDER BY start_time DESC
-            LIMIT {limit}
-        """)
+            {limit_clause}
+        """
     
-    def get_table_size(self, database: str = None) -> List[Dict[str, Any]]:
+    def get_table_size(self, database: str = None, result_mode: str = 'dict') -> List[Dict[str, Any]]:
         """
         Get table sizes
         
         Args:
             database: Optional database name to filter tables
+            result_mode: Result shape, see execute_query
             
         Returns:
             List[Dict]: Table size information
         """
+        return self.execute_query(self._table_size_sql(database), result_mode=result_mode)
+    
+    def iter_table_size(self, database: str = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream table sizes, keeping memory flat for schemas with many tables
+        
+        Args:
+            database: Optional database name to filter tables
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: Table size information
+        """
+        return self.iter_query(self._table_size_sql(database), batch_size=batch_size)
+    
+    @staticmethod
+    def _table_size_sql(database: str = None) -> str:
+        """Build the table size query shared by get_table_size and iter_table_size"""
         where_clause = f"WHERE table_schema = '{database}'" if database else ""
-        return self.execute_query(f"""
+        return f"""
             SELECT 
                 table_schema as 'database',
                 table_name as 'table',
@@ -658,7 +2098,7 @@ class MySQLClient:
             FROM information_schema.TABLES
             {where_clause}
             ORDER BY (data_length + index_length) DESC
-        """)
+        """
     
     def get_innodb_status(self) -> str:
         """
@@ -710,16 +2150,62 @@ class MySQLClient:
             logger.error(f"Failed to analyze table '{database}.{table}': {e}")
             return False
     
-    def get_locks(self) -> List[Dict[str, Any]]:
+    def get_locks(self, result_mode: str = 'dict') -> List[Dict[str, Any]]:
         """
         Get current locks
         
+        Args:
+            result_mode: Result shape, see execute_query
+            
         Returns:
             List[Dict]: Lock information
         """
         return self.execute_query("""
             SELECT * FROM performance_schema.data_locks
-        """)
+        """, result_mode=result_mode)
+    
+    def iter_locks(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream current locks
+        
+        Args:
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: Lock information
+        """
+        return self.iter_query("SELECT * FROM performance_schema.data_locks", batch_size=batch_size)
+    
+    def analyze_lock_waits(self, max_waits: int = 1000, max_lock_rows: int = 100000,
+                           max_execution_ms: int = 5000) -> Dict[str, Any]:
+        """
+        Analyze lock waits as blocking chains instead of a flat lock list
+        
+        Args:
+            max_waits: Maximum number of lock wait rows read
+            max_lock_rows: Maximum number of data_locks rows sampled for per-table counts
+            max_execution_ms: Server-side time limit for each query
+            
+        Returns:
+            Dict: 'root_blockers' with nested waiters, 'lock_counts' per table,
+                  and flags telling whether the waits or lock sample were truncated
+        """
+        waits = self.execute_query(LOCK_WAITS_SQL.format(timeout=max_execution_ms), (max_waits,))
+        counts = self.execute_query(LOCK_COUNTS_SQL.format(timeout=max_execution_ms), (max_lock_rows,))
+        sampled = sum(int(row['total']) for row in counts)
+        
+        return {
+            'root_blockers': build_lock_wait_tree(waits),
+            'waiting_transactions': len({row['waiting_trx_id'] for row in waits}),
+            'waits_truncated': len(waits) >= max_waits,
+            'lock_counts': [
+                {key: int(value) if key not in ('object_schema', 'object_name') else value
+                 for key, value in row.items()}
+                for row in counts
+            ],
+            'locks_sampled': sampled,
+            'locks_truncated': sampled >= max_lock_rows
+        }
     
     def get_deadlocks(self) -> List[Dict[str, Any]]:
         """
@@ -735,7 +2221,9 @@ class MySQLClient:
         if "LATEST DETECTED DEADLOCK" in innodb_status:
             deadlock_section = innodb_status.split("LATEST DETECTED DEADLOCK")[1]
             deadlock_section = deadlock_section.split("TRANSACTIONS")[0]
-            deadlocks.append({"deadlock_info": deadlock_section.strip()})
+            deadlock = parse_deadlock(innodb_status) or {}
+            deadlock["deadlock_info"] = deadlock_section.strip()
+            deadlocks.append(deadlock)
         
         return deadlocks
     
@@ -805,72 +2293,5541 @@ class MySQLClient:
     
     # MySQL Health Check
     
+    def get_global_snapshot(self) -> Dict[str, Any]:
+        """
+        Take a snapshot of global status and key variables in one round trip
+        
+        Reads performance_schema.global_status, the variables needed by the
+        health check and the replication channel state with a single query.
+        Falls back to SHOW GLOBAL STATUS/VARIABLES when performance_schema
+        is unavailable.
+        
+        Returns:
+            Dict: 'status' and 'variables' dictionaries, 'replica' flag and
+                  the monotonic 'timestamp' the snapshot was taken at
+        """
+        timestamp = time.monotonic()
+        result = self.execute_query(GLOBAL_SNAPSHOT_SQL)
+        if result:
+            return parse_global_snapshot(result, timestamp)
+        
+        logger.warning("performance_schema snapshot unavailable, falling back to SHOW GLOBAL STATUS")
+        return {
+            'status': self.get_status(),
+            'variables': self.get_variables(),
+            'replica': bool(self.get_replication_status()),
+            'timestamp': timestamp
+        }
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Perform a comprehensive health check of the MySQL server
         
+        Costs one round trip (plus one for replicas). The previous snapshot
+        is kept on the client so repeated calls also report per-second rates
+        for the interval since the last call.
+        
         Returns:
             Dict: Health check results
         """
-        health = {
-            'status': 'Healthy',
-            'version': self.get_version(),
-            'uptime': self.get_status('Uptime')['Uptime'],
-            'connections': {
-                'max_connections': self.get_variables('max_connections')['max_connections'],
-                'current_connections': self.get_status('Threads_connected')['Threads_connected'],
-                'connection_errors': self.get_status('Connection_errors%')
-            },
-            'memory': {
-                'innodb_buffer_pool_size': self.get_variables('innodb_buffer_pool_size')['innodb_buffer_pool_size'],
-                'innodb_buffer_pool_usage': self.get_status('Innodb_buffer_pool%')
-            },
-            'threads': {
-                'running': self.get_status('Threads_running')['Threads_running'],
-                'connected': self.get_status('Threads_connected')['Threads_connected'],
-                'created': self.get_status('Threads_created')['Threads_created']
-            },
-            'queries': {
-                'slow_queries': self.get_status('Slow_queries')['Slow_queries'],
-                'questions': self.get_status('Questions')['Questions'],
-                'com_select': self.get_status('Com_select')['Com_select'],
-                'com_insert': self.get_status('Com_insert')['Com_insert'],
-                'com_update': self.get_status('Com_update')['Com_update'],
-                'com_delete': self.get_status('Com_delete')['Com_delete']
-            }
-        }
+        snapshot = self.get_global_snapshot()
+        previous = self._health_snapshot
+        self._health_snapshot = snapshot
+        health = build_health_report(snapshot, previous)
         
         # Check for replication if it's a replica
-        replication_status = self.get_replication_status()
-        if replication_status:
+        if snapshot['replica']:
             health['replication'] = self.check_replication_health()
             if health['replication']['status'] != 'Healthy':
                 health['status'] = health['replication']['status']
         
-        # Check for high thread usage
-        max_connections = int(health['connections']['max_connections'])
-        current_connections = int(health['connections']['current_connections'])
-        if current_connections > max_connections * 0.8:
-            health['status'] = 'Warning'
-            health['warnings'] = health.get('warnings', []) + [f'High connection usage: {current_connections}/{max_connections}']
+        return health
+
+# Health status severities, worst last
+HEALTH_SEVERITY = {'Healthy': 0, 'Warning': 1, 'Timeout': 2, 'Unreachable': 3, 'Error': 4}
+
+
+class FleetHealthChecker:
+    """Run health checks against many MySQL servers concurrently"""
+    
+    def __init__(self, inventory: List[Dict[str, Any]], max_workers: int = 64,
+                 host_timeout: float = 5.0, defaults: Dict[str, Any] = None):
+        """
+        Initialize the fleet health checker
         
-        # Check for high thread running
-        threads_running = int(health['threads']['running'])
-        if threads_running > 30:
-            health['status'] = 'Warning'
-            health['warnings'] = health.get('warnings', []) + [f'High number of running threads: {threads_running}']
+        Args:
+            inventory: Hosts to check; each entry holds MySQLClient arguments
+                       (host, port, user, password, ...) and an optional 'name'
+            max_workers: Maximum number of hosts checked at the same time
+            host_timeout: Deadline in seconds for a single host's check
+            defaults: MySQLClient arguments applied to every inventory entry
+        """
+        self.inventory = inventory
+        self.max_workers = max_workers
+        self.host_timeout = host_timeout
+        self.defaults = defaults or {}
+    
+    def _check_host(self, entry: Dict[str, Any], started: Dict[str, float], key: str) -> Dict[str, Any]:
+        """Connect to one host and run its health check"""
+        started[key] = time.monotonic()
+        params = dict(self.defaults)
+        params.update({k: v for k, v in entry.items() if k != 'name'})
+        # Socket timeouts keep abandoned checks from holding a worker for long
+        timeout = max(1, int(math.ceil(self.host_timeout)))
+        params['connect_timeout'] = min(params.get('connect_timeout', timeout), timeout)
+        params['read_timeout'] = min(params.get('read_timeout') or timeout, timeout)
         
-        return health
+        client = MySQLClient(**params)
+        result = {'name': key, 'host': client.host, 'port': client.port}
+        try:
+            if not client.connect():
+                result.update({'status': 'Unreachable', 'error': 'Connection failed'})
+                return result
+            health = client.health_check()
+            result.update({'status': health['status'], 'health': health})
+            return result
+        except Exception as e:
+            result.update({'status': 'Error', 'error': str(e)})
+            return result
+        finally:
+            client.disconnect()
+            result['elapsed'] = round(time.monotonic() - started[key], 3)
+    
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """
+        Check every host in the inventory, yielding results as they finish
+        
+        Hosts exceeding host_timeout are reported with status 'Timeout'.
+        
+        Yields:
+            Dict: Per-host result with 'name', 'host', 'port', 'status',
+                  'elapsed' and either 'health' or 'error'
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fleet-health')
+        started = {}
+        pending = {}
+        for entry in self.inventory:
+            key = entry.get('name') or f"{entry['host']}:{entry.get('port', self.defaults.get('port', 3306))}"
+            pending[executor.submit(self._check_host, entry, started, key)] = (key, entry)
+        
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=min(0.5, self.host_timeout), return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, entry = pending.pop(future)
+                    yield future.result()
+                
+                now = time.monotonic()
+                for future, (key, entry) in list(pending.items()):
+                    begin = started.get(key)
+                    if begin is not None and now - begin > self.host_timeout:
+                        # The worker finishes on its own socket timeouts; its result is dropped
+                        del pending[future]
+                        yield {
+                            'name': key,
+                            'host': entry['host'],
+                            'port': entry.get('port', self.defaults.get('port', 3306)),
+                            'status': 'Timeout',
+                            'error': f'Health check exceeded {self.host_timeout}s',
+                            'elapsed': round(now - begin, 3)
+                        }
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def sweep(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Check every host and aggregate the results
+        
+        Args:
+            top_n: Number of worst offenders to include in the summary
+            
+        Returns:
+            Dict: 'results' list and 'summary' from summarize()
+        """
+        started = time.monotonic()
+        results = list(self.run())
+        summary = self.summarize(results, top_n)
+        summary['elapsed'] = round(time.monotonic() - started, 3)
+        logger.info(f"Fleet health sweep of {len(results)} hosts finished in {summary['elapsed']}s: {summary['status_counts']}")
+        return {'results': results, 'summary': summary}
+    
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]], top_n: int = 10) -> Dict[str, Any]:
+        """
+        Aggregate per-host health results
+        
+        Args:
+            results: Results produced by run()
+            top_n: Number of worst offenders to return
+            
+        Returns:
+            Dict: Status counts, worst offenders and slowest hosts
+        """
+        status_counts = {}
+        for result in results:
+            status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+        
+        def badness(result):
+            health = result.get('health') or {}
+            lag = (health.get('replication') or {}).get('seconds_behind_master')
+            return (
+                HEALTH_SEVERITY.get(result['status'], len(HEALTH_SEVERITY)),
+                len(health.get('warnings', [])),
+                _to_number(lag) if lag not in (None, 'NULL') else 0.0,
+                _to_number((health.get('threads') or {}).get('running'))
+            )
+        
+        def problems(result):
+            health = result.get('health') or {}
+            found = list(health.get('warnings', []))
+            replication = health.get('replication') or {}
+            if replication.get('status', 'Healthy') != 'Healthy':
+                found.append(f"Replication {replication['status']}: "
+                             f"{replication.get('last_error') or 'lag ' + str(replication.get('seconds_behind_master'))}")
+            if result.get('error'):
+                found.append(result['error'])
+            return found
+        
+        offenders = sorted((r for r in results if r['status'] != 'Healthy'), key=badness, reverse=True)
+        slowest = sorted(results, key=lambda r: r.get('elapsed', 0.0), reverse=True)
+        return {
+            'hosts': len(results),
+            'status_counts': status_counts,
+            'worst_offenders': [
+                {'name': r['name'], 'status': r['status'], 'problems': problems(r)}
+                for r in offenders[:top_n]
+            ],
+            'slowest': [{'name': r['name'], 'elapsed': r.get('elapsed')} for r in slowest[:top_n]]
+        }
 
-# Usage example
-if __name__ == "__main__":
-    # Create a MySQL client
-    mysql = MySQLClient(
-        host="localhost",
-        port=3306,
-        user="root",
-        password="password"
-    )
+
+class _HashingWriter:
+    """Binary file wrapper that hashes and counts everything written through it"""
+    
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.bytes_written = 0
+    
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.bytes_written += len(data)
+        return self.fileobj.write(data)
+    
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+
+class ParallelDumper:
+    """Consistent, parallel, compressed logical backup of one database"""
+    
+    MANIFEST_FILE = 'manifest.json'
+    
+    def __init__(self, client: 'MySQLClient', database: str, output_dir: str,
+                 threads: int = 4, tables: List[str] = None, chunk_rows: int = 1000000,
+                 statement_size: int = 1024 * 1024, compress_level: int = 6,
+                 consistent: bool = True):
+        """
+        Initialize the dumper
+        
+        Args:
+            client: Client whose connection parameters are used for the workers
+            database: Database to dump
+            output_dir: Directory receiving the dump files and manifest
+            threads: Number of worker connections dumping in parallel
+            tables: Optional subset of tables to dump (default: all base tables)
+            chunk_rows: Approximate rows per output file for big tables with an
+                        integer primary key
+            statement_size: Approximate maximum size in bytes of one INSERT statement
+            compress_level: gzip compression level (1-9)
+            consistent: Take a consistent snapshot across all workers (needs RELOAD)
+        """
+        self.client = client
+        self.database = database
+        self.output_dir = output_dir
+        self.threads = max(1, threads)
+        self.tables = tables
+        self.chunk_rows = chunk_rows
+        self.statement_size = statement_size
+        self.compress_level = compress_level
+        self.consistent = consistent
+        self._lock = threading.Lock()
+        self._progress = {'rows': 0, 'bytes': 0, 'files': 0}
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Dump the database and write the manifest
+        
+        Table definitions and data are dumped; routines, triggers and events
+        are not (use MySQLClient.backup_database for those).
+        
+        Returns:
+            Dict: The manifest, also written to output_dir/manifest.json
+            
+        Raises:
+            pymysql.Error: If the snapshot could not be established
+            RuntimeError: If any table failed to dump
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = time.monotonic()
+        workers = [self.client.new_connection(self.database, cursorclass=pymysql.cursors.Cursor)
+                   for _ in range(self.threads)]
+        try:
+            snapshot = self._start_snapshot(workers)
+            tables = self._list_tables(workers[0])
+            manifest = {
+                'database': self.database,
+                'host': f"{self.client.host}:{self.client.port}",
+                'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'consistent': self.consistent,
+                'binlog': snapshot,
+                'tables': {},
+                'errors': []
+            }
+            
+            # Definitions are small; write them up front from the snapshot connection
+            manifest['schema_file'] = self._write_file(
+                f"{self.database}-schema-create.sql.gz",
+                [self._show_create(workers[0], 'DATABASE', f"`{self.database}`") + ";\n"])['file']
+            tasks = []
+            for table in tables:
+                kind = 'VIEW' if table['type'] == 'VIEW' else 'TABLE'
+                schema = self._write_file(
+                    f"{self.database}.{table['name']}-schema.sql.gz",
+                    [self._show_create(workers[0], kind, f"`{self.database}`.`{table['name']}`") + ";\n"])
+                manifest['tables'][table['name']] = {
+                    'type': table['type'],
+                    'schema_file': schema['file'],
+                    'rows': 0,
+                    'chunks': []
+                }
+                if table['type'] != 'VIEW':
+                    tasks.extend(self._plan_chunks(workers[0], table))
+            
+            # Biggest chunks first so the slowest table does not start last
+            tasks.sort(key=lambda task: task['estimated_rows'], reverse=True)
+            queue = Queue()
+            for task in tasks:
+                queue.put(task)
+            
+            results = []
+            threads = [
+                threading.Thread(target=self._worker, args=(conn, queue, results, manifest['errors']),
+                                 name=f'dump-worker-{i}')
+                for i, conn in enumerate(workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            for chunk in sorted(results, key=lambda c: (c['table'], c['chunk'])):
+                entry = manifest['tables'][chunk.pop('table')]
+                entry['rows'] += chunk['rows']
+                entry['chunks'].append(chunk)
+        finally:
+            for conn in workers:
+                try:
+                    conn.close()
+                except pymysql.Error:
+                    pass
+        
+        elapsed = time.monotonic() - started
+        manifest['finished_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        manifest['throughput'] = {
+            'seconds': round(elapsed, 3),
+            'rows': self._progress['rows'],
+            'bytes': self._progress['bytes'],
+            'files': self._progress['files'],
+            'rows_per_sec': round(self._progress['rows'] / elapsed, 1) if elapsed else 0.0,
+            'mb_per_sec': round(self._progress['bytes'] / 1024 / 1024 / elapsed, 2) if elapsed else 0.0
+        }
+        with open(os.path.join(self.output_dir, self.MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        
+        if manifest['errors']:
+            raise RuntimeError(f"{len(manifest['errors'])} chunk(s) of '{self.database}' failed to dump")
+        logger.info(f"Dumped '{self.database}': {manifest['throughput']['rows']} rows in "
+                    f"{manifest['throughput']['seconds']}s ({manifest['throughput']['rows_per_sec']} rows/s, "
+                    f"{manifest['throughput']['mb_per_sec']} MB/s compressed)")
+        return manifest
+    
+    def _start_snapshot(self, workers: List[Any]) -> Dict[str, Any]:
+        """Start a consistent snapshot transaction on every worker connection"""
+        snapshot = {}
+        lock_conn = self.client.new_connection(cursorclass=pymysql.cursors.DictCursor)
+        try:
+            with lock_conn.cursor() as cursor:
+                if self.consistent:
+                    # Block writes only while the workers open their snapshots
+                    cursor.execute("FLUSH TABLES WITH READ LOCK")
+                try:
+                    for conn in workers:
+                        with conn.cursor() as worker_cursor:
+                            worker_cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                            worker_cursor.execute("START TRANSACTION /*!40108 WITH CONSISTENT SNAPSHOT */")
+                    try:
+                        cursor.execute("SHOW MASTER STATUS")
+                    except pymysql.err.ProgrammingError:
+                        # Renamed in MySQL 8.4
+                        cursor.execute("SHOW BINARY LOG STATUS")
+                    status = cursor.fetchone()
+                    if status:
+                        snapshot = {
+                            'file': status.get('File'),
+                            'position': status.get('Position'),
+                            'gtid_executed': status.get('Executed_Gtid_Set', '')
+                        }
+                finally:
+                    if self.consistent:
+                        cursor.execute("UNLOCK TABLES")
+        finally:
+            lock_conn.close()
+        return snapshot
+    
+    def _list_tables(self, conn) -> List[Dict[str, Any]]:
+        """List tables to dump with their estimated sizes"""
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT TABLE_NAME, TABLE_TYPE, COALESCE(TABLE_ROWS, 0), COALESCE(DATA_LENGTH, 0)
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_TYPE IN ('BASE TABLE', 'VIEW')
+            """, (self.database,))
+            rows = cursor.fetchall()
+            # Generated columns cannot be inserted into, so like mysqldump only dump the others
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = %s AND EXTRA NOT IN ('VIRTUAL GENERATED', 'STORED GENERATED')
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """, (self.database,))
+            columns = {}
+            for name, column in cursor.fetchall():
+                columns.setdefault(name, []).append(column)
+        tables = [
+            {'name': name, 'type': table_type, 'rows': int(table_rows), 'data_length': int(data_length),
+             'columns': columns.get(name, [])}
+            for name, table_type, table_rows, data_length in rows
+            if self.tables is None or name in self.tables
+        ]
+        # Views reference tables, so create them last on restore
+        return sorted(tables, key=lambda t: (t['type'] == 'VIEW', t['name']))
+    
+    @staticmethod
+    def _show_create(conn, kind: str, name: str) -> str:
+        """Return the CREATE statement of a database, table or view"""
+        with conn.cursor() as cursor:
+            cursor.execute(f"SHOW CREATE {kind} {name}")
+            return cursor.fetchone()[1]
+    
+    def _plan_chunks(self, conn, table: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split a table into primary key ranges when it is big enough"""
+        whole = [{'table': table['name'], 'columns': table['columns'], 'chunk': 0, 'where': None,
+                  'order_by': None, 'estimated_rows': table['rows']}]
+        if table['rows'] <= self.chunk_rows:
+            return whole
+        
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT k.COLUMN_NAME, c.DATA_TYPE
+                FROM information_schema.KEY_COLUMN_USAGE k
+                JOIN information_schema.COLUMNS c
+                  ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME
+                 AND c.COLUMN_NAME = k.COLUMN_NAME
+                WHERE k.TABLE_SCHEMA = %s AND k.TABLE_NAME = %s AND k.CONSTRAINT_NAME = 'PRIMARY'
+            """, (self.database, table['name']))
+            pk = cursor.fetchall()
+            if len(pk) != 1 or pk[0][1] not in INTEGER_TYPES:
+                return whole
+            column = pk[0][0]
+            cursor.execute(f"SELECT MIN(`{column}`), MAX(`{column}`) FROM `{self.database}`.`{table['name']}`")
+            low, high = cursor.fetchone()
+        if low is None:
+            return whole
+        
+        chunks = max(1, int(math.ceil(table['rows'] / self.chunk_rows)))
+        step = max(1, int(math.ceil((high - low + 1) / chunks)))
+        bounds = list(range(low + step, high + 1, step))
+        tasks = []
+        # Open-ended first and last ranges also cover rows inserted outside MIN/MAX
+        lower = None
+        for index, upper in enumerate(bounds + [None]):
+            conditions = []
+            if lower is not None:
+                conditions.append(f"`{column}` >= {lower}")
+            if upper is not None:
+                conditions.append(f"`{column}` < {upper}")
+            tasks.append({
+                'table': table['name'],
+                'columns': table['columns'],
+                'chunk': index,
+                'where': ' AND '.join(conditions) or None,
+                'order_by': column,
+                'estimated_rows': table['rows'] // (len(bounds) + 1)
+            })
+            lower = upper
+        return tasks
+    
+    def _worker(self, conn, queue: 'Queue', results: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> None:
+        """Dump chunks from the queue on one snapshot connection"""
+        while True:
+            try:
+                task = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                result = self._dump_chunk(conn, task)
+                with self._lock:
+                    results.append(result)
+            except Exception as e:
+                logger.error(f"Failed to dump '{self.database}.{task['table']}' chunk {task['chunk']}: {e}")
+                with self._lock:
+                    errors.append({'table': task['table'], 'chunk': task['chunk'], 'error': str(e)})
+    
+    def _dump_chunk(self, conn, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Stream one chunk of a table into a compressed INSERT file"""
+        table = task['table']
+        columns = ', '.join(f"`{column}`" for column in task['columns'])
+        query = f"SELECT {columns} FROM `{self.database}`.`{table}`"
+        if task['where']:
+            query += f" WHERE {task['where']}"
+        if task['order_by']:
+            query += f" ORDER BY `{task['order_by']}`"
+        
+        filename = f"{self.database}.{table}.{task['chunk']:05d}.sql.gz"
+        rows = 0
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(query)
+            prefix = f"INSERT INTO `{table}` ({columns}) VALUES\n"
+            
+            def statements():
+                nonlocal rows
+                values, size = [], 0
+                for row in cursor.fetchall_unbuffered():
+                    value = '(' + ','.join(conn.escape(v) for v in row) + ')'
+                    values.append(value)
+                    size += len(value) + 2
+                    rows += 1
+                    if size >= self.statement_size:
+                        yield prefix + ',\n'.join(values) + ';\n'
+                        values, size = [], 0
+                if values:
+                    yield prefix + ',\n'.join(values) + ';\n'
+            
+            written = self._write_file(filename, statements())
+        finally:
+            cursor.close()
+        
+        with self._lock:
+            self._progress['rows'] += rows
+        logger.debug(f"Dumped {rows} rows of '{self.database}.{table}' to {filename}")
+        return {
+            'table': table,
+            'chunk': task['chunk'],
+            'file': filename,
+            'where': task['where'],
+            'rows': rows,
+            'bytes': written['bytes'],
+            'sha256': written['sha256']
+        }
+    
+    def _write_file(self, filename: str, chunks) -> Dict[str, Any]:
+        """Write text chunks to a gzip file, hashing the compressed bytes on the fly"""
+        path = os.path.join(self.output_dir, filename)
+        with open(path, 'wb') as raw:
+            writer = _HashingWriter(raw)
+            with gzip.GzipFile(filename='', mode='wb', fileobj=writer,
+                               compresslevel=self.compress_level, mtime=0) as gz:
+                for chunk in chunks:
+                    gz.write(chunk.encode('utf-8'))
+        with self._lock:
+            self._progress['bytes'] += writer.bytes_written
+            self._progress['files'] += 1
+        return {'file': filename, 'bytes': writer.bytes_written, 'sha256': writer.sha256.hexdigest()}
+
+
+def iter_sql_statements(lines) -> Iterator[str]:
+    """
+    Split mysqldump-style SQL text into statements
+    
+    Handles '--' comment lines, blank lines, multi-line statements and
+    DELIMITER changes (used around triggers and routines). Statements are
+    expected to end with the delimiter at the end of a line, as mysqldump
+    writes them.
+    
+    Args:
+        lines: Iterable of text lines
+        
+    Yields:
+        str: One SQL statement without its trailing delimiter
+    """
+    delimiter = ';'
+    buffer = []
+    for line in lines:
+        stripped = line.strip()
+        if not buffer:
+            if not stripped or stripped.startswith('-- ') or stripped == '--':
+                continue
+            if stripped.upper().startswith('DELIMITER '):
+                delimiter = stripped.split(None, 1)[1]
+                continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = ''.join(buffer).rstrip()[:-len(delimiter)].strip()
+            buffer = []
+            if statement:
+                yield statement
+    if buffer and ''.join(buffer).strip():
+        yield ''.join(buffer).strip()
+
+
+def split_deferred_indexes(create_sql: str) -> Tuple[str, List[str]]:
+    """
+    Remove secondary indexes from a CREATE TABLE statement so they can be built after loading
+    
+    Tables with foreign keys are left untouched, as are FULLTEXT/SPATIAL
+    indexes and indexes needed by an AUTO_INCREMENT column.
+    
+    Args:
+        create_sql: CREATE TABLE statement as written by SHOW CREATE TABLE
+        
+    Returns:
+        Tuple: (CREATE TABLE statement without the deferred indexes,
+                list of index definitions for ALTER TABLE ... ADD)
+    """
+    lines = create_sql.split('\n')
+    if len(lines) < 3 or 'FOREIGN KEY' in create_sql.upper():
+        return create_sql, []
+    
+    close = next((i for i, line in enumerate(lines) if line.startswith(')')), None)
+    if close is None:
+        return create_sql, []
+    definitions = [line.strip().rstrip(',') for line in lines[1:close]]
+    auto_increment = None
+    for definition in definitions:
+        if definition.startswith('`') and ' AUTO_INCREMENT' in definition.upper():
+            auto_increment = definition.split('`')[1]
+    
+    keep, deferred = [], []
+    for definition in definitions:
+        upper = definition.upper()
+        if upper.startswith('KEY ') or upper.startswith('UNIQUE KEY '):
+            columns = definition[definition.index('('):]
+            if auto_increment and columns.startswith(f"(`{auto_increment}`"):
+                keep.append(definition)
+            else:
+                deferred.append(definition)
+        else:
+            keep.append(definition)
+    
+    if not deferred:
+        return create_sql, []
+    body = ',\n'.join(f"  {definition}" for definition in keep)
+    return '\n'.join([lines[0], body] + lines[close:]), [f"ADD {definition}" for definition in deferred]
+
+
+class ParallelRestorer:
+    """Restore a database by loading tables concurrently over several connections"""
+    
+    # Section markers written by mysqldump
+    TABLE_MARKER = re.compile(r'^-- Table structure for table `(.+)`')
+    POST_MARKER = re.compile(r'^-- (Temporary view structure|Final view structure|Dumping routines|Dumping events)')
+    
+    def __init__(self, client: 'MySQLClient', database: str, source: str, threads: int = 4,
+                 defer_indexes: bool = True, disable_binlog: bool = True,
+                 drop_existing: bool = False, verify_checksums: bool = True,
+                 work_dir: str = None, progress_interval: float = 10,
+                 progress_callback=None):
+        """
+        Initialize the restorer
+        
+        Args:
+            client: Client whose connection parameters are used for the workers
+            database: Database to restore into (created if missing)
+            source: ParallelDumper output directory, or a single mysqldump
+                    file (.sql or .sql.gz) that is split by table first
+            threads: Number of tables loaded at the same time
+            defer_indexes: Build secondary indexes after the data is loaded
+            disable_binlog: Set sql_log_bin=0 for the restore sessions
+            drop_existing: Drop tables that already exist (dump directories only;
+                           mysqldump files carry their own DROP TABLE statements)
+            verify_checksums: Check manifest SHA-256 checksums before loading
+            work_dir: Scratch directory for splitting a single dump file
+            progress_interval: Seconds between progress log lines
+            progress_callback: Optional callable receiving the progress dictionary
+        """
+        self.client = client
+        self.database = database
+        self.source = source
+        self.threads = max(1, threads)
+        self.defer_indexes = defer_indexes
+        self.disable_binlog = disable_binlog
+        self.drop_existing = drop_existing
+        self.verify_checksums = verify_checksums
+        self.work_dir = work_dir
+        self.progress_interval = progress_interval
+        self.progress_callback = progress_callback
+        self._lock = threading.Lock()
+        self._bytes_total = 0
+        self._bytes_done = 0
+        self._started = None
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Restore the database
+        
+        Returns:
+            Dict: Restore statistics (tables, statements, bytes, seconds, errors)
+            
+        Raises:
+            pymysql.Error: If the target database could not be prepared
+            RuntimeError: If any table failed to restore
+        """
+        self._started = time.monotonic()
+        if os.path.isdir(self.source):
+            plan = self._plan_from_manifest(self.source)
+        else:
+            plan = self._plan_from_dump_file(self.source)
+        self._bytes_total = sum(os.path.getsize(path) for task in plan['tables'] for path in task['files'])
+        
+        conn = self.client.new_connection(cursorclass=pymysql.cursors.Cursor)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{self.database}`")
+        finally:
+            conn.close()
+        
+        stats = {'tables': 0, 'statements': 0, 'indexes_deferred': 0, 'errors': []}
+        queue = Queue()
+        for task in sorted(plan['tables'], key=lambda t: sum(os.path.getsize(p) for p in t['files']), reverse=True):
+            queue.put(task)
+        
+        stop = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(stop,), name='restore-progress', daemon=True)
+        reporter.start()
+        workers = [
+            threading.Thread(target=self._worker, args=(queue, plan['session'], stats), name=f'restore-worker-{i}')
+            for i in range(min(self.threads, max(1, len(plan['tables']))))
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            stop.set()
+        
+        # Views, routines and events depend on the tables, so they run last and serially
+        if plan['post'] and not stats['errors']:
+            conn = self._open_session(plan['session'])
+            try:
+                for path in plan['post']:
+                    stats['statements'] += self._execute_file(conn, path)
+            except pymysql.Error as e:
+                stats['errors'].append({'table': None, 'error': f"Post-restore objects failed: {e}"})
+            finally:
+                conn.close()
+        
+        stats['bytes'] = self._bytes_done
+        stats['seconds'] = round(time.monotonic() - self._started, 3)
+        if stats['errors']:
+            raise RuntimeError(f"{len(stats['errors'])} table(s) of '{self.database}' failed to restore")
+        logger.info(f"Restored {stats['tables']} tables into '{self.database}' in {stats['seconds']}s "
+                    f"({stats['indexes_deferred']} secondary indexes built after load)")
+        return stats
+    
+    def _plan_from_manifest(self, directory: str) -> Dict[str, Any]:
+        """Build the restore plan from a ParallelDumper output directory"""
+        with open(os.path.join(directory, ParallelDumper.MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        
+        tables, post = [], []
+        for name, entry in manifest['tables'].items():
+            schema_file = os.path.join(directory, entry['schema_file'])
+            if entry['type'] == 'VIEW':
+                post.append(schema_file)
+                continue
+            files = []
+            for chunk in entry['chunks']:
+                path = os.path.join(directory, chunk['file'])
+                if self.verify_checksums and _sha256_file(path) != chunk['sha256']:
+                    raise RuntimeError(f"Checksum mismatch for dump file '{path}'")
+                files.append(path)
+            tables.append({'table': name, 'schema': schema_file, 'files': files})
+        return {'session': [], 'tables': tables, 'post': post}
+    
+    def _plan_from_dump_file(self, path: str) -> Dict[str, Any]:
+        """Split a single mysqldump file into per-table files in the work directory"""
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix=f"restore-{self.database}-")
+        os.makedirs(work_dir, exist_ok=True)
+        opener = gzip.open if path.endswith('.gz') else open
+        
+        header, tables, post = [], [], []
+        current = None
+        post_file = None
+        with opener(path, 'rt', encoding='utf-8', errors='surrogateescape') as f:
+            for line in f:
+                match = self.TABLE_MARKER.match(line)
+                if match:
+                    if current is not None and current is not post_file:
+                        current.close()
+                    name = match.group(1)
+                    table_path = os.path.join(work_dir, f"{len(tables):05d}-{name}.sql.gz")
+                    current = gzip.open(table_path, 'wt', compresslevel=1, encoding='utf-8', errors='surrogateescape')
+                    tables.append({'table': name, 'schema': None, 'files': [table_path]})
+                elif self.POST_MARKER.match(line):
+                    if post_file is None:
+                        post_path = os.path.join(work_dir, 'post.sql.gz')
+                        post_file = gzip.open(post_path, 'wt', compresslevel=1, encoding='utf-8', errors='surrogateescape')
+                        post.append(post_path)
+                    if current is not None and current is not post_file:
+                        current.close()
+                    current = post_file
+                if current is None:
+                    header.append(line)
+                else:
+                    current.write(line)
+        if current is not None and current is not post_file:
+            current.close()
+        if post_file is not None:
+            post_file.close()
+        
+        session = []
+        for statement in iter_sql_statements(header):
+            upper = statement.upper()
+            if 'GTID_PURGED' in upper:
+                logger.warning("Skipping GTID_PURGED from dump header; set it manually if needed")
+            elif 'SQL_LOG_BIN' in upper or upper.startswith('USE ') or upper.startswith('CREATE DATABASE'):
+                continue
+            else:
+                session.append(statement)
+        logger.info(f"Split '{path}' into {len(tables)} table file(s) under '{work_dir}'")
+        return {'session': session, 'tables': tables, 'post': post}
+    
+    def _open_session(self, session: List[str]):
+        """Open a connection with relaxed checks for bulk loading"""
+        conn = self.client.new_connection(self.database, cursorclass=pymysql.cursors.Cursor)
+        with conn.cursor() as cursor:
+            for statement in session:
+                cursor.execute(statement)
+            cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            if self.disable_binlog:
+                cursor.execute("SET SESSION sql_log_bin = 0")
+        conn.autocommit(True)
+        return conn
+    
+    def _worker(self, queue: 'Queue', session: List[str], stats: Dict[str, Any]) -> None:
+        """Restore tables from the queue on one connection"""
+        try:
+            conn = self._open_session(session)
+        except pymysql.Error as e:
+            logger.error(f"Restore worker failed to connect: {e}")
+            with self._lock:
+                stats['errors'].append({'table': None, 'error': str(e)})
+            return
+        try:
+            while True:
+                try:
+                    task = queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    statements, deferred = self._restore_table(conn, task)
+                    with self._lock:
+                        stats['tables'] += 1
+                        stats['statements'] += statements
+                        stats['indexes_deferred'] += deferred
+                except (pymysql.Error, OSError) as e:
+                    logger.error(f"Failed to restore table '{self.database}.{task['table']}': {e}")
+                    with self._lock:
+                        stats['errors'].append({'table': task['table'], 'error': str(e)})
+        finally:
+            conn.close()
+    
+    def _restore_table(self, conn, task: Dict[str, Any]) -> Tuple[int, int]:
+        """Create one table, load its data and build its deferred indexes"""
+        deferred = []
+        statements = 0
+        if task['schema']:
+            with gzip.open(task['schema'], 'rt', encoding='utf-8') as f:
+                create_sql = f.read().strip().rstrip(';')
+            if self.defer_indexes:
+                create_sql, deferred = split_deferred_indexes(create_sql)
+            with conn.cursor() as cursor:
+                if self.drop_existing:
+                    cursor.execute(f"DROP TABLE IF EXISTS `{task['table']}`")
+                cursor.execute(create_sql)
+            statements += 1
+        
+        for path in task['files']:
+            statements += self._execute_file(conn, path, deferred if not task['schema'] else None)
+        
+        if deferred:
+            started = time.monotonic()
+            with conn.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE `{task['table']}` {', '.join(deferred)}")
+            logger.info(f"Built {len(deferred)} deferred index(es) on '{self.database}.{task['table']}' "
+                        f"in {time.monotonic() - started:.1f}s")
+        return statements, len(deferred)
+    
+    def _execute_file(self, conn, path: str, deferred: List[str] = None) -> int:
+        """
+        Execute every statement of a gzip SQL file, tracking progress by compressed bytes read
+        
+        When deferred is a list, secondary indexes are stripped from CREATE
+        TABLE statements in the file and appended to it.
+        """
+        executed = 0
+        done = 0
+        with open(path, 'rb') as raw, gzip.GzipFile(fileobj=raw) as gz:
+            text = io.TextIOWrapper(gz, encoding='utf-8', errors='surrogateescape')
+            with conn.cursor() as cursor:
+                for statement in iter_sql_statements(text):
+                    upper = statement.lstrip()[:16].upper()
+                    if upper.startswith('USE '):
+                        continue
+                    if deferred is not None and self.defer_indexes and upper.startswith('CREATE TABLE'):
+                        statement, indexes = split_deferred_indexes(statement)
+                        deferred.extend(indexes)
+                    cursor.execute(statement)
+                    executed += 1
+                    position = raw.tell()
+                    with self._lock:
+                        self._bytes_done += position - done
+                    done = position
+        return executed
+    
+    def progress(self) -> Dict[str, Any]:
+        """
+        Get restore progress
+        
+        Returns:
+            Dict: Bytes done/total, percent, MB/s and ETA in seconds
+        """
+        with self._lock:
+            done, total = self._bytes_done, self._bytes_total
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        rate = done / elapsed if elapsed else 0.0
+        return {
+            'bytes_done': done,
+            'bytes_total': total,
+            'percent': round(100.0 * done / total, 1) if total else 100.0,
+            'mb_per_sec': round(rate / 1024 / 1024, 2),
+            'eta_seconds': round((total - done) / rate) if rate else None
+        }
+    
+    def _report_progress(self, stop: threading.Event) -> None:
+        """Log progress periodically until stopped"""
+        while not stop.wait(self.progress_interval):
+            progress = self.progress()
+            logger.info(f"Restore of '{self.database}': {progress['percent']}% "
+                        f"({progress['mb_per_sec']} MB/s, ETA {progress['eta_seconds']}s)")
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+
+def _sha256_file(path: str) -> str:
+    """Compute the SHA-256 checksum of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BulkLoader:
+    """High-throughput bulk ingest of rows into one table over several connections"""
+    
+    # Escapes for LOAD DATA's default FIELDS ESCAPED BY '\\' format
+    _TSV_ESCAPES = {ord('\\'): '\\\\', ord('\t'): '\\t', ord('\n'): '\\n', ord('\r'): '\\r', 0: '\\0'}
+    
+    def __init__(self, client: 'MySQLClient', table: str, columns: List[str], database: str = None,
+                 connections: int = 4, commit_every: int = 10000, max_statement_bytes: int = None,
+                 method: str = 'insert', modifier: str = None, stop_on_error: bool = False):
+        """
+        Initialize the bulk loader
+        
+        Args:
+            client: Client whose connection parameters are used for the loader connections
+            table: Target table name
+            columns: Column names, in the order values appear in each row
+            database: Database of the target table
+            connections: Number of connections loading chunks in parallel
+            commit_every: Rows per transaction (one chunk)
+            max_statement_bytes: Maximum size of one multi-row INSERT
+                                 (default: 90% of the server's max_allowed_packet, at most 16MB)
+            method: 'insert' for multi-row INSERTs or 'load_data' for LOAD DATA LOCAL INFILE
+            modifier: Optional 'IGNORE' or 'REPLACE' duplicate handling
+            stop_on_error: Stop after the first failed chunk instead of continuing
+        """
+        if method not in ('insert', 'load_data'):
+            raise ValueError(f"Unknown bulk load method: {method}")
+        if modifier and modifier.upper() not in ('IGNORE', 'REPLACE'):
+            raise ValueError(f"Unknown duplicate handling modifier: {modifier}")
+        self.client = client
+        self.table = table
+        self.columns = list(columns)
+        self.database = database
+        self.connections = max(1, connections)
+        self.commit_every = max(1, commit_every)
+        self.max_statement_bytes = max_statement_bytes
+        self.method = method
+        self.modifier = modifier.upper() if modifier else None
+        self.stop_on_error = stop_on_error
+        self._target = f"`{database}`.`{table}`" if database else f"`{table}`"
+        self._column_list = ', '.join(f"`{column}`" for column in self.columns)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+    
+    def load(self, rows) -> Dict[str, Any]:
+        """
+        Load rows from any iterable (lists, generators, cursors)
+        
+        Rows are consumed lazily in chunks of commit_every rows, so memory is
+        bounded by connections * commit_every rows.
+        
+        Args:
+            rows: Iterable of row sequences matching columns
+            
+        Returns:
+            Dict: rows read/loaded, chunks, statements, seconds, rows_per_sec
+                  and failed_chunks as [{'start', 'end', 'error'}] row ranges
+                  that were not loaded, including ranges skipped after a
+                  failure with stop_on_error
+        """
+        stats = {'rows': 0, 'rows_loaded': 0, 'rows_affected': 0, 'chunks': 0, 'statements': 0,
+                 'failed_chunks': []}
+        started = time.monotonic()
+        conns = []
+        try:
+            for _ in range(self.connections):
+                conns.append(self.client.new_connection(self.database, cursorclass=pymysql.cursors.Cursor,
+                                                        local_infile=self.method == 'load_data'))
+            if self.max_statement_bytes is None:
+                with conns[0].cursor() as cursor:
+                    cursor.execute("SELECT @@max_allowed_packet")
+                    packet = int(cursor.fetchone()[0])
+                self.max_statement_bytes = min(int(packet * 0.9), 16 * 1024 * 1024)
+            
+            queue = Queue(maxsize=self.connections * 2)
+            workers = [
+                threading.Thread(target=self._worker, args=(conn, queue, stats), name=f'bulk-loader-{i}')
+                for i, conn in enumerate(conns)
+            ]
+            for worker in workers:
+                worker.start()
+            try:
+                start = 0
+                chunk = []
+                for row in rows:
+                    if self._stop.is_set():
+                        break
+                    chunk.append(row)
+                    if len(chunk) >= self.commit_every:
+                        self._put(queue, (start, chunk), workers)
+                        start += len(chunk)
+                        chunk = []
+                if chunk and not self._stop.is_set():
+                    self._put(queue, (start, chunk), workers)
+                    start += len(chunk)
+                stats['rows'] = start
+            finally:
+                for _ in workers:
+                    if not self._put(queue, None, workers):
+                        break
+                for worker in workers:
+                    worker.join()
+        finally:
+            for conn in conns:
+                try:
+                    conn.close()
+                except pymysql.Error:
+                    pass
+        
+        elapsed = time.monotonic() - started
+        stats['seconds'] = round(elapsed, 3)
+        stats['rows_per_sec'] = round(stats['rows_loaded'] / elapsed, 1) if elapsed else 0.0
+        stats['failed_chunks'].sort(key=lambda failure: failure['start'])
+        logger.info(f"Bulk loaded {stats['rows_loaded']}/{stats['rows']} rows into {self._target} "
+                    f"in {stats['seconds']}s ({stats['rows_per_sec']} rows/s, "
+                    f"{len(stats['failed_chunks'])} failed chunk(s))")
+        return stats
+    
+    def _put(self, queue: 'Queue', item: Any, workers: List[threading.Thread]) -> bool:
+        """
+        Queue an item without blocking forever once every worker has exited
+        
+        Returns:
+            bool: True if queued; False (and the stop flag set) if no worker is left
+        """
+        while True:
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                if not any(worker.is_alive() for worker in workers):
+                    logger.error(f"All bulk loader workers for {self._target} exited, stopping load")
+                    self._stop.set()
+                    return False
+    
+    def _worker(self, conn, queue: 'Queue', stats: Dict[str, Any]) -> None:
+        """Load chunks from the queue, one transaction per chunk"""
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            start, chunk = item
+            if self._stop.is_set():
+                # Report the range so callers can resume from it
+                with self._lock:
+                    stats['failed_chunks'].append({'start': start, 'end': start + len(chunk) - 1,
+                                                   'error': 'skipped after earlier failure'})
+                continue
+            try:
+                if self.method == 'load_data':
+                    affected, statements = self._load_data_chunk(conn, chunk)
+                else:
+                    affected, statements = self._insert_chunk(conn, chunk)
+                conn.commit()
+                with self._lock:
+                    stats['rows_loaded'] += len(chunk)
+                    stats['rows_affected'] += affected
+                    stats['chunks'] += 1
+                    stats['statements'] += statements
+            except Exception as e:
+                MySQLClient._rollback(conn)
+                logger.error(f"Bulk load of rows {start}-{start + len(chunk) - 1} into {self._target} failed: {e}")
+                with self._lock:
+                    stats['failed_chunks'].append({'start': start, 'end': start + len(chunk) - 1, 'error': str(e)})
+                if self.stop_on_error:
+                    self._stop.set()
+    
+    def _insert_chunk(self, conn, chunk: List[Any]) -> Tuple[int, int]:
+        """Insert a chunk as packet-sized multi-row INSERT statements"""
+        verb = 'REPLACE' if self.modifier == 'REPLACE' else 'INSERT IGNORE' if self.modifier == 'IGNORE' else 'INSERT'
+        prefix = f"{verb} INTO {self._target} ({self._column_list}) VALUES "
+        affected = statements = 0
+        values, size = [], len(prefix.encode(conn.encoding))
+        with conn.cursor() as cursor:
+            for row in chunk:
+                value = '(' + ','.join(conn.escape(v) for v in row) + ')'
+                # The budget is in bytes; non-ASCII characters take up to 4 bytes on the wire
+                length = len(value) if value.isascii() else len(value.encode(conn.encoding, 'surrogateescape'))
+                if values and size + length + 1 > self.max_statement_bytes:
+                    affected += cursor.execute(prefix + ','.join(values))
+                    statements += 1
+                    values, size = [], len(prefix.encode(conn.encoding))
+                values.append(value)
+                size += length + 1
+            if values:
+                affected += cursor.execute(prefix + ','.join(values))
+                statements += 1
+        return affected, statements
+    
+    def _load_data_chunk(self, conn, chunk: List[Any]) -> Tuple[int, int]:
+        """
+        Load a chunk with LOAD DATA LOCAL INFILE
+        
+        pymysql reads LOCAL INFILE data from a file name, so the chunk is
+        staged in a temporary file, on tmpfs when /dev/shm is available.
+        """
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        modifier = f" {self.modifier}" if self.modifier else ''
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', errors='surrogateescape',
+                                         dir=directory, suffix='.tsv') as f:
+            for row in chunk:
+                f.write('\t'.join(self._tsv_field(v) for v in row))
+                f.write('\n')
+            f.flush()
+            with conn.cursor() as cursor:
+                affected = cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s{modifier} INTO TABLE {self._target} "
+                    f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                    f"LINES TERMINATED BY '\\n' ({self._column_list})",
+                    (f.name,))
+        return affected, 1
+    
+    @classmethod
+    def _tsv_field(cls, value: Any) -> str:
+        """Encode one value in LOAD DATA's default text format"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', errors='surrogateescape')
+        elif isinstance(value, bool):
+            value = int(value)
+        return str(value).translate(cls._TSV_ESCAPES)
+
+
+class AsyncMySQLClient:
+    """
+    Asyncio MySQL operations client on an aiomysql connection pool
+    
+    Provides the query, introspection, database and user management,
+    replication, monitoring, binary log and health check methods of
+    MySQLClient as coroutines. Dumps, restores, bulk loading and exports
+    are only available on MySQLClient.
+    """
+    
+    def __init__(self, host: str, port: int = 3306, user: str = 'root',
+                 password: str = '', charset: str = 'utf8mb4',
+                 connect_timeout: int = 10, min_size: int = 1, max_size: int = 10,
+                 pool_recycle: int = 3600):
+        """
+        Initialize async MySQL client connection parameters
+        
+        Args:
+            host: MySQL server hostname or IP
+            port: MySQL server port
+            user: MySQL username
+            password: MySQL password
+            charset: Character set for connection
+            connect_timeout: Connection timeout in seconds
+            min_size: Number of pooled connections kept open
+            max_size: Maximum number of concurrent connections
+            pool_recycle: Seconds after which pooled connections are recycled
+        """
+        if aiomysql is None:
+            raise ImportError("AsyncMySQLClient requires the aiomysql package")
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.charset = charset
+        self.connect_timeout = connect_timeout
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool_recycle = pool_recycle
+        self.pool = None
+        self._health_snapshot = None
+    
+    async def __aenter__(self):
+        if not await self.connect():
+            raise pymysql.err.OperationalError(2003, f"Failed to connect to MySQL server at {self.host}:{self.port}")
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.disconnect()
+    
+    async def connect(self, database: str = None) -> bool:
+        """
+        Create the connection pool
+        
+        Args:
+            database: Optional database name to connect to
+            
+        Returns:
+            bool: True if connection successful, False otherwise
+        """
+        try:
+            self.pool = await aiomysql.create_pool(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                db=database,
+                charset=self.charset,
+                connect_timeout=self.connect_timeout,
+                cursorclass=aiomysql.DictCursor,
+                # Released connections still inside a transaction are closed by the pool
+                autocommit=True,
+                minsize=self.min_size,
+                maxsize=self.max_size,
+                pool_recycle=self.pool_recycle
+            )
+            logger.info(f"Connected to MySQL server at {self.host}:{self.port}")
+            return True
+        except (pymysql.Error, OSError) as e:
+            logger.error(f"Failed to connect to MySQL server: {e}")
+            return False
+    
+    async def disconnect(self) -> None:
+        """Close the connection pool if open"""
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            logger.info(f"Disconnected from MySQL server at {self.host}:{self.port}")
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool usage statistics
+        
+        Returns:
+            Dict: Pool size, free connections and limits, empty if not connected
+        """
+        if self.pool is None:
+            return {}
+        return {
+            'size': self.pool.size,
+            'idle': self.pool.freesize,
+            'in_use': self.pool.size - self.pool.freesize,
+            'min_size': self.pool.minsize,
+            'max_size': self.pool.maxsize
+        }
+    
+    async def _ensure_pool(self) -> None:
+        """Create the pool on first use"""
+        if self.pool is None:
+            logger.warning("Not connected to MySQL server. Attempting to reconnect...")
+            if not await self.connect():
+                raise pymysql.err.OperationalError(2003, "Failed to reconnect to MySQL server")
+    
+    async def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """
+        Execute a SELECT query and return results
+        
+        Args:
+            query: SQL query to execute
+            params: Parameters for the query
+            
+        Returns:
+            List of dictionaries containing query results
+        """
+        try:
+            await self._ensure_pool()
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    result = await cursor.fetchall()
+                    logger.debug(f"Query executed successfully: {query}")
+                    return list(result)
+        except pymysql.Error as e:
+            logger.error(f"Error executing query: {e}")
+            return []
+    
+    async def execute_write(self, query: str, params: tuple = None) -> int:
+        """
+        Execute a write query (INSERT, UPDATE, DELETE) and return affected row count
+        
+        Args:
+            query: SQL query to execute
+            params: Parameters for the query
+            
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            return await self._execute_write(query, params)
+        except pymysql.Error as e:
+            logger.error(f"Error executing write query: {e}")
+            return 0
+    
+    async def _execute_write(self, query: str, params: tuple = None) -> int:
+        """Execute a write query like execute_write, but raise pymysql.Error on failure"""
+        await self._ensure_pool()
+        async with self.pool.acquire() as conn:
+            try:
+                async with conn.cursor() as cursor:
+                    affected_rows = await cursor.execute(query, params)
+                await conn.commit()
+            except pymysql.Error:
+                await conn.rollback()
+                raise
+            logger.debug(f"Write query executed successfully: {query}")
+            return affected_rows
+    
+    async def execute_many(self, query: str, params_list: List[tuple]) -> int:
+        """
+        Execute a batch write query and return affected row count
+        
+        Args:
+            query: SQL query to execute
+            params_list: List of parameter tuples for the query
+            
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            await self._ensure_pool()
+            async with self.pool.acquire() as conn:
+                try:
+                    async with conn.cursor() as cursor:
+                        affected_rows = await cursor.executemany(query, params_list)
+                    await conn.commit()
+                except pymysql.Error:
+                    await conn.rollback()
+                    raise
+                logger.debug(f"Batch query executed successfully: {query}")
+                return affected_rows
+        except pymysql.Error as e:
+            logger.error(f"Error executing batch query: {e}")
+            return 0
+    
+    async def iter_query(self, query: str, params: tuple = None, batch_size: int = 1000):
+        """
+        Execute a SELECT query and lazily yield its rows with an unbuffered cursor
+        
+        Args:
+            query: SQL query to execute
+            params: Parameters for the query
+            batch_size: Number of rows fetched per round trip
+            
+        Yields:
+            Dict: One row at a time
+        """
+        await self._ensure_pool()
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+    
+    async def get_version(self) -> str:
+        """
+        Get MySQL server version
+        
+        Returns:
+            str: MySQL server version
+        """
+        result = await self.execute_query("SELECT VERSION() as version")
+        if result:
+            return result[0]['version']
+        return "Unknown"
+    
+    async def get_databases(self) -> List[str]:
+        """
+        Get list of databases
+        
+        Returns:
+            List[str]: List of database names
+        """
+        result = await self.execute_query("SHOW DATABASES")
+        return [row['Database'] for row in result]
+    
+    async def get_tables(self, database: str) -> List[str]:
+        """
+        Get list of tables in a database
+        
+        Args:
+            database: Database name
+            
+        Returns:
+            List[str]: List of table names
+        """
+        result = await self.execute_query(f"SHOW TABLES FROM `{database}`")
+        key = f"Tables_in_{database}"
+        return [row[key] for row in result]
+    
+    async def get_table_structure(self, database: str, table: str) -> List[Dict[str, Any]]:
+        """
+        Get table structure
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            List[Dict]: Table structure information
+        """
+        return await self.execute_query(f"DESCRIBE `{database}`.`{table}`")
+    
+    async def get_indexes(self, database: str, table: str) -> List[Dict[str, Any]]:
+        """
+        Get table indexes
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            List[Dict]: Table indexes information
+        """
+        return await self.execute_query(f"SHOW INDEX FROM `{database}`.`{table}`")
+    
+    async def get_process_list(self) -> List[Dict[str, Any]]:
+        """
+        Get list of running processes
+        
+        Returns:
+            List[Dict]: Process information
+        """
+        return await self.execute_query("SHOW FULL PROCESSLIST")
+    
+    async def kill_process(self, process_id: int) -> bool:
+        """
+        Kill a specific process
+        
+        Args:
+            process_id: Process ID to kill
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._ensure_pool()
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(f"KILL {int(process_id)}")
+            logger.info(f"Process {process_id} killed successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to kill process {process_id}: {e}")
+            return False
+    
+    async def get_variables(self, pattern: str = '%') -> Dict[str, Any]:
+        """
+        Get MySQL server variables
+        
+        Args:
+            pattern: Optional pattern to filter variables
+            
+        Returns:
+            Dict: Dictionary of variable names and values
+        """
+        result = await self.execute_query("SHOW GLOBAL VARIABLES LIKE %s", (pattern,))
+        return {row['Variable_name']: row['Value'] for row in result}
+    
+    async def get_status(self, pattern: str = '%') -> Dict[str, Any]:
+        """
+        Get MySQL server status
+        
+        Args:
+            pattern: Optional pattern to filter status variables
+            
+        Returns:
+            Dict: Dictionary of status names and values
+        """
+        result = await self.execute_query("SHOW GLOBAL STATUS LIKE %s", (pattern,))
+        return {row['Variable_name']: row['Value'] for row in result}
+    
+    async def create_database(self, database: str, if_not_exists: bool = True) -> bool:
+        """
+        Create a new database
+        
+        Args:
+            database: Database name
+            if_not_exists: Add IF NOT EXISTS clause
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        clause = "IF NOT EXISTS" if if_not_exists else ""
+        try:
+            await self._execute_write(f"CREATE DATABASE {clause} `{database}`")
+            logger.info(f"Database '{database}' created successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to create database '{database}': {e}")
+            return False
+    
+    async def drop_database(self, database: str, if_exists: bool = True) -> bool:
+        """
+        Drop a database
+        
+        Args:
+            database: Database name
+            if_exists: Add IF EXISTS clause
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        clause = "IF EXISTS" if if_exists else ""
+        try:
+            await self._execute_write(f"DROP DATABASE {clause} `{database}`")
+            logger.info(f"Database '{database}' dropped successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to drop database '{database}': {e}")
+            return False
+    
+    async def get_table_size(self, database: str = None) -> List[Dict[str, Any]]:
+        """
+        Get table sizes
+        
+        Args:
+            database: Optional database name to filter tables
+            
+        Returns:
+            List[Dict]: Table size information
+        """
+        return await self.execute_query(MySQLClient._table_size_sql(database))
+    
+    async def get_innodb_status(self) -> str:
+        """
+        Get InnoDB status
+        
+        Returns:
+            str: InnoDB status
+        """
+        result = await self.execute_query("SHOW ENGINE INNODB STATUS")
+        if result:
+            return result[0]['Status']
+        return ""
+    
+    async def optimize_table(self, database: str, table: str) -> bool:
+        """
+        Optimize a table
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return await self._table_maintenance('OPTIMIZE', database, table)
+    
+    async def analyze_table(self, database: str, table: str) -> bool:
+        """
+        Analyze a table
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return await self._table_maintenance('ANALYZE', database, table)
+    
+    async def _table_maintenance(self, operation: str, database: str, table: str) -> bool:
+        """Run a table maintenance statement and check its result message"""
+        result = await self.execute_query(f"{operation} TABLE `{database}`.`{table}`")
+        errors = [row['Msg_text'] for row in result if row.get('Msg_type') == 'error']
+        if not result or errors:
+            logger.error(f"Failed to {operation.lower()} table '{database}.{table}': {'; '.join(errors)}")
+            return False
+        logger.info(f"Table '{database}.{table}' {operation.lower()}d successfully")
+        return True
+    
+    # Replication Management
+    
+    async def get_replication_status(self) -> Dict[str, Any]:
+        """
+        Get replication status
+        
+        Returns:
+            Dict: Replication status information
+        """
+        result = await self.execute_query("SHOW SLAVE STATUS")
+        return result[0] if result else {}
+    
+    async def setup_replication(self, master_host: str, master_port: int,
+                                master_user: str, master_password: str,
+                                auto_position: bool = True) -> bool:
+        """
+        Set up replication from a master server
+        
+        Args:
+            master_host: Master server hostname
+            master_port: Master server port
+            master_user: Replication user
+            master_password: Replication password
+            auto_position: Use GTID auto position
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write("STOP SLAVE")
+            await self._execute_write(f"""
+            CHANGE MASTER TO
+                MASTER_HOST = '{master_host}',
+                MASTER_PORT = {master_port},
+                MASTER_USER = '{master_user}',
+                MASTER_PASSWORD = '{master_password}',
+                MASTER_AUTO_POSITION = {1 if auto_position else 0}
+            """)
+            await self._execute_write("START SLAVE")
+            logger.info(f"Replication setup successfully from {master_host}:{master_port}")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to set up replication: {e}")
+            return False
+    
+    async def start_replication(self) -> bool:
+        """
+        Start replication
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return await self._replication_command("START SLAVE", "started")
+    
+    async def stop_replication(self) -> bool:
+        """
+        Stop replication
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return await self._replication_command("STOP SLAVE", "stopped")
+    
+    async def reset_replication(self) -> bool:
+        """
+        Reset replication
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return await self._replication_command("RESET SLAVE ALL", "reset")
+    
+    async def _replication_command(self, statement: str, action: str) -> bool:
+        """Run a replication control statement, reporting real failures"""
+        try:
+            await self._ensure_pool()
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(statement)
+            logger.info(f"Replication {action} successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to run '{statement}': {e}")
+            return False
+    
+    async def check_replication_health(self) -> Dict[str, Any]:
+        """
+        Check replication health
+        
+        Returns:
+            Dict: Replication health information
+        """
+        return build_replication_health(await self.get_replication_status())
+    
+    # User Management
+    
+    async def create_user(self, username: str, password: str, host: str = '%') -> bool:
+        """
+        Create a new user
+        
+        Args:
+            username: Username
+            password: Password
+            host: Host from which the user can connect
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write(f"CREATE USER '{username}'@'{host}' IDENTIFIED BY '{password}'")
+            logger.info(f"User '{username}'@'{host}' created successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to create user '{username}'@'{host}': {e}")
+            return False
+    
+    async def drop_user(self, username: str, host: str = '%') -> bool:
+        """
+        Drop a user
+        
+        Args:
+            username: Username
+            host: Host from which the user can connect
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write(f"DROP USER '{username}'@'{host}'")
+            logger.info(f"User '{username}'@'{host}' dropped successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to drop user '{username}'@'{host}': {e}")
+            return False
+    
+    async def grant_privileges(self, username: str, password: str, database: str = '*',
+                               table: str = '*', host: str = '%', privileges: str = 'ALL') -> bool:
+        """
+        Grant privileges to a user
+        
+        Args:
+            username: Username
+            password: Password
+            database: Database name
+            table: Table name
+            host: Host from which the user can connect
+            privileges: Privileges to grant
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write(f"GRANT {privileges} ON `{database}`.`{table}` TO '{username}'@'{host}'")
+            await self._execute_write("FLUSH PRIVILEGES")
+            logger.info(f"Privileges granted to '{username}'@'{host}' on '{database}.{table}'")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to grant privileges to '{username}'@'{host}': {e}")
+            return False
+    
+    async def revoke_privileges(self, username: str, database: str = '*',
+                                table: str = '*', host: str = '%', privileges: str = 'ALL') -> bool:
+        """
+        Revoke privileges from a user
+        
+        Args:
+            username: Username
+            database: Database name
+            table: Table name
+            host: Host from which the user can connect
+            privileges: Privileges to revoke
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write(f"REVOKE {privileges} ON `{database}`.`{table}` FROM '{username}'@'{host}'")
+            await self._execute_write("FLUSH PRIVILEGES")
+            logger.info(f"Privileges revoked from '{username}'@'{host}' on '{database}.{table}'")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to revoke privileges from '{username}'@'{host}': {e}")
+            return False
+    
+    async def get_users(self) -> List[Dict[str, Any]]:
+        """
+        Get list of users
+        
+        Returns:
+            List[Dict]: User information
+        """
+        return await self.execute_query("SELECT * FROM mysql.user")
+    
+    # Performance Monitoring
+    
+    async def get_slow_queries(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get slow queries from slow query log
+        
+        Args:
+            limit: Maximum number of queries to return
+            
+        Returns:
+            List[Dict]: Slow query information
+        """
+        return await self.execute_query(MySQLClient._slow_queries_sql(limit))
+    
+    async def get_locks(self) -> List[Dict[str, Any]]:
+        """
+        Get current locks
+        
+        Returns:
+            List[Dict]: Lock information
+        """
+        return await self.execute_query("SELECT * FROM performance_schema.data_locks")
+    
+    async def get_deadlocks(self) -> List[Dict[str, Any]]:
+        """
+        Get recent deadlocks
+        
+        Returns:
+            List[Dict]: Deadlock information
+        """
+        innodb_status = await self.get_innodb_status()
+        deadlocks = []
+        if "LATEST DETECTED DEADLOCK" in innodb_status:
+            deadlock_section = innodb_status.split("LATEST DETECTED DEADLOCK")[1]
+            deadlock_section = deadlock_section.split("TRANSACTIONS")[0]
+            deadlock = parse_deadlock(innodb_status) or {}
+            deadlock["deadlock_info"] = deadlock_section.strip()
+            deadlocks.append(deadlock)
+        return deadlocks
+    
+    # Backup and Recovery Functions
+    
+    async def create_backup_user(self, username: str = 'backup_user',
+                                 password: str = None, host: str = 'localhost') -> bool:
+        """
+        Create a backup user with appropriate privileges
+        
+        Args:
+            username: Backup username
+            password: Backup password (auto-generated if None)
+            host: Host from which the backup user can connect
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if password is None:
+            import random
+            import string
+            password = ''.join(random.choices(string.ascii_letters + string.digits, k=16))
+        
+        if not await self.create_user(username, password, host):
+            return False
+        try:
+            await self._execute_write(f"""
+                GRANT RELOAD, LOCK TABLES, REPLICATION CLIENT, CREATE TABLESPACE, PROCESS,
+                      SUPER, REPLICATION SLAVE, BACKUP_ADMIN ON *.* TO '{username}'@'{host}'
+            """)
+            await self._execute_write("FLUSH PRIVILEGES")
+            logger.info(f"Backup user '{username}'@'{host}' created successfully")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to create backup user '{username}'@'{host}': {e}")
+            return False
+    
+    async def get_binary_logs(self) -> List[Dict[str, Any]]:
+        """
+        Get list of binary logs
+        
+        Returns:
+            List[Dict]: Binary log information
+        """
+        return await self.execute_query("SHOW BINARY LOGS")
+    
+    async def purge_binary_logs(self, before_date: str) -> bool:
+        """
+        Purge binary logs before a specified date
+        
+        Args:
+            before_date: Date in YYYY-MM-DD format
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            await self._execute_write(f"PURGE BINARY LOGS BEFORE '{before_date}'")
+            logger.info(f"Binary logs purged before {before_date}")
+            return True
+        except pymysql.Error as e:
+            logger.error(f"Failed to purge binary logs: {e}")
+            return False
+    
+    # MySQL Health Check
+    
+    async def get_global_snapshot(self) -> Dict[str, Any]:
+        """
+        Take a snapshot of global status and key variables in one round trip
+        
+        Returns:
+            Dict: 'status' and 'variables' dictionaries, 'replica' flag and
+                  the monotonic 'timestamp' the snapshot was taken at
+        """
+        timestamp = time.monotonic()
+        result = await self.execute_query(GLOBAL_SNAPSHOT_SQL)
+        if result:
+            return parse_global_snapshot(result, timestamp)
+        
+        logger.warning("performance_schema snapshot unavailable, falling back to SHOW GLOBAL STATUS")
+        status, variables, replication = await asyncio.gather(
+            self.get_status(), self.get_variables(), self.get_replication_status())
+        return {'status': status, 'variables': variables, 'replica': bool(replication), 'timestamp': timestamp}
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """
+        Perform a comprehensive health check of the MySQL server
+        
+        Returns:
+            Dict: Health check results, with rates since the previous call
+        """
+        snapshot = await self.get_global_snapshot()
+        previous = self._health_snapshot
+        self._health_snapshot = snapshot
+        health = build_health_report(snapshot, previous)
+        
+        if snapshot['replica']:
+            health['replication'] = await self.check_replication_health()
+            if health['replication']['status'] != 'Healthy':
+                health['status'] = health['replication']['status']
+        
+        return health
+
+
+class SchemaMetadataCache:
+    """Bulk-loaded, cheaply invalidated cache of tables, columns and indexes per schema"""
+    
+    # Field names of the compact column and index tuples, in DESCRIBE / SHOW INDEX format
+    COLUMN_FIELDS = ('Field', 'Type', 'Null', 'Key', 'Default', 'Extra')
+    INDEX_FIELDS = ('Non_unique', 'Key_name', 'Seq_in_index', 'Column_name', 'Collation',
+                    'Cardinality', 'Sub_part', 'Packed', 'Null', 'Index_type', 'Comment', 'Index_comment')
+    TABLE_FIELDS = ('type', 'engine', 'rows', 'data_length', 'index_length', 'create_time', 'update_time')
+    
+    def __init__(self, client: 'MySQLClient', check_interval: float = 5.0, max_age: float = None):
+        """
+        Initialize the metadata cache
+        
+        Args:
+            client: Client used to load metadata
+            check_interval: Seconds during which a schema is served without
+                            re-checking its fingerprint
+            max_age: Optional seconds after which a schema is reloaded even if
+                     its fingerprint did not change
+        """
+        self.client = client
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        # schema -> {'fingerprint', 'loaded_at', 'checked_at', 'tables', 'columns', 'indexes'}
+        self._schemas = {}
+    
+    def fingerprint(self, databases: List[str]) -> Dict[str, Tuple]:
+        """
+        Compute a cheap structural fingerprint of schemas in one round trip
+        
+        The fingerprint covers table names and CREATE_TIME, column names and
+        types, and index definitions, so DDL changes it but DML does not.
+        
+        Args:
+            databases: Schema names
+            
+        Returns:
+            Dict: Schema name mapped to its fingerprint tuple
+            
+        Raises:
+            pymysql.Error: If the fingerprint query fails
+        """
+        if not databases:
+            return {}
+        placeholders = ', '.join(['%s'] * len(databases))
+        rows = self.client._execute_query(f"""
+            SELECT 'tables' AS part, TABLE_SCHEMA AS db, COUNT(*) AS cnt,
+                   SUM(CRC32(CONCAT_WS('|', TABLE_NAME, TABLE_TYPE, CREATE_TIME))) AS crc
+            FROM information_schema.TABLES WHERE TABLE_SCHEMA IN ({placeholders}) GROUP BY TABLE_SCHEMA
+            UNION ALL
+            SELECT 'columns', TABLE_SCHEMA, COUNT(*),
+                   SUM(CRC32(CONCAT_WS('|', TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE,
+                                       IS_NULLABLE, COLUMN_DEFAULT, EXTRA)))
+            FROM information_schema.COLUMNS WHERE TABLE_SCHEMA IN ({placeholders}) GROUP BY TABLE_SCHEMA
+            UNION ALL
+            SELECT 'indexes', TABLE_SCHEMA, COUNT(*),
+                   SUM(CRC32(CONCAT_WS('|', TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME, NON_UNIQUE)))
+            FROM information_schema.STATISTICS WHERE TABLE_SCHEMA IN ({placeholders}) GROUP BY TABLE_SCHEMA
+        """, tuple(databases) * 3)
+        parts = {}
+        for row in rows:
+            parts.setdefault(row['db'], {})[row['part']] = (int(row['cnt']), int(row['crc'] or 0))
+        return {
+            db: tuple(parts.get(db, {}).get(part, (0, 0)) for part in ('tables', 'columns', 'indexes'))
+            for db in databases
+        }
+    
+    def refresh(self, databases: List[str] = None, force: bool = False) -> List[str]:
+        """
+        Reload schemas whose fingerprint changed (or all given schemas when forced)
+        
+        Args:
+            databases: Schemas to refresh (default: all cached schemas)
+            force: Reload without comparing fingerprints
+            
+        Returns:
+            List[str]: Schemas that were reloaded
+            
+        Raises:
+            pymysql.Error: If the metadata could not be read; nothing is cached then
+        """
+        with self._lock:
+            databases = list(databases if databases is not None else self._schemas)
+            if not databases:
+                return []
+            now = time.monotonic()
+            fingerprints = self.fingerprint(databases)
+            stale = []
+            for db in databases:
+                entry = self._schemas.get(db)
+                if force or entry is None or entry['fingerprint'] != fingerprints[db] or \
+                        (self.max_age and now - entry['loaded_at'] > self.max_age):
+                    stale.append(db)
+                else:
+                    entry['checked_at'] = now
+            if stale:
+                self._load(stale, fingerprints, now)
+            return stale
+    
+    def invalidate(self, database: str = None) -> None:
+        """
+        Drop cached metadata so it is reloaded on next access
+        
+        Args:
+            database: Schema to drop (default: all schemas)
+        """
+        with self._lock:
+            if database is None:
+                self._schemas = {}
+            else:
+                self._schemas.pop(database, None)
+    
+    def get_tables(self, database: str) -> List[str]:
+        """
+        Get table names of a schema from the cache
+        
+        Args:
+            database: Database name
+            
+        Returns:
+            List[str]: Table names
+        """
+        return list(self._schema(database)['tables'])
+    
+    def get_table_info(self, database: str, table: str) -> Dict[str, Any]:
+        """
+        Get type, engine, size and timestamps of a table from the cache
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            Dict: Table information, empty if the table does not exist
+        """
+        info = self._schema(database)['tables'].get(table)
+        return dict(zip(self.TABLE_FIELDS, info)) if info else {}
+    
+    def get_columns(self, database: str, table: str) -> List[Dict[str, Any]]:
+        """
+        Get the columns of a table in DESCRIBE format from the cache
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            List[Dict]: Table structure information
+        """
+        columns = self._schema(database)['columns'].get(table, ())
+        return [dict(zip(self.COLUMN_FIELDS, column)) for column in columns]
+    
+    def get_indexes(self, database: str, table: str) -> List[Dict[str, Any]]:
+        """
+        Get the indexes of a table in SHOW INDEX format from the cache
+        
+        Args:
+            database: Database name
+            table: Table name
+            
+        Returns:
+            List[Dict]: Table indexes information
+        """
+        indexes = self._schema(database)['indexes'].get(table, ())
+        return [dict(zip(self.INDEX_FIELDS, index), Table=table) for index in indexes]
+    
+    def _schema(self, database: str) -> Dict[str, Any]:
+        """Return the cache entry of a schema, validating or loading it as needed"""
+        with self._lock:
+            entry = self._schemas.get(database)
+            if entry is None or time.monotonic() - entry['checked_at'] > self.check_interval:
+                try:
+                    self.refresh([database])
+                except pymysql.Error as e:
+                    # Serve the previous entry (or nothing) without caching the failed load
+                    logger.error(f"Failed to load metadata of schema '{database}': {e}")
+                    return entry or {'tables': {}, 'columns': {}, 'indexes': {}}
+                entry = self._schemas[database]
+            return entry
+    
+    def _load(self, databases: List[str], fingerprints: Dict[str, Tuple], now: float) -> None:
+        """Load tables, columns and indexes of schemas with three streamed bulk queries"""
+        placeholders = ', '.join(['%s'] * len(databases))
+        params = tuple(databases)
+        loaded = {db: {'tables': {}, 'columns': {}, 'indexes': {}} for db in databases}
+        intern = sys.intern
+        
+        def stream(query):
+            # Unlike iter_query, errors always raise so a failed load is never cached as empty
+            with self.client._stream_cursor(query, params) as cursor:
+                yield from cursor
+        
+        for row in stream(f"""
+            SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, TABLE_TYPE, ENGINE, TABLE_ROWS,
+                   DATA_LENGTH, INDEX_LENGTH, CREATE_TIME, UPDATE_TIME
+            FROM information_schema.TABLES WHERE TABLE_SCHEMA IN ({placeholders})
+            ORDER BY TABLE_SCHEMA, TABLE_NAME
+        """):
+            loaded[row['db']]['tables'][row['tbl']] = (
+                intern(row['TABLE_TYPE']), intern(row['ENGINE']) if row['ENGINE'] else None,
+                row['TABLE_ROWS'], row['DATA_LENGTH'], row['INDEX_LENGTH'],
+                row['CREATE_TIME'], row['UPDATE_TIME'])
+        
+        for row in stream(f"""
+            SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE,
+                   COLUMN_KEY, COLUMN_DEFAULT, EXTRA
+            FROM information_schema.COLUMNS WHERE TABLE_SCHEMA IN ({placeholders})
+            ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+        """):
+            loaded[row['db']]['columns'].setdefault(row['tbl'], []).append((
+                row['COLUMN_NAME'], intern(row['COLUMN_TYPE']), intern(row['IS_NULLABLE']),
+                intern(row['COLUMN_KEY']), row['COLUMN_DEFAULT'], intern(row['EXTRA'])))
+        
+        for row in stream(f"""
+            SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, NON_UNIQUE, INDEX_NAME, SEQ_IN_INDEX,
+                   COLUMN_NAME, COLLATION, CARDINALITY, SUB_PART, PACKED, NULLABLE, INDEX_TYPE,
+                   COMMENT, INDEX_COMMENT
+            FROM information_schema.STATISTICS WHERE TABLE_SCHEMA IN ({placeholders})
+            ORDER BY TABLE_SCHEMA, TABLE_NAME, INDEX_NAME = 'PRIMARY' DESC, INDEX_NAME, SEQ_IN_INDEX
+        """):
+            loaded[row['db']]['indexes'].setdefault(row['tbl'], []).append((
+                row['NON_UNIQUE'], row['INDEX_NAME'], row['SEQ_IN_INDEX'], row['COLUMN_NAME'],
+                row['COLLATION'], row['CARDINALITY'], row['SUB_PART'], row['PACKED'],
+                intern(row['NULLABLE'] or ''), intern(row['INDEX_TYPE']), row['COMMENT'], row['INDEX_COMMENT']))
+        
+        for db, data in loaded.items():
+            self._schemas[db] = {
+                'fingerprint': fingerprints[db],
+                'loaded_at': now,
+                'checked_at': now,
+                'tables': data['tables'],
+                'columns': {table: tuple(columns) for table, columns in data['columns'].items()},
+                'indexes': {table: tuple(indexes) for table, indexes in data['indexes'].items()}
+            }
+        logger.debug(f"Loaded metadata of {len(databases)} schema(s): {', '.join(databases)}")
+
+
+class TableSizeHistory:
+    """SQLite-backed history of per-table sizes with growth forecasting"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS table_size (
+            server TEXT NOT NULL,
+            db TEXT NOT NULL,
+            tbl TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            data_bytes INTEGER NOT NULL,
+            index_bytes INTEGER NOT NULL,
+            free_bytes INTEGER NOT NULL,
+            PRIMARY KEY (server, db, tbl, ts)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS table_size_latest (
+            server TEXT NOT NULL,
+            db TEXT NOT NULL,
+            tbl TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            data_bytes INTEGER NOT NULL,
+            index_bytes INTEGER NOT NULL,
+            free_bytes INTEGER NOT NULL,
+            PRIMARY KEY (server, db, tbl)
+        ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, path: str, heartbeat: int = 86400):
+        """
+        Open (or create) a size history store
+        
+        Args:
+            path: SQLite database file
+            heartbeat: Seconds after which an unchanged size is stored again,
+                       so flat tables still have recent points
+        """
+        self.path = path
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(self.SCHEMA)
+    
+    def close(self) -> None:
+        """Close the store"""
+        self.db.close()
+    
+    def collect(self, client: 'MySQLClient', server: str = None, database: str = None,
+                timestamp: int = None) -> int:
+        """
+        Store a size snapshot of every table, skipping unchanged tables
+        
+        Args:
+            client: Client of the server to sample
+            server: Name the server is stored under (default: host:port)
+            database: Optional database name to limit the snapshot to
+            timestamp: Unix time of the snapshot (default: now)
+            
+        Returns:
+            int: Number of points stored
+            
+        Raises:
+            pymysql.Error: If the snapshot query fails; nothing is stored then
+        """
+        server = server or f"{client.host}:{client.port}"
+        ts = int(timestamp if timestamp is not None else time.time())
+        where_clause = "AND TABLE_SCHEMA = %s" if database else ""
+        query = f"""
+            SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, COALESCE(DATA_LENGTH, 0) AS data_bytes,
+                   COALESCE(INDEX_LENGTH, 0) AS index_bytes, COALESCE(DATA_FREE, 0) AS free_bytes
+            FROM information_schema.TABLES
+            WHERE TABLE_TYPE = 'BASE TABLE'
+              AND TABLE_SCHEMA NOT IN ('mysql', 'sys', 'performance_schema', 'information_schema')
+              {where_clause}
+        """
+        
+        stored = 0
+        # A failed query raises and rolls back the SQLite transaction, so an
+        # unreadable server is never mistaken for one whose tables were dropped
+        with self._lock, self.db, client._stream_cursor(query, (database,) if database else None,
+                                                        tuples=True) as cursor:
+            latest = {
+                (db, tbl): (last_ts, data_bytes, index_bytes)
+                for db, tbl, last_ts, data_bytes, index_bytes in self.db.execute(
+                    "SELECT db, tbl, ts, data_bytes, index_bytes FROM table_size_latest WHERE server = ?",
+                    (server,))
+            }
+            points = []
+            for db, tbl, data_bytes, index_bytes, free_bytes in cursor:
+                point = (server, db, tbl, ts, int(data_bytes), int(index_bytes), int(free_bytes))
+                previous = latest.pop((db, tbl), None)
+                # Only store changes (plus a periodic heartbeat) to keep the store compact
+                if previous is None or previous[1:] != point[4:6] or ts - previous[0] >= self.heartbeat:
+                    points.append(point)
+                if len(points) >= 5000:
+                    stored += self._insert(points)
+                    points = []
+            stored += self._insert(points)
+            
+            # Tables left over were dropped; a zero point ends their series
+            dropped = [(server, db, tbl, ts, 0, 0, 0) for db, tbl in latest
+                       if database is None or db == database]
+            if dropped:
+                self.db.executemany("INSERT OR REPLACE INTO table_size VALUES (?, ?, ?, ?, ?, ?, ?)", dropped)
+                self.db.executemany("DELETE FROM table_size_latest WHERE server = ? AND db = ? AND tbl = ?",
+                                    [point[:3] for point in dropped])
+                stored += len(dropped)
+        logger.info(f"Stored {stored} table size point(s) for {server}")
+        return stored
+    
+    def _insert(self, points: List[Tuple]) -> int:
+        """Insert points into the history and the latest-value table"""
+        if points:
+            self.db.executemany("INSERT OR REPLACE INTO table_size VALUES (?, ?, ?, ?, ?, ?, ?)", points)
+            self.db.executemany("INSERT OR REPLACE INTO table_size_latest VALUES (?, ?, ?, ?, ?, ?, ?)", points)
+        return len(points)
+    
+    def downsample(self, daily_after_days: int = 7, weekly_after_days: int = 90, now: int = None) -> int:
+        """
+        Thin out old points: keep the last point per day after daily_after_days
+        and the last point per week after weekly_after_days
+        
+        Args:
+            daily_after_days: Age in days after which points are reduced to one per day
+            weekly_after_days: Age in days after which points are reduced to one per week
+            now: Unix time used as reference (default: now)
+            
+        Returns:
+            int: Number of points removed
+        """
+        now = int(now if now is not None else time.time())
+        removed = 0
+        with self._lock, self.db:
+            for age_days, bucket in ((weekly_after_days, 7 * 86400), (daily_after_days, 86400)):
+                cutoff = now - age_days * 86400
+                cursor = self.db.execute("""
+                    DELETE FROM table_size
+                    WHERE ts < :cutoff AND EXISTS (
+                        SELECT 1 FROM table_size newer
+                        WHERE newer.server = table_size.server AND newer.db = table_size.db
+                          AND newer.tbl = table_size.tbl AND newer.ts > table_size.ts
+                          AND newer.ts < :cutoff AND newer.ts / :bucket = table_size.ts / :bucket
+                    )
+                """, {'cutoff': cutoff, 'bucket': bucket})
+                removed += cursor.rowcount
+        logger.info(f"Downsampled table size history, removed {removed} point(s)")
+        return removed
+    
+    def series(self, server: str, database: str = None, table: str = None,
+               since: int = None) -> List[Tuple[int, int]]:
+        """
+        Get a total size time series for a table, schema or whole server
+        
+        Schema and server series add up, at each timestamp, the most recent
+        point of every table, so tables skipped because they did not change
+        still count.
+        
+        Args:
+            server: Server name
+            database: Optional database name
+            table: Optional table name (requires database)
+            since: Optional Unix time of the first point
+            
+        Returns:
+            List[Tuple]: (timestamp, data + index bytes) pairs in time order
+        """
+        conditions, params = ["server = ?"], [server]
+        if database:
+            conditions.append("db = ?")
+            params.append(database)
+        if table:
+            conditions.append("tbl = ?")
+            params.append(table)
+        with self._lock:
+            rows = self.db.execute(f"""
+                SELECT ts, db, tbl, data_bytes + index_bytes FROM table_size
+                WHERE {' AND '.join(conditions)} ORDER BY ts
+            """, params).fetchall()
+        
+        current = {}
+        total = 0
+        series = []
+        for ts, db, tbl, size in rows:
+            total += size - current.get((db, tbl), 0)
+            current[(db, tbl)] = size
+            if series and series[-1][0] == ts:
+                series[-1] = (ts, total)
+            else:
+                series.append((ts, total))
+        if since is not None:
+            series = [point for point in series if point[0] >= since]
+        return series
+    
+    def growth(self, server: str, database: str = None, table: str = None,
+               window_days: float = 30, capacity_bytes: int = None, now: int = None) -> Dict[str, Any]:
+        """
+        Estimate the growth rate and days until a capacity is reached
+        
+        The rate is the least-squares slope of the size series over the window.
+        
+        Args:
+            server: Server name
+            database: Optional database name
+            table: Optional table name
+            window_days: Days of history used for the fit
+            capacity_bytes: Optional size limit (e.g. free disk space plus current size)
+            now: Unix time used as reference (default: now)
+            
+        Returns:
+            Dict: current size, bytes_per_day and days_to_full (None if not growing
+                  or no capacity given)
+        """
+        now = int(now if now is not None else time.time())
+        points = self.series(server, database, table, since=now - int(window_days * 86400))
+        result = {'server': server, 'database': database, 'table': table, 'points': len(points),
+                  'current_bytes': points[-1][1] if points else 0, 'bytes_per_day': 0.0, 'days_to_full': None}
+        if len(points) < 2:
+            return result
+        
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_s = sum(size for _, size in points) / n
+        variance = sum((t - mean_t) ** 2 for t, _ in points)
+        if variance:
+            slope = sum((t - mean_t) * (size - mean_s) for t, size in points) / variance
+            result['bytes_per_day'] = round(slope * 86400, 1)
+        if capacity_bytes is not None and result['bytes_per_day'] > 0:
+            remaining = max(capacity_bytes - result['current_bytes'], 0)
+            result['days_to_full'] = round(remaining / result['bytes_per_day'], 1)
+        return result
+    
+    def fastest_growing(self, server: str, n: int = 10, window_days: float = 30,
+                        now: int = None) -> List[Dict[str, Any]]:
+        """
+        Rank the tables of a server by growth rate
+        
+        Args:
+            server: Server name
+            n: Number of tables to return
+            window_days: Days of history used for the fit
+            now: Unix time used as reference (default: now)
+            
+        Returns:
+            List[Dict]: Growth estimates, fastest first
+        """
+        with self._lock:
+            tables = self.db.execute(
+                "SELECT db, tbl FROM table_size_latest WHERE server = ?", (server,)).fetchall()
+        estimates = [self.growth(server, db, tbl, window_days, now=now) for db, tbl in tables]
+        return sorted(estimates, key=lambda e: e['bytes_per_day'], reverse=True)[:n]
+
+
+class _DedicatedConnection:
+    """
+    Lazily opened connection of a client, serialized by a lock, for background workers
+    
+    Rows are always dictionaries, whatever cursor class the client uses.
+    """
+    
+    def __init__(self, client: 'MySQLClient', database: str = None):
+        """
+        Args:
+            client: Client whose connection parameters are used
+            database: Optional database name to connect to
+        """
+        self.client = client
+        self.database = database
+        self.lock = threading.Lock()
+        self.conn = None
+    
+    def execute(self, query: str, params: tuple = None, fetch: bool = True) -> Any:
+        """Run one autocommitted statement, reconnecting once if the connection was lost"""
+        with self.lock:
+            for attempt in (1, 2):
+                try:
+                    if self.conn is None or not self.conn.open:
+                        self.conn = self.client.new_connection(self.database, autocommit=True,
+                                                               cursorclass=pymysql.cursors.DictCursor)
+                    with self.conn.cursor() as cursor:
+                        affected = cursor.execute(query, params)
+                        return cursor.fetchall() if fetch else affected
+                except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+                    self.close_unlocked()
+                    if attempt == 2:
+                        raise
+    
+    def close_unlocked(self) -> None:
+        """Close the connection; the caller must hold the lock"""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except pymysql.Error:
+                pass
+            self.conn = None
+    
+    def close(self) -> None:
+        """Close the connection"""
+        with self.lock:
+            self.close_unlocked()
+
+
+class HeartbeatWriter:
+    """Periodically write a microsecond timestamp row on the primary"""
+    
+    def __init__(self, client: 'MySQLClient', database: str = 'heartbeat', table: str = 'heartbeat',
+                 interval: float = 0.5):
+        """
+        Initialize the heartbeat writer
+        
+        Args:
+            client: Client of the primary server
+            database: Database holding the heartbeat table
+            table: Heartbeat table name
+            interval: Seconds between heartbeats (also the lag resolution)
+        """
+        self.client = client
+        self.database = database
+        self.table = table
+        self.interval = interval
+        self._db = _DedicatedConnection(client)
+        self._stop = threading.Event()
+        self._thread = None
+        self._identity = None
+        self.beats = 0
+        self.errors = 0
+    
+    def setup(self) -> None:
+        """Create the heartbeat database and table if they do not exist"""
+        self._read_identity()
+        self._db.execute(f"CREATE DATABASE IF NOT EXISTS `{self.database}`", fetch=False)
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS `{self.database}`.`{self.table}` (
+                server_id INT UNSIGNED NOT NULL PRIMARY KEY,
+                ts DECIMAL(20,6) NOT NULL,
+                source VARCHAR(255) NOT NULL DEFAULT ''
+            ) ENGINE=InnoDB
+        """, fetch=False)
+    
+    def _read_identity(self) -> Tuple[int, str]:
+        """
+        Read the primary's server_id and hostname once
+        
+        They are sent as literals because under binlog_format=STATEMENT
+        @@server_id and @@hostname would be evaluated again on each replica.
+        """
+        if self._identity is None:
+            row = self._db.execute("SELECT @@server_id AS server_id, @@hostname AS hostname")[0]
+            self._identity = (int(row['server_id']), row['hostname'])
+        return self._identity
+    
+    def beat(self) -> None:
+        """Write one heartbeat using the primary's clock"""
+        server_id, hostname = self._read_identity()
+        self._db.execute(f"""
+            INSERT INTO `{self.database}`.`{self.table}` (server_id, ts, source)
+            VALUES (%s, UNIX_TIMESTAMP(NOW(6)), %s)
+            ON DUPLICATE KEY UPDATE ts = VALUES(ts), source = VALUES(source)
+        """, (server_id, hostname), fetch=False)
+        self.beats += 1
+    
+    def start(self) -> None:
+        """Start writing heartbeats in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.setup()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'heartbeat-writer-{self.client.host}', daemon=True)
+        self._thread.start()
+        logger.info(f"Heartbeat writer started on {self.client.host}:{self.client.port}")
+    
+    def stop(self) -> None:
+        """Stop the background writer and close its connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._db.close()
+    
+    def _run(self) -> None:
+        """Write heartbeats on a fixed schedule until stopped"""
+        next_beat = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.beat()
+            except pymysql.Error as e:
+                self.errors += 1
+                logger.warning(f"Heartbeat write failed: {e}")
+            next_beat += self.interval
+            self._stop.wait(max(0.0, next_beat - time.monotonic()))
+
+
+class HeartbeatMonitor:
+    """Measure end-to-end replication lag on a replica from heartbeat rows"""
+    
+    def __init__(self, client: 'MySQLClient', database: str = 'heartbeat', table: str = 'heartbeat',
+                 source_server_id: int = None, interval: float = 1.0, history_size: int = 3600):
+        """
+        Initialize the heartbeat monitor
+        
+        Lag is the replica's clock minus the primary's heartbeat timestamp, so
+        both servers' clocks must be synchronized (e.g. NTP). Its resolution
+        is the writer's interval.
+        
+        Args:
+            client: Client of the replica
+            database: Database holding the heartbeat table
+            table: Heartbeat table name
+            source_server_id: server_id of the primary to measure against
+                              (default: the most recent heartbeat row)
+            interval: Seconds between samples when running in the background
+            history_size: Number of samples kept in the ring buffer
+        """
+        self.client = client
+        self.database = database
+        self.table = table
+        self.source_server_id = source_server_id
+        self.interval = interval
+        self.history = deque(maxlen=history_size)
+        self._db = _DedicatedConnection(client)
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def measure(self) -> Optional[float]:
+        """
+        Measure the current lag and append it to the history
+        
+        Returns:
+            float: Lag in milliseconds, or None if no heartbeat row was found
+        """
+        where_clause = "WHERE server_id = %s" if self.source_server_id is not None else ""
+        rows = self._db.execute(f"""
+            SELECT (UNIX_TIMESTAMP(NOW(6)) - ts) * 1000 AS lag_ms
+            FROM `{self.database}`.`{self.table}`
+            {where_clause}
+            ORDER BY ts DESC LIMIT 1
+        """, (self.source_server_id,) if self.source_server_id is not None else None)
+        if not rows:
+            return None
+        row = rows[0]
+        lag = round(max(float(row['lag_ms']), 0.0), 3)
+        self.history.append((time.time(), lag))
+        return lag
+    
+    def latest(self, max_age: float = None) -> Optional[float]:
+        """
+        Get the most recent lag sample
+        
+        Args:
+            max_age: Ignore samples older than this many seconds
+            
+        Returns:
+            float: Lag in milliseconds, or None if there is no (recent) sample
+        """
+        if not self.history:
+            return None
+        sampled_at, lag = self.history[-1]
+        if max_age is not None and time.time() - sampled_at > max_age:
+            return None
+        return lag
+    
+    def stats(self, window: float = None) -> Dict[str, Any]:
+        """
+        Summarize the lag history
+        
+        Args:
+            window: Only consider samples from the last window seconds
+            
+        Returns:
+            Dict: samples, current, min, max, avg and p95 lag in milliseconds
+        """
+        cutoff = time.time() - window if window else None
+        lags = [lag for sampled_at, lag in list(self.history) if cutoff is None or sampled_at >= cutoff]
+        if not lags:
+            return {'samples': 0}
+        ordered = sorted(lags)
+        return {
+            'samples': len(lags),
+            'current_ms': lags[-1],
+            'min_ms': ordered[0],
+            'max_ms': ordered[-1],
+            'avg_ms': round(sum(lags) / len(lags), 3),
+            'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        }
+    
+    def start(self) -> None:
+        """Start sampling lag in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'heartbeat-monitor-{self.client.host}', daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background sampler and close its connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._db.close()
+    
+    def _run(self) -> None:
+        """Sample lag on a fixed schedule until stopped"""
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.measure()
+            except pymysql.Error as e:
+                logger.warning(f"Heartbeat lag measurement failed: {e}")
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.monotonic()))
+
+
+def _version_tuple(version: str) -> Tuple[int, ...]:
+    """Parse the numeric part of a server version string such as '8.0.36-log'"""
+    match = re.match(r'(\d+)\.(\d+)\.(\d+)', version or '')
+    return tuple(int(part) for part in match.groups()) if match else (0, 0, 0)
+
+
+def _first(row: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """Return the value of the first key present in a row (replica/slave naming)"""
+    for key in keys:
+        if key in row:
+            return row[key]
+    return default
+
+
+class ReplicationTopology:
+    """Discover a replication topology by probing servers concurrently"""
+    
+    def __init__(self, user: str = 'root', password: str = '', port: int = 3306,
+                 max_workers: int = 32, connect_timeout: int = 2, cache_ttl: float = 5.0,
+                 max_nodes: int = 1000):
+        """
+        Initialize topology discovery
+        
+        Args:
+            user: MySQL username valid on every node (needs REPLICATION CLIENT and PROCESS)
+            password: MySQL password
+            port: Port assumed for hosts discovered without one
+            max_workers: Maximum number of nodes probed at the same time
+            connect_timeout: Connection and read timeout in seconds for each node
+            cache_ttl: Seconds a node probe result is reused by later discoveries
+            max_nodes: Safety limit on the number of nodes probed per discovery
+        """
+        self.user = user
+        self.password = password
+        self.port = port
+        self.max_workers = max_workers
+        self.connect_timeout = connect_timeout
+        self.cache_ttl = cache_ttl
+        self.max_nodes = max_nodes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='topology')
+        self._lock = threading.Lock()
+        # Persistent per-node clients so periodic refreshes skip the handshake
+        self._clients = {}
+        self._client_locks = {}
+        self._cache = {}
+    
+    def close(self) -> None:
+        """Close all node connections and the probe threads"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.disconnect()
+    
+    def _key(self, host: str, port: int = None) -> str:
+        return f"{host}:{port or self.port}"
+    
+    def _parse_seed(self, seed: Union[str, Tuple[str, int]]) -> Tuple[str, int]:
+        if isinstance(seed, tuple):
+            return seed[0], int(seed[1])
+        host, _, port = seed.rpartition(':') if ':' in seed else (seed, '', '')
+        return host, int(port) if port else self.port
+    
+    def probe(self, host: str, port: int) -> Dict[str, Any]:
+        """
+        Probe one node for its identity, upstream channels and replicas
+        
+        Args:
+            host: Server hostname or IP
+            port: Server port
+            
+        Returns:
+            Dict: 'node' information, 'upstream' channel rows and 'replicas'
+                  as (host, port) pairs; 'node' has an 'error' if unreachable
+        """
+        key = self._key(host, port)
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached and now - cached[0] < self.cache_ttl:
+            return cached[1]
+        
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = MySQLClient(
+                    host=host, port=port, user=self.user, password=self.password,
+                    connect_timeout=self.connect_timeout, read_timeout=self.connect_timeout)
+                self._client_locks[key] = threading.Lock()
+            client_lock = self._client_locks[key]
+        
+        with client_lock:
+            result = self._probe_client(client, host, port)
+        self._cache[key] = (time.monotonic(), result)
+        return result
+    
+    def _probe_client(self, client: 'MySQLClient', host: str, port: int) -> Dict[str, Any]:
+        """Run the probe queries on one node's client"""
+        started = time.monotonic()
+        node = {'host': host, 'port': port}
+        result = {'node': node, 'upstream': [], 'replicas': []}
+        if (not client.conn or not client.conn.open) and not client.connect():
+            node['error'] = 'Connection failed'
+            return result
+        
+        identity = client.execute_query("""
+            SELECT @@server_id AS server_id, @@server_uuid AS server_uuid, @@hostname AS hostname,
+                   @@read_only AS read_only, @@global.gtid_executed AS gtid_executed, VERSION() AS version
+        """)
+        if not identity:
+            node['error'] = 'Identity query failed'
+            return result
+        node.update(identity[0])
+        modern = _version_tuple(node['version']) >= (8, 0, 22)
+        
+        for row in client.execute_query("SHOW REPLICA STATUS" if modern else "SHOW SLAVE STATUS"):
+            result['upstream'].append({
+                'source_host': _first(row, 'Source_Host', 'Master_Host'),
+                'source_port': int(_first(row, 'Source_Port', 'Master_Port', default=self.port)),
+                'channel': row.get('Channel_Name', ''),
+                'io_running': _first(row, 'Replica_IO_Running', 'Slave_IO_Running'),
+                'sql_running': _first(row, 'Replica_SQL_Running', 'Slave_SQL_Running'),
+                'lag_seconds': _first(row, 'Seconds_Behind_Source', 'Seconds_Behind_Master'),
+                'retrieved_gtid_set': row.get('Retrieved_Gtid_Set', ''),
+                'executed_gtid_set': row.get('Executed_Gtid_Set', ''),
+                'last_io_error': row.get('Last_IO_Error', ''),
+                'last_sql_error': row.get('Last_SQL_Error', '')
+            })
+        
+        replicas = set()
+        for row in client.execute_query("SHOW REPLICAS" if modern else "SHOW SLAVE HOSTS"):
+            if row.get('Host'):
+                replicas.add((row['Host'], int(row.get('Port') or self.port)))
+        # Replicas without report_host only show up as binlog dump threads
+        if not replicas:
+            for row in client.execute_query("""
+                SELECT SUBSTRING_INDEX(HOST, ':', 1) AS host FROM information_schema.PROCESSLIST
+                WHERE COMMAND IN ('Binlog Dump', 'Binlog Dump GTID')
+            """):
+                replicas.add((row['host'], self.port))
+        result['replicas'] = sorted(replicas)
+        node['probe_ms'] = round((time.monotonic() - started) * 1000, 1)
+        return result
+    
+    def discover(self, seeds: List[Union[str, Tuple[str, int]]]) -> Dict[str, Any]:
+        """
+        Walk the topology from seed hosts in both directions
+        
+        Args:
+            seeds: 'host[:port]' strings or (host, port) tuples
+            
+        Returns:
+            Dict: 'nodes' keyed by host:port, 'edges' from source to replica
+                  with lag, GTID sets and errors, 'roots', and 'elapsed'
+        """
+        started = time.monotonic()
+        probes = {}
+        aliases = {}
+        pending = {}
+        
+        def submit(host, port):
+            key = self._key(host, port)
+            if key in probes or key in pending.values() or len(probes) + len(pending) >= self.max_nodes:
+                return
+            pending[self._executor.submit(self.probe, host, port)] = key
+        
+        for seed in seeds:
+            submit(*self._parse_seed(seed))
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                result = future.result()
+                probes[key] = result
+                uuid = result['node'].get('server_uuid')
+                if uuid:
+                    # The same server reached under another name (IP vs hostname)
+                    aliases.setdefault(uuid, key)
+                for channel in result['upstream']:
+                    if channel['source_host']:
+                        submit(channel['source_host'], channel['source_port'])
+                for host, port in result['replicas']:
+                    submit(host, port)
+        
+        canonical = {key: aliases.get(result['node'].get('server_uuid'), key) for key, result in probes.items()}
+        nodes, edges = {}, []
+        for key, result in probes.items():
+            if canonical[key] != key:
+                nodes.setdefault(canonical[key], {}).setdefault('aliases', []).append(key)
+                continue
+            node = dict(result['node'])
+            node['aliases'] = nodes.get(key, {}).get('aliases', [])
+            nodes[key] = node
+        for key, result in probes.items():
+            if canonical[key] != key:
+                continue
+            for channel in result['upstream']:
+                source = self._key(channel['source_host'], channel['source_port'])
+                edge = dict(channel, source=canonical.get(source, source), replica=key)
+                edge['healthy'] = edge['io_running'] == 'Yes' and edge['sql_running'] == 'Yes'
+                edges.append(edge)
+        
+        replicas = {edge['replica'] for edge in edges}
+        return {
+            'nodes': nodes,
+            'edges': edges,
+            'roots': sorted(key for key in nodes if key not in replicas),
+            'unreachable': sorted(key for key, node in nodes.items() if node.get('error')),
+            'elapsed': round(time.monotonic() - started, 3)
+        }
+
+
+_DEADLOCK_TIMESTAMP = re.compile(r'^(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})')
+_DEADLOCK_TRX_HEADER = re.compile(r'^\*\*\* \((\d+)\) TRANSACTION:')
+_DEADLOCK_TRX_LINE = re.compile(r'^TRANSACTION (\d+), ACTIVE (\d+) sec')
+_DEADLOCK_THREAD_LINE = re.compile(r'^MySQL thread id (\d+), OS thread handle \S+, query id (\d+)\s*(.*)$')
+_DEADLOCK_LOCK_LINE = re.compile(
+    r'^(RECORD LOCKS|TABLE LOCK)\b.*?(?:index `?([^`\s]+)`? of )?table `([^`]+)`\.`([^`]+)`'
+    r'.*?trx id \d+ (lock[_ ]mode .*?)( waiting)?$')
+_DEADLOCK_VICTIM = re.compile(r'^\*\*\* WE ROLL BACK TRANSACTION \((\d+)\)')
+
+
+def parse_deadlock(status: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the LATEST DETECTED DEADLOCK section of SHOW ENGINE INNODB STATUS
+    
+    Args:
+        status: Full InnoDB status text (or just the deadlock section)
+        
+    Returns:
+        Dict: Timestamp, victim, involved tables, a digest identifying the
+              deadlock and one record per transaction with its statement and
+              the locks it holds and waits for; None if no deadlock is shown
+    """
+    if "LATEST DETECTED DEADLOCK" in status:
+        status = status.split("LATEST DETECTED DEADLOCK", 1)[1]
+    elif "*** (1) TRANSACTION:" not in status:
+        return None
+    section = re.split(r'\n-{3,}\n(?:TRANSACTIONS|FILE I/O|BUFFER POOL)', status, maxsplit=1)[0]
+    
+    deadlock = {'timestamp': None, 'victim': None, 'transactions': [], 'tables': []}
+    trx = None
+    target = None
+    in_statement = False
+    
+    for raw_line in section.splitlines():
+        line = raw_line.strip()
+        if deadlock['timestamp'] is None and _DEADLOCK_TIMESTAMP.match(line):
+            deadlock['timestamp'] = _DEADLOCK_TIMESTAMP.match(line).group(1).replace('T', ' ')
+            continue
+        
+        match = _DEADLOCK_TRX_HEADER.match(line)
+        if match:
+            trx = {'number': int(match.group(1)), 'trx_id': None, 'active_seconds': None,
+                   'thread_id': None, 'query_id': None, 'client': '', 'statement': '',
+                   'holds': [], 'waits': []}
+            deadlock['transactions'].append(trx)
+            target = in_statement = None
+            continue
+        
+        match = _DEADLOCK_VICTIM.match(line)
+        if match:
+            deadlock['victim'] = int(match.group(1))
+            break
+        if trx is None:
+            continue
+        
+        if line.startswith('*** '):
+            in_statement = False
+            target = trx['waits'] if 'WAITING FOR' in line else trx['holds'] if 'HOLDS' in line else None
+            continue
+        if in_statement:
+            if line:
+                trx['statement'] = f"{trx['statement']}\n{raw_line}" if trx['statement'] else raw_line
+            else:
+                in_statement = False
+            continue
+        
+        match = _DEADLOCK_TRX_LINE.match(line)
+        if match:
+            trx['trx_id'] = match.group(1)
+            trx['active_seconds'] = int(match.group(2))
+            continue
+        match = _DEADLOCK_THREAD_LINE.match(line)
+        if match:
+            trx['thread_id'] = int(match.group(1))
+            trx['query_id'] = int(match.group(2))
+            trx['client'] = match.group(3)
+            # The statement follows the thread line up to the next blank line
+            in_statement = True
+            continue
+        match = _DEADLOCK_LOCK_LINE.match(line)
+        if match and target is not None:
+            lock = {
+                'type': 'record' if match.group(1) == 'RECORD LOCKS' else 'table',
+                'index': match.group(2),
+                'table': f"{match.group(3)}.{match.group(4)}",
+                'mode': match.group(5).replace('lock mode', 'lock_mode', 1)
+            }
+            target.append(lock)
+            if lock['table'] not in deadlock['tables']:
+                deadlock['tables'].append(lock['table'])
+    
+    if not deadlock['transactions']:
+        return None
+    for trx in deadlock['transactions']:
+        trx['statement'] = trx['statement'].strip()
+        trx['rolled_back'] = trx['number'] == deadlock['victim']
+    # The status only has second resolution, so the digest also covers the transactions
+    fingerprint = '|'.join(f"{trx['trx_id']}:{trx['thread_id']}" for trx in deadlock['transactions'])
+    deadlock['digest'] = hashlib.sha1(f"{deadlock['timestamp']}|{fingerprint}".encode()).hexdigest()
+    return deadlock
+
+
+class DeadlockHistory:
+    """SQLite-backed deadlock history with table and query rankings"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deadlock (
+            server TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            ts TEXT,
+            victim INTEGER,
+            detail TEXT NOT NULL,
+            PRIMARY KEY (server, digest)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS deadlock_trx (
+            server TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            number INTEGER NOT NULL,
+            ts TEXT,
+            statement TEXT,
+            query_digest TEXT,
+            tables TEXT,
+            rolled_back INTEGER NOT NULL,
+            PRIMARY KEY (server, digest, number)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS deadlock_trx_ts ON deadlock_trx (ts);
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open (or create) a deadlock history store
+        
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(self.SCHEMA)
+    
+    def close(self) -> None:
+        """Close the store"""
+        self.db.close()
+    
+    def record(self, server: str, deadlock: Dict[str, Any]) -> bool:
+        """
+        Store a parsed deadlock unless it is already known
+        
+        Args:
+            server: Name the server is stored under
+            deadlock: Result of parse_deadlock
+            
+        Returns:
+            bool: True if the deadlock was new
+        """
+        with self._lock, self.db:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO deadlock VALUES (?, ?, ?, ?, ?)",
+                (server, deadlock['digest'], deadlock['timestamp'], deadlock['victim'], json.dumps(deadlock)))
+            if not cursor.rowcount:
+                return False
+            self.db.executemany("INSERT OR REPLACE INTO deadlock_trx VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+                (server, deadlock['digest'], trx['number'], deadlock['timestamp'], trx['statement'],
+                 normalize_query(trx['statement']) if trx['statement'] else None,
+                 ','.join(sorted({lock['table'] for lock in trx['holds'] + trx['waits']})),
+                 int(trx['rolled_back']))
+                for trx in deadlock['transactions']
+            ])
+        return True
+    
+    def deadlocks(self, server: str = None, since: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return stored deadlocks, newest first
+        
+        Args:
+            server: Optional server name to filter on
+            since: Optional 'YYYY-MM-DD HH:MM:SS' lower bound on the timestamp
+            limit: Maximum number of deadlocks returned
+            
+        Returns:
+            List[Dict]: Parsed deadlocks with their 'server'
+        """
+        where_clause, params = self._filter(server, since)
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT server, detail FROM deadlock {where_clause} ORDER BY ts DESC LIMIT ?",
+                params + (limit,)).fetchall()
+        return [dict(json.loads(detail), server=name) for name, detail in rows]
+    
+    def top_tables(self, server: str = None, since: str = None, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Rank tables by the number of deadlocks they were involved in
+        
+        Args:
+            server: Optional server name to filter on
+            since: Optional 'YYYY-MM-DD HH:MM:SS' lower bound on the timestamp
+            n: Number of tables returned
+            
+        Returns:
+            List[Dict]: Table name and deadlock count, most frequent first
+        """
+        where_clause, params = self._filter(server, since)
+        counts = {}
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT server, digest, GROUP_CONCAT(tables) FROM deadlock_trx {where_clause} "
+                f"GROUP BY server, digest", params).fetchall()
+        for _, _, tables in rows:
+            for table in set(filter(None, (tables or '').split(','))):
+                counts[table] = counts.get(table, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [{'table': table, 'deadlocks': count} for table, count in ranked]
+    
+    def top_queries(self, server: str = None, since: str = None, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Rank normalized statements by the number of deadlocks they took part in
+        
+        Args:
+            server: Optional server name to filter on
+            since: Optional 'YYYY-MM-DD HH:MM:SS' lower bound on the timestamp
+            n: Number of statements returned
+            
+        Returns:
+            List[Dict]: Statement digest, deadlock count, times chosen as victim
+                        and one example statement, most frequent first
+        """
+        where_clause, params = self._filter(server, since)
+        where_clause = f"{where_clause} AND query_digest IS NOT NULL" if where_clause \
+            else "WHERE query_digest IS NOT NULL"
+        with self._lock:
+            rows = self.db.execute(f"""
+                SELECT query_digest, COUNT(DISTINCT server || digest), SUM(rolled_back), MAX(statement)
+                FROM deadlock_trx {where_clause}
+                GROUP BY query_digest ORDER BY 2 DESC LIMIT ?
+            """, params + (n,)).fetchall()
+        return [{'query_digest': digest, 'deadlocks': count, 'victim_count': victims, 'example': example}
+                for digest, count, victims, example in rows]
+    
+    @staticmethod
+    def _filter(server: str, since: str) -> Tuple[str, tuple]:
+        """Build the WHERE clause shared by the queries"""
+        conditions, params = [], []
+        if server:
+            conditions.append("server = ?")
+            params.append(server)
+        if since:
+            conditions.append("ts >= ?")
+            params.append(since)
+        return ("WHERE " + " AND ".join(conditions)) if conditions else "", tuple(params)
+
+
+class DeadlockMonitor:
+    """Poll SHOW ENGINE INNODB STATUS and record each new deadlock"""
+    
+    def __init__(self, client: 'MySQLClient', history: DeadlockHistory, server: str = None,
+                 interval: float = 10.0):
+        """
+        Initialize the deadlock monitor
+        
+        Only the latest deadlock is visible in the InnoDB status, so deadlocks
+        closer together than the interval can be missed; enabling
+        innodb_print_all_deadlocks additionally logs every one to the error log.
+        
+        Args:
+            client: Client of the server to watch
+            history: Store the deadlocks are recorded in
+            server: Name the server is stored under (default: host:port)
+            interval: Seconds between polls when running in the background
+        """
+        self.client = client
+        self.history = history
+        self.server = server or f"{client.host}:{client.port}"
+        self.interval = interval
+        self._db = _DedicatedConnection(client)
+        self._last_digest = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """
+        Check for a new deadlock and record it
+        
+        Returns:
+            Dict: The parsed deadlock if it was new, None otherwise
+        """
+        rows = self._db.execute("SHOW ENGINE INNODB STATUS")
+        deadlock = parse_deadlock(rows[0]['Status']) if rows else None
+        if deadlock is None or deadlock['digest'] == self._last_digest:
+            return None
+        self._last_digest = deadlock['digest']
+        if not self.history.record(self.server, deadlock):
+            return None
+        logger.warning(f"Deadlock on {self.server} at {deadlock['timestamp']}: "
+                       f"{', '.join(deadlock['tables'])} (victim: transaction {deadlock['victim']})")
+        return deadlock
+    
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'deadlock-monitor-{self.client.host}', daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background poller and close its connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._db.close()
+    
+    def _run(self) -> None:
+        """Poll on a fixed schedule until stopped"""
+        next_poll = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except pymysql.Error as e:
+                logger.warning(f"Deadlock poll failed: {e}")
+            next_poll += self.interval
+            self._stop.wait(max(0.0, next_poll - time.monotonic()))
+
+
+# Cumulative counters of events_statements_summary_by_digest, keyed by report name
+DIGEST_COUNTERS = {
+    'count': 'COUNT_STAR',
+    'latency': 'SUM_TIMER_WAIT',
+    'lock_time': 'SUM_LOCK_TIME',
+    'rows_examined': 'SUM_ROWS_EXAMINED',
+    'rows_sent': 'SUM_ROWS_SENT',
+    'rows_affected': 'SUM_ROWS_AFFECTED',
+    'tmp_tables': 'SUM_CREATED_TMP_TABLES',
+    'tmp_disk_tables': 'SUM_CREATED_TMP_DISK_TABLES',
+    'full_scans': 'SUM_NO_INDEX_USED',
+    'sort_rows': 'SUM_SORT_ROWS',
+    'errors': 'SUM_ERRORS'
+}
+
+PICOSECONDS = 1e12
+
+
+def diff_digest_snapshots(previous: Dict[Tuple, Dict[str, Any]],
+                          current: Dict[Tuple, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Compute per-digest deltas between two digest summary snapshots
+    
+    A digest whose count went down or whose FIRST_SEEN changed was reset
+    (TRUNCATE or eviction from a full summary table), so its current values
+    are taken as the delta.
+    
+    Args:
+        previous: Earlier snapshot keyed by (schema, digest)
+        current: Later snapshot keyed by (schema, digest)
+        
+    Returns:
+        List[Dict]: Digests that executed in between, with 'schema',
+                    'digest', 'digest_text' and one delta per DIGEST_COUNTERS
+                    key (latencies in seconds)
+    """
+    deltas = []
+    for key, row in current.items():
+        before = previous.get(key)
+        if before is not None and (row['COUNT_STAR'] < before['COUNT_STAR'] or
+                                   row['FIRST_SEEN'] != before['FIRST_SEEN']):
+            before = None
+        delta = {name: int(row[column]) - (int(before[column]) if before else 0)
+                 for name, column in DIGEST_COUNTERS.items()}
+        if delta['count'] <= 0:
+            continue
+        delta['latency'] /= PICOSECONDS
+        delta['lock_time'] /= PICOSECONDS
+        delta['avg_latency'] = delta['latency'] / delta['count']
+        delta.update(schema=key[0], digest=key[1], digest_text=row['DIGEST_TEXT'])
+        deltas.append(delta)
+    return deltas
+
+
+class DigestProfiler:
+    """Top-N statement digests per interval from performance_schema digest summaries"""
+    
+    def __init__(self, client: 'MySQLClient', interval: float = 60.0, history_size: int = 60):
+        """
+        Initialize the profiler
+        
+        Only digests seen since the previous snapshot are fetched, so each
+        sample transfers the active digests rather than the whole summary table.
+        
+        Args:
+            client: Client of the server to profile
+            interval: Seconds between samples when running in the background
+            history_size: Number of interval windows kept
+        """
+        self.client = client
+        self.interval = interval
+        self.windows = deque(maxlen=history_size)
+        self._db = _DedicatedConnection(client)
+        self._state = {}
+        self._since = None
+        self._taken_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def snapshot(self) -> Dict[Tuple, Dict[str, Any]]:
+        """
+        Read the digest summary rows changed since the previous snapshot
+        
+        Returns:
+            Dict: Rows keyed by (schema, digest)
+        """
+        now = self._db.execute("SELECT NOW(6) AS now")[0]['now']
+        where_clause = "WHERE LAST_SEEN >= %s" if self._since is not None else ""
+        rows = self._db.execute(f"""
+            SELECT SCHEMA_NAME, DIGEST, DIGEST_TEXT, FIRST_SEEN, {', '.join(DIGEST_COUNTERS.values())}
+            FROM performance_schema.events_statements_summary_by_digest
+            {where_clause}
+        """, (self._since,) if self._since is not None else None)
+        self._since = now
+        return {(row['SCHEMA_NAME'], row['DIGEST']): row for row in rows}
+    
+    def sample(self) -> Optional[Dict[str, Any]]:
+        """
+        Take a snapshot and store the window since the previous one
+        
+        Returns:
+            Dict: Window with 'start', 'end', 'seconds' and per-digest
+                  'digests', or None for the first (baseline) snapshot
+        """
+        changed = self.snapshot()
+        taken_at = time.time()
+        with self._lock:
+            deltas = diff_digest_snapshots(self._state, changed) if self._taken_at is not None else None
+            self._state.update(changed)
+            window = None
+            if deltas is not None:
+                window = {'start': self._taken_at, 'end': taken_at,
+                          'seconds': round(taken_at - self._taken_at, 3), 'digests': deltas}
+                self.windows.append(window)
+            self._taken_at = taken_at
+        return window
+    
+    def top(self, n: int = 10, by: str = 'latency', last: int = 1) -> List[Dict[str, Any]]:
+        """
+        Return the top digests of the most recent windows
+        
+        Args:
+            n: Number of digests returned
+            by: DIGEST_COUNTERS key to rank by (e.g. 'latency', 'rows_examined',
+                'tmp_disk_tables', 'full_scans')
+            last: Number of most recent windows combined
+            
+        Returns:
+            List[Dict]: Digest deltas summed over the windows, highest first
+        """
+        if by not in DIGEST_COUNTERS:
+            raise ValueError(f"Unknown metric '{by}', expected one of {', '.join(DIGEST_COUNTERS)}")
+        with self._lock:
+            windows = list(self.windows)[-last:]
+        
+        combined = {}
+        for window in windows:
+            for delta in window['digests']:
+                key = (delta['schema'], delta['digest'])
+                total = combined.get(key)
+                if total is None:
+                    combined[key] = dict(delta)
+                else:
+                    for name in DIGEST_COUNTERS:
+                        total[name] += delta[name]
+        for total in combined.values():
+            total['avg_latency'] = total['latency'] / total['count']
+        return sorted(combined.values(), key=lambda delta: delta[by], reverse=True)[:n]
+    
+    def report(self, n: int = 10, last: int = 1,
+               metrics: Tuple[str, ...] = ('latency', 'rows_examined', 'tmp_disk_tables', 'full_scans')
+               ) -> Dict[str, Any]:
+        """
+        Build top-N lists for several metrics over the most recent windows
+        
+        Args:
+            n: Number of digests per list
+            last: Number of most recent windows combined
+            metrics: DIGEST_COUNTERS keys to rank by
+            
+        Returns:
+            Dict: 'seconds' covered and one top-N list per metric
+        """
+        with self._lock:
+            seconds = sum(window['seconds'] for window in list(self.windows)[-last:])
+        report = {'seconds': round(seconds, 3)}
+        for metric in metrics:
+            report[metric] = [delta for delta in self.top(n, metric, last) if delta[metric] > 0]
+        return report
+    
+    def start(self) -> None:
+        """Start sampling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'digest-profiler-{self.client.host}', daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background sampler and close its connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._db.close()
+    
+    def _run(self) -> None:
+        """Sample on a fixed schedule until stopped"""
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except pymysql.Error as e:
+                logger.warning(f"Digest summary sample failed: {e}")
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.monotonic()))
+
+
+class ProcesslistSampler:
+    """Background processlist sampling into a bounded in-memory history"""
+    
+    FIELDS = ('id', 'user', 'host', 'db', 'command', 'state', 'time', 'digest', 'query')
+    
+    def __init__(self, client: 'MySQLClient', interval: float = 1.0, retention: float = 3600,
+                 include_idle: bool = False, max_query_length: int = 1024):
+        """
+        Initialize the sampler
+        
+        Rows are stored as tuples of interned strings and statement texts are
+        kept once per digest, so an hour of one-second samples stays small.
+        
+        Args:
+            client: Client of the server to sample
+            interval: Seconds between samples when running in the background
+            retention: Seconds of history kept in the ring buffer
+            include_idle: Also record sleeping connections
+            max_query_length: Characters of statement text kept
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid sampling interval: {interval}")
+        self.client = client
+        self.interval = interval
+        self.include_idle = include_idle
+        self.max_query_length = max_query_length
+        self.samples = deque(maxlen=max(1, int(retention / interval)))
+        self._texts = {}
+        self._db = _DedicatedConnection(client)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def sample(self) -> int:
+        """
+        Take one processlist sample and append it to the history
+        
+        Returns:
+            int: Number of threads recorded
+        """
+        idle_clause = "" if self.include_idle else "AND t.PROCESSLIST_COMMAND <> 'Sleep'"
+        rows = self._db.execute(f"""
+            SELECT t.PROCESSLIST_ID, t.PROCESSLIST_USER, t.PROCESSLIST_HOST, t.PROCESSLIST_DB,
+                   t.PROCESSLIST_COMMAND, t.PROCESSLIST_STATE, t.PROCESSLIST_TIME, s.DIGEST,
+                   LEFT(COALESCE(s.DIGEST_TEXT, t.PROCESSLIST_INFO), %s) AS QUERY
+            FROM performance_schema.threads t
+            -- Only the top-level statement; stored programs and prepared statements add nested rows
+            LEFT JOIN performance_schema.events_statements_current s
+              ON s.THREAD_ID = t.THREAD_ID AND COALESCE(s.NESTING_EVENT_TYPE, '') <> 'STATEMENT'
+            WHERE t.TYPE = 'FOREGROUND'
+              AND t.PROCESSLIST_ID <> CONNECTION_ID()
+              AND t.PROCESSLIST_COMMAND NOT IN ('Daemon', 'Binlog Dump', 'Binlog Dump GTID')
+              {idle_clause}
+        """, (self.max_query_length,))
+        
+        intern = sys.intern
+        compact = []
+        for row in rows:
+            digest = row['DIGEST']
+            query = row['QUERY']
+            if digest:
+                self._texts.setdefault(digest, query)
+                query = None
+            compact.append((
+                row['PROCESSLIST_ID'],
+                intern(row['PROCESSLIST_USER'] or ''),
+                intern(row['PROCESSLIST_HOST'] or ''),
+                intern(row['PROCESSLIST_DB'] or ''),
+                intern(row['PROCESSLIST_COMMAND'] or ''),
+                intern(row['PROCESSLIST_STATE'] or ''),
+                row['PROCESSLIST_TIME'],
+                intern(digest) if digest else None,
+                query
+            ))
+        with self._lock:
+            self.samples.append((time.time(), tuple(compact)))
+            if len(self._texts) > 10000:
+                self._prune_texts()
+        return len(compact)
+    
+    def _prune_texts(self) -> None:
+        """Drop statement texts of digests no longer in the history; the caller must hold the lock"""
+        live = {row[7] for _, rows in self.samples for row in rows if row[7]}
+        self._texts = {digest: text for digest, text in self._texts.items() if digest in live}
+    
+    def _window(self, minutes: float = None) -> List[Tuple[float, tuple]]:
+        """Return the samples of the last N minutes (all if None)"""
+        with self._lock:
+            samples = list(self.samples)
+        if minutes is None:
+            return samples
+        cutoff = time.time() - minutes * 60
+        return samples[bisect.bisect_left([ts for ts, _ in samples], cutoff):]
+    
+    def top(self, by: Union[str, Tuple[str, ...]] = 'digest', minutes: float = 5,
+            n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Aggregate the recent history like 'top'
+        
+        Args:
+            by: Field or tuple of fields to group by ('user', 'host', 'db',
+                'command', 'state', 'digest')
+            minutes: Minutes of history aggregated
+            n: Number of groups returned
+            
+        Returns:
+            List[Dict]: Groups with 'samples' (thread-samples seen), 'avg_active'
+                        (average concurrent threads) and 'max_time', busiest first
+        """
+        fields = (by,) if isinstance(by, str) else tuple(by)
+        for field in fields:
+            if field not in self.FIELDS[1:6] + ('digest',):
+                raise ValueError(f"Cannot group by '{field}'")
+        indexes = [self.FIELDS.index(field) for field in fields]
+        
+        samples = self._window(minutes)
+        groups = {}
+        for _, rows in samples:
+            for row in rows:
+                key = tuple(row[i] for i in indexes)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = [0, 0]
+                group[0] += 1
+                group[1] = max(group[1], row[6] or 0)
+        
+        result = []
+        for key, (count, max_time) in sorted(groups.items(), key=lambda item: item[1][0], reverse=True)[:n]:
+            entry = dict(zip(fields, key))
+            if 'digest' in entry:
+                entry['query'] = self._texts.get(entry['digest'])
+            entry.update(samples=count, avg_active=round(count / len(samples), 3), max_time=max_time)
+            result.append(entry)
+        return result
+    
+    def history(self, minutes: float = None) -> Iterator[Dict[str, Any]]:
+        """
+        Expand the stored samples into rows
+        
+        Args:
+            minutes: Minutes of history returned (default: all)
+            
+        Yields:
+            Dict: One row per thread and sample, with its 'timestamp'
+        """
+        for ts, rows in self._window(minutes):
+            for row in rows:
+                entry = dict(zip(self.FIELDS, row))
+                if entry['query'] is None and entry['digest']:
+                    entry['query'] = self._texts.get(entry['digest'])
+                entry['timestamp'] = ts
+                yield entry
+    
+    def dump(self, path: str, minutes: float = None) -> int:
+        """
+        Write the history to a JSON Lines file (gzip-compressed if it ends in .gz)
+        
+        Args:
+            path: Output file
+            minutes: Minutes of history written (default: all)
+            
+        Returns:
+            int: Number of rows written
+        """
+        count = 0
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt') as f:
+            for entry in self.history(minutes):
+                f.write(json.dumps(entry, default=str) + '\n')
+                count += 1
+        logger.info(f"Dumped {count} processlist row(s) to {path}")
+        return count
+    
+    def start(self) -> None:
+        """Start sampling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'processlist-sampler-{self.client.host}',
+                                        daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background sampler and close its connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._db.close()
+    
+    def _run(self) -> None:
+        """Sample on a fixed schedule until stopped"""
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except pymysql.Error as e:
+                logger.warning(f"Processlist sample failed: {e}")
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.monotonic()))
+
+
+BINLOG_MAGIC = b'\xfebin'
+BINLOG_HEADER = struct.Struct('<IBIIIH')
+GTID_LOG_EVENT = 33
+
+
+def _format_gtid_set(gtids: Dict[str, List[List[int]]]) -> str:
+    """Format {uuid: [[start, end], ...]} as a GTID set string"""
+    return ','.join(
+        uuid + ''.join(f":{start}" if start == end else f":{start}-{end}" for start, end in intervals)
+        for uuid, intervals in sorted(gtids.items())
+    )
+
+
+def scan_binlog_file(path: str, state: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Scan binlog event headers for time and GTID ranges
+    
+    Only the 19-byte event headers and GTID event bodies are read; other
+    event bodies are skipped with a seek. Scanning stops at an incomplete
+    trailing event, so a file still being written can be scanned again later
+    by passing the returned state back in.
+    
+    Args:
+        path: Uncompressed binlog file (v4 format)
+        state: State returned by a previous scan of the same file
+        
+    Returns:
+        Dict: 'offset' scanned up to, 'events', 'first_ts', 'last_ts',
+              'gtids' ({uuid: intervals}) and the formatted 'gtid_set'
+    """
+    state = state or {'offset': 0, 'events': 0, 'first_ts': None, 'last_ts': None, 'gtids': {}}
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if state['offset'] == 0:
+            if f.read(4) != BINLOG_MAGIC:
+                raise ValueError(f"'{path}' is not a binlog file")
+            state['offset'] = 4
+        offset = state['offset']
+        f.seek(offset)
+        while offset + BINLOG_HEADER.size <= size:
+            header = f.read(BINLOG_HEADER.size)
+            timestamp, event_type, _, event_size, _, _ = BINLOG_HEADER.unpack(header)
+            if event_size < BINLOG_HEADER.size or offset + event_size > size:
+                break
+            if event_type == GTID_LOG_EVENT:
+                body = f.read(25)
+                sid = body[1:17].hex()
+                uuid = f"{sid[:8]}-{sid[8:12]}-{sid[12:16]}-{sid[16:20]}-{sid[20:]}"
+                gno = struct.unpack('<q', body[17:25])[0]
+                intervals = state['gtids'].setdefault(uuid, [])
+                if intervals and intervals[-1][1] + 1 == gno:
+                    intervals[-1][1] = gno
+                else:
+                    intervals.append([gno, gno])
+            # Artificial events (e.g. the initial ROTATE) carry a zero timestamp
+            if timestamp:
+                if state['first_ts'] is None:
+                    state['first_ts'] = timestamp
+                state['last_ts'] = timestamp
+            state['events'] += 1
+            offset += event_size
+            f.seek(offset)
+    state['offset'] = offset
+    state['gtid_set'] = _format_gtid_set(state['gtids'])
+    return state
+
+
+class BinlogArchiver:
+    """Continuously archive binlogs of many servers with mysqlbinlog for point-in-time recovery"""
+    
+    INDEX_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS binlog_file (
+            server TEXT NOT NULL,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            events INTEGER NOT NULL,
+            first_ts INTEGER,
+            last_ts INTEGER,
+            gtid_set TEXT NOT NULL,
+            archived_at INTEGER NOT NULL,
+            PRIMARY KEY (server, name)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS binlog_file_time ON binlog_file (server, first_ts, last_ts);
+    """
+    
+    def __init__(self, base_dir: str, index_path: str = None, poll_interval: float = 5.0,
+                 compress_level: int = 6, compress_workers: int = 2, mysqlbinlog: str = 'mysqlbinlog',
+                 server_id_base: int = 4000000000):
+        """
+        Initialize the archiver
+        
+        Args:
+            base_dir: Directory receiving one subdirectory per server
+            index_path: SQLite index file (default: base_dir/binlog_index.db)
+            poll_interval: Seconds between checks for completed files and metric updates
+            compress_level: Gzip compression level for completed files
+            compress_workers: Number of files compressed at the same time across all servers
+            mysqlbinlog: mysqlbinlog executable
+            server_id_base: First server_id used by the mysqlbinlog connections
+                            (one per server, must not clash with real servers)
+        """
+        self.base_dir = base_dir
+        self.poll_interval = poll_interval
+        self.compress_level = compress_level
+        self.mysqlbinlog = mysqlbinlog
+        self.server_id_base = server_id_base
+        self.index_path = index_path or os.path.join(base_dir, 'binlog_index.db')
+        self.compress_workers = compress_workers
+        os.makedirs(base_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = None
+        self._compressor = None
+        self._open()
+        self._servers = {}
+        self._stop = threading.Event()
+    
+    def _open(self) -> None:
+        """Open the index and the compression workers, again after a stop()"""
+        if self.db is None:
+            self.db = sqlite3.connect(self.index_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(self.INDEX_SCHEMA)
+        if self._compressor is None:
+            self._compressor = ThreadPoolExecutor(max_workers=self.compress_workers,
+                                                  thread_name_prefix='binlog-gzip')
+    
+    def add_server(self, client: 'MySQLClient', name: str = None) -> str:
+        """
+        Register a server to archive
+        
+        Args:
+            client: Client of the server (needs REPLICATION SLAVE and REPLICATION CLIENT)
+            name: Name the server is archived under (default: host_port)
+            
+        Returns:
+            str: Server name
+        """
+        name = name or f"{client.host}_{client.port}"
+        directory = os.path.join(self.base_dir, re.sub(r'[^\w.-]', '_', name))
+        os.makedirs(directory, exist_ok=True)
+        self._servers[name] = {
+            'client': client,
+            'dir': directory,
+            'server_id': self.server_id_base + len(self._servers),
+            'process': None,
+            'thread': None,
+            'scan': None,
+            'metrics': {'state': 'stopped', 'restarts': 0, 'archived_files': 0, 'archived_bytes': 0,
+                        'live_file': None, 'live_bytes': 0, 'bytes_per_second': 0.0,
+                        'lag_bytes': None, 'lag_seconds': None, 'last_error': None},
+            'sampled': None
+        }
+        return name
+    
+    def start(self) -> None:
+        """Start one supervised mysqlbinlog stream per registered server"""
+        self._open()
+        self._stop.clear()
+        for name, server in self._servers.items():
+            if server['thread'] is None or not server['thread'].is_alive():
+                server['thread'] = threading.Thread(target=self._supervise, args=(name,),
+                                                    name=f'binlog-archiver-{name}', daemon=True)
+                server['thread'].start()
+    
+    def stop(self) -> None:
+        """Stop all streams, archive what is complete and close the index (start() reopens it)"""
+        self._stop.set()
+        for server in self._servers.values():
+            if server['process'] is not None and server['process'].poll() is None:
+                server['process'].terminate()
+        for server in self._servers.values():
+            if server['thread'] is not None:
+                server['thread'].join()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+            self._compressor = None
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+    
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-server archiving metrics
+        
+        Returns:
+            Dict: Server names mapped to state, restarts, archived files and
+                  bytes, live file, throughput and lag to the live binlog
+        """
+        return {name: dict(server['metrics']) for name, server in self._servers.items()}
+    
+    def files_for_recovery(self, server: str, until: float, since: float = None) -> List[Dict[str, Any]]:
+        """
+        Find the archived files needed to roll forward to a point in time
+        
+        Args:
+            server: Server name
+            until: Unix time to recover to
+            since: Unix time of the restored backup (default: from the first archived file)
+            
+        Returns:
+            List[Dict]: Index rows in binlog order
+        """
+        with self._lock:
+            rows = self.db.execute("""
+                SELECT name, path, size, events, first_ts, last_ts, gtid_set FROM binlog_file
+                WHERE server = ? AND first_ts <= ? AND (? IS NULL OR last_ts >= ?)
+                ORDER BY name
+            """, (server, until, since, since)).fetchall()
+        keys = ('name', 'path', 'size', 'events', 'first_ts', 'last_ts', 'gtid_set')
+        return [dict(zip(keys, row)) for row in rows]
+    
+    def _local_files(self, server: Dict[str, Any]) -> List[str]:
+        """Return the raw (not yet archived) binlog files of a server in order"""
+        return sorted(
+            entry for entry in os.listdir(server['dir'])
+            if not entry.endswith(('.gz', '.tmp', '.log')) and os.path.isfile(os.path.join(server['dir'], entry))
+        )
+    
+    def _resume_file(self, name: str, server: Dict[str, Any]) -> Optional[str]:
+        """Pick the binlog to (re)start streaming from"""
+        raw = self._local_files(server)
+        if raw:
+            # The newest raw file was interrupted; mysqlbinlog rewrites it from the start
+            return raw[-1]
+        server_logs = [row['Log_name'] for row in server['client'].get_binary_logs()]
+        if not server_logs:
+            return None
+        with self._lock:
+            last = self.db.execute("SELECT MAX(name) FROM binlog_file WHERE server = ?", (name,)).fetchone()[0]
+        if last is None:
+            return server_logs[0]
+        newer = [log for log in server_logs if log > last]
+        if not newer:
+            return server_logs[-1]
+        if last not in server_logs and newer[0] != server_logs[0]:
+            logger.warning(f"Binlogs of {name} after {last} were purged before being archived; "
+                           f"resuming at {newer[0]}")
+        return newer[0]
+    
+    def _supervise(self, name: str) -> None:
+        """Run and restart the mysqlbinlog stream of one server until stopped"""
+        import subprocess
+        
+        server = self._servers[name]
+        client = server['client']
+        metrics = server['metrics']
+        backoff = 1
+        env = dict(os.environ, MYSQL_PWD=client.password)
+        
+        while not self._stop.is_set():
+            try:
+                start_file = self._resume_file(name, server)
+            except (pymysql.Error, OSError) as e:
+                start_file = None
+                metrics['last_error'] = str(e)
+            if start_file is None:
+                metrics['state'] = 'waiting'
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            
+            cmd = [
+                self.mysqlbinlog,
+                "--read-from-remote-server",
+                "--raw",
+                "--stop-never",
+                f"--connection-server-id={server['server_id']}",
+                f"--host={client.host}",
+                f"--port={client.port}",
+                f"--user={client.user}",
+                f"--result-file={server['dir']}{os.sep}",
+                start_file
+            ]
+            server['scan'] = None
+            started = time.monotonic()
+            with open(os.path.join(server['dir'], 'mysqlbinlog.log'), 'ab') as log:
+                try:
+                    server['process'] = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=log, env=env)
+                except OSError as e:
+                    metrics.update(state='failed', last_error=str(e))
+                    logger.error(f"Failed to start mysqlbinlog for {name}: {e}")
+                    return
+                metrics['state'] = 'running'
+                logger.info(f"Archiving binlogs of {name} from {start_file}")
+                while server['process'].poll() is None and not self._stop.wait(self.poll_interval):
+                    self._archive_completed(name, server)
+                    self._update_metrics(server)
+            
+            if self._stop.is_set():
+                server['process'].terminate()
+                server['process'].wait()
+                self._archive_completed(name, server)
+                metrics['state'] = 'stopped'
+                return
+            
+            self._archive_completed(name, server)
+            metrics.update(state='restarting', restarts=metrics['restarts'] + 1,
+                           last_error=f"mysqlbinlog exited with code {server['process'].returncode}")
+            logger.warning(f"Binlog stream of {name} ended ({metrics['last_error']}), restarting in {backoff}s")
+            if time.monotonic() - started > 60:
+                backoff = 1
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 60)
+    
+    def _archive_completed(self, name: str, server: Dict[str, Any]) -> None:
+        """Index and compress every raw file except the newest one, which may still be growing"""
+        raw = self._local_files(server)
+        futures = []
+        for entry in raw[:-1]:
+            path = os.path.join(server['dir'], entry)
+            scan = server['scan'] if server['scan'] and server['scan']['name'] == entry else None
+            try:
+                scan = scan_binlog_file(path, scan)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to scan binlog '{path}': {e}")
+                continue
+            futures.append((entry, self._compressor.submit(self._compress, name, server, entry, path, scan)))
+        for entry, future in futures:
+            try:
+                future.result()
+            except (OSError, sqlite3.Error) as e:
+                # Keep supervising; the raw file stays in place and is retried on the next pass
+                server['metrics']['last_error'] = f"Failed to archive {entry}: {e}"
+                logger.error(f"Failed to archive binlog {entry} of {name}: {e}")
+    
+    def _compress(self, name: str, server: Dict[str, Any], entry: str, path: str, scan: Dict[str, Any]) -> None:
+        """Compress a completed binlog, record it in the index and remove the raw file"""
+        size = os.path.getsize(path)
+        target = f"{path}.gz"
+        with open(path, 'rb') as src, gzip.open(f"{target}.tmp", 'wb', compresslevel=self.compress_level) as dst:
+            while True:
+                block = src.read(1024 * 1024)
+                if not block:
+                    break
+                dst.write(block)
+        os.replace(f"{target}.tmp", target)
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO binlog_file VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (name, entry, target, size, scan['events'], scan['first_ts'], scan['last_ts'],
+                             scan['gtid_set'], int(time.time())))
+            server['metrics']['archived_files'] += 1
+            server['metrics']['archived_bytes'] += size
+        os.remove(path)
+        logger.info(f"Archived {entry} of {name} ({size} bytes, {scan['gtid_set'] or 'no GTIDs'})")
+    
+    def _update_metrics(self, server: Dict[str, Any]) -> None:
+        """Refresh throughput and lag to the server's live binlog"""
+        metrics = server['metrics']
+        raw = self._local_files(server)
+        if not raw:
+            return
+        live = raw[-1]
+        path = os.path.join(server['dir'], live)
+        try:
+            if not server['scan'] or server['scan']['name'] != live:
+                server['scan'] = {'name': live}
+                server['scan'].update(scan_binlog_file(path))
+            else:
+                server['scan'].update(scan_binlog_file(path, server['scan']))
+        except (OSError, ValueError):
+            return
+        live_bytes = server['scan']['offset']
+        
+        now = time.monotonic()
+        total = metrics['archived_bytes'] + live_bytes
+        if server['sampled'] and now > server['sampled'][0]:
+            elapsed = now - server['sampled'][0]
+            metrics['bytes_per_second'] = round(max(0, total - server['sampled'][1]) / elapsed, 1)
+        server['sampled'] = (now, total)
+        metrics.update(live_file=live, live_bytes=live_bytes)
+        
+        logs = server['client'].get_binary_logs()
+        sizes = [(row['Log_name'], int(row['File_size'])) for row in logs]
+        if any(log == live for log, _ in sizes):
+            behind = [size for log, size in sizes if log > live]
+            live_size = next(size for log, size in sizes if log == live)
+            metrics['lag_bytes'] = max(0, live_size - live_bytes) + sum(behind)
+        last_ts = server['scan']['last_ts']
+        metrics['lag_seconds'] = 0 if metrics['lag_bytes'] == 0 else \
+            (round(time.time() - last_ts, 1) if last_ts else None)
+
+
+PRIMARY_KEY_SQL = """
+    SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+    ORDER BY ORDINAL_POSITION
+"""
+
+
+def primary_key_columns(client: 'MySQLClient', database: str, table: str) -> List[str]:
+    """
+    Get the primary key columns of a table in key order
+    
+    Args:
+        client: Client of the server holding the table
+        database: Database name
+        table: Table name
+        
+    Returns:
+        List[str]: Column names (empty if the table has no primary key)
+    """
+    rows = client.execute_query(PRIMARY_KEY_SQL, (database, table))
+    return [row['COLUMN_NAME'] for row in rows]
+
+
+def pk_range_condition(columns: List[str], lower: tuple = None, upper: tuple = None) -> Tuple[str, list]:
+    """
+    Build the WHERE condition of a primary key range lower < key <= upper
+    
+    Composite keys use row constructor comparisons, which MySQL resolves as
+    a range on the primary key.
+    
+    Args:
+        columns: Primary key columns
+        lower: Exclusive lower bound (None for no bound)
+        upper: Inclusive upper bound (None for no bound)
+        
+    Returns:
+        Tuple: Condition SQL ('1=1' if unbounded) and its parameters
+    """
+    if len(columns) == 1:
+        key, placeholders = f"`{columns[0]}`", "%s"
+    else:
+        key = '(' + ', '.join(f"`{column}`" for column in columns) + ')'
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    conditions, params = [], []
+    if lower is not None:
+        conditions.append(f"{key} > {placeholders}")
+        params.extend(lower)
+    if upper is not None:
+        conditions.append(f"{key} <= {placeholders}")
+        params.extend(upper)
+    return ' AND '.join(conditions) or '1=1', params
+
+
+def next_chunk_boundary(conn, database: str, table: str, columns: List[str], lower: tuple,
+                        chunk_size: int) -> Optional[tuple]:
+    """
+    Find the inclusive upper key of the next chunk by walking the primary key index
+    
+    Args:
+        conn: pymysql connection
+        database: Database name
+        table: Table name
+        columns: Primary key columns
+        lower: Exclusive lower bound of the chunk (None to start at the beginning)
+        chunk_size: Number of rows in the chunk
+        
+    Returns:
+        tuple: Key of the chunk's last row, or None if fewer rows remain (last chunk)
+    """
+    key = ', '.join(f"`{column}`" for column in columns)
+    condition, params = pk_range_condition(columns, lower)
+    with conn.cursor(pymysql.cursors.Cursor) as cursor:
+        cursor.execute(f"""
+            SELECT {key} FROM `{database}`.`{table}` FORCE INDEX (PRIMARY)
+            WHERE {condition} ORDER BY {key} LIMIT 1 OFFSET %s
+        """, params + [max(1, chunk_size) - 1])
+        row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+class ChunkSizer:
+    """Adapt a chunk size so each chunk takes about a target time"""
+    
+    def __init__(self, target_seconds: float = 0.5, initial: int = 1000, minimum: int = 10,
+                 maximum: int = 1000000, max_growth: float = 2.0):
+        """
+        Args:
+            target_seconds: Desired time per chunk
+            initial: First chunk size
+            minimum: Smallest chunk size
+            maximum: Largest chunk size
+            max_growth: Largest factor by which the size grows after one chunk
+        """
+        self.target_seconds = target_seconds
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_growth = max_growth
+        self.size = max(minimum, min(maximum, initial))
+    
+    def update(self, rows: int, seconds: float) -> int:
+        """
+        Record a finished chunk and return the next chunk size
+        
+        Args:
+            rows: Rows in the finished chunk
+            seconds: Time the chunk took
+            
+        Returns:
+            int: Next chunk size
+        """
+        if rows > 0 and seconds > 0:
+            ideal = rows * self.target_seconds / seconds
+            if seconds > 2 * self.target_seconds:
+                # Far too slow: shrink right away instead of easing down
+                size = ideal
+            else:
+                size = min((self.size + ideal) / 2, self.size * self.max_growth)
+            self.size = int(max(self.minimum, min(self.maximum, size)))
+        return self.size
+
+
+class TableChecksummer:
+    """Compare table data between two servers by primary key chunk checksums"""
+    
+    def __init__(self, source: 'MySQLClient', target: 'MySQLClient', database: str,
+                 tables: List[str] = None, target_database: str = None, workers: int = 4,
+                 chunk_seconds: float = 0.5, initial_chunk_size: int = 1000,
+                 max_chunk_size: int = 1000000, retries: int = 2, retry_delay: float = 1.0):
+        """
+        Initialize the checksummer
+        
+        Each chunk is checksummed with COUNT(*) and BIT_XOR(CRC32(...)) over
+        its rows on both servers at the same time; chunk boundaries are taken
+        from the source. Chunks that differ are checked again after a delay
+        to filter out rows that were in flight on a live source.
+        
+        Args:
+            source: Client of the source server
+            target: Client of the target server
+            database: Source database name
+            tables: Optional subset of tables (default: all base tables)
+            target_database: Target database name (default: same as source)
+            workers: Number of tables checksummed in parallel
+            chunk_seconds: Target time per chunk used for adaptive sizing
+            initial_chunk_size: Rows in the first chunk of each table
+            max_chunk_size: Largest chunk size
+            retries: Number of re-checks of a mismatching chunk
+            retry_delay: Seconds before each re-check
+        """
+        self.source = source
+        self.target = target
+        self.database = database
+        self.tables = tables
+        self.target_database = target_database or database
+        self.workers = max(1, workers)
+        self.chunk_seconds = chunk_seconds
+        self.initial_chunk_size = initial_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._progress = {'rows': 0, 'chunks': 0}
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Checksum every table
+        
+        Returns:
+            Dict: Per-table results with their mismatching chunk ranges,
+                  the total 'mismatches' count and throughput
+        """
+        started = time.monotonic()
+        tables = self.source.execute_query("""
+            SELECT TABLE_NAME, COALESCE(DATA_LENGTH, 0) AS size FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY size DESC
+        """, (self.database,))
+        queue = Queue()
+        for row in tables:
+            if self.tables is None or row['TABLE_NAME'] in self.tables:
+                queue.put(row['TABLE_NAME'])
+        
+        results = {}
+        # Target checksums run on this pool while the worker runs the source side
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='checksum-target') as target_pool:
+            threads = [
+                threading.Thread(target=self._worker, args=(queue, results, target_pool), name=f'checksum-worker-{i}')
+                for i in range(self.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        elapsed = time.monotonic() - started
+        report = {
+            'database': self.database,
+            'target_database': self.target_database,
+            'tables': dict(sorted(results.items())),
+            'mismatches': sum(len(result.get('mismatches', [])) for result in results.values()),
+            'errors': sum(1 for result in results.values() if result.get('error')),
+            'seconds': round(elapsed, 3),
+            'rows': self._progress['rows'],
+            'chunks': self._progress['chunks'],
+            'rows_per_sec': round(self._progress['rows'] / elapsed, 1) if elapsed else 0.0
+        }
+        logger.info(f"Checksummed '{self.database}': {report['rows']} rows in {report['chunks']} chunks, "
+                    f"{report['mismatches']} mismatching chunk(s), {report['rows_per_sec']} rows/s")
+        return report
+    
+    def _worker(self, queue: 'Queue', results: Dict[str, Any], target_pool: ThreadPoolExecutor) -> None:
+        """Checksum tables from the queue on one connection per server"""
+        src_conn = dst_conn = None
+        try:
+            # Autocommit so every chunk query reads a fresh snapshot on both servers
+            src_conn = self.source.new_connection(self.database, cursorclass=pymysql.cursors.Cursor,
+                                                 autocommit=True)
+            dst_conn = self.target.new_connection(self.target_database, cursorclass=pymysql.cursors.Cursor,
+                                                 autocommit=True)
+            while True:
+                try:
+                    table = queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    result = self._checksum_table(src_conn, dst_conn, table, target_pool)
+                except pymysql.Error as e:
+                    logger.error(f"Failed to checksum '{self.database}.{table}': {e}")
+                    result = {'error': str(e)}
+                with self._lock:
+                    results[table] = result
+        except pymysql.Error as e:
+            logger.error(f"Checksum worker failed to connect: {e}")
+        finally:
+            for conn in (src_conn, dst_conn):
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except pymysql.Error:
+                        pass
+    
+    @staticmethod
+    def _column_names(conn, query: str, database: str, table: str) -> List[str]:
+        """Run a column name lookup on a worker's own connection"""
+        with conn.cursor() as cursor:
+            cursor.execute(query, (database, table))
+            return [row[0] for row in cursor.fetchall()]
+    
+    def _columns(self, conn, database: str, table: str) -> List[str]:
+        """Return a table's columns in definition order"""
+        return self._column_names(conn, """
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION
+        """, database, table)
+    
+    @staticmethod
+    def _checksum_sql(database: str, table: str, columns: List[str], condition: str) -> str:
+        """Build the COUNT/BIT_XOR(CRC32) query of one chunk"""
+        quoted = [f"`{column}`" for column in columns]
+        # CONCAT_WS skips NULLs, so a NULL bitmap keeps NULL and '' apart
+        nulls = ', '.join(f"ISNULL({column})" for column in quoted)
+        row = f"CONCAT_WS('#', {', '.join(quoted)}, CONCAT({nulls}))"
+        return f"""
+            SELECT COUNT(*), COALESCE(BIT_XOR(CRC32({row})), 0)
+            FROM `{database}`.`{table}` FORCE INDEX (PRIMARY)
+            WHERE {condition}
+        """
+    
+    @staticmethod
+    def _execute(conn, query: str, params: list) -> Tuple[int, int]:
+        """Run a chunk checksum query and return (row count, checksum)"""
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            count, crc = cursor.fetchone()
+        return int(count), int(crc)
+    
+    def _checksum_table(self, src_conn, dst_conn, table: str, target_pool: ThreadPoolExecutor) -> Dict[str, Any]:
+        """Walk one table chunk by chunk and compare both sides"""
+        # Lookups use the worker's connections; the clients' shared connection is not thread-safe
+        columns = self._columns(src_conn, self.database, table)
+        if columns != self._columns(dst_conn, self.target_database, table):
+            return {'error': 'Column lists differ (or table is missing on target)', 'mismatches': []}
+        pk = self._column_names(src_conn, PRIMARY_KEY_SQL, self.database, table)
+        
+        result = {'rows': 0, 'chunks': 0, 'mismatches': [], 'chunked': bool(pk)}
+        sizer = ChunkSizer(self.chunk_seconds, self.initial_chunk_size, maximum=self.max_chunk_size)
+        started = time.monotonic()
+        lower = None
+        while True:
+            upper = next_chunk_boundary(src_conn, self.database, table, pk, lower, sizer.size) if pk else None
+            condition, params = pk_range_condition(pk, lower, upper) if pk else ('1=1', [])
+            src_sql = self._checksum_sql(self.database, table, columns, condition)
+            dst_sql = self._checksum_sql(self.target_database, table, columns, condition)
+            if not pk:
+                src_sql = src_sql.replace(" FORCE INDEX (PRIMARY)", "")
+                dst_sql = dst_sql.replace(" FORCE INDEX (PRIMARY)", "")
+            
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.retry_delay)
+                chunk_started = time.monotonic()
+                future = target_pool.submit(self._execute, dst_conn, dst_sql, params)
+                src = self._execute(src_conn, src_sql, params)
+                dst = future.result()
+                if src == dst:
+                    break
+            if attempt == 0:
+                sizer.update(src[0], time.monotonic() - chunk_started)
+            
+            if src != dst:
+                result['mismatches'].append({
+                    'lower': list(lower) if lower else None,
+                    'upper': list(upper) if upper else None,
+                    'source_rows': src[0],
+                    'target_rows': dst[0],
+                    'source_crc': src[1],
+                    'target_crc': dst[1]
+                })
+                logger.warning(f"Checksum mismatch in '{self.database}.{table}' range "
+                               f"({lower}, {upper}]: {src[0]} vs {dst[0]} rows")
+            result['rows'] += src[0]
+            result['chunks'] += 1
+            with self._lock:
+                self._progress['rows'] += src[0]
+                self._progress['chunks'] += 1
+            if upper is None:
+                break
+            lower = upper
+        
+        result['seconds'] = round(time.monotonic() - started, 3)
+        result['primary_key'] = pk
+        return result
+
+
+class LoadThrottle:
+    """Shared load check that pauses background jobs while the server is busy"""
+    
+    IO_PENDING_COUNTERS = ('Innodb_data_pending_reads', 'Innodb_data_pending_writes',
+                           'Innodb_data_pending_fsyncs', 'Innodb_os_log_pending_writes')
+    
+    def __init__(self, client: 'MySQLClient', max_threads_running: int = 32, replicas: List[Any] = None,
+                 max_replica_lag: float = 10.0, max_io_pending: int = 64, check_interval: float = 1.0,
+                 max_pause: float = None):
+        """
+        Initialize the throttle
+        
+        One throttle can be shared by any number of workers; the server is
+        checked at most once per check_interval.
+        
+        Args:
+            client: Client of the server doing the work
+            max_threads_running: Pause while Threads_running exceeds this
+            replicas: Replica clients (SHOW SLAVE STATUS lag) or HeartbeatMonitor
+                      instances (heartbeat lag) to watch
+            max_replica_lag: Pause while any replica lags more than this many seconds
+            max_io_pending: Pause while pending InnoDB reads, writes and fsyncs exceed this
+            check_interval: Seconds a check result is reused
+            max_pause: Give up waiting after this many seconds (default: wait forever)
+        """
+        self.client = client
+        self.max_threads_running = max_threads_running
+        self.replicas = replicas or []
+        self.max_replica_lag = max_replica_lag
+        self.max_io_pending = max_io_pending
+        self.check_interval = check_interval
+        self.max_pause = max_pause
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._reason = None
+        self.paused_seconds = 0.0
+    
+    def check(self) -> Optional[str]:
+        """
+        Check the load, reusing a recent result
+        
+        Returns:
+            str: Why work should pause, or None if it may continue
+        """
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._reason = self._evaluate()
+                self._checked_at = time.monotonic()
+            return self._reason
+    
+    def _evaluate(self) -> Optional[str]:
+        """Query the server and replicas for the current load"""
+        names = ('Threads_running',) + self.IO_PENDING_COUNTERS
+        rows = self.client.execute_query(
+            f"SHOW GLOBAL STATUS WHERE Variable_name IN ({', '.join(['%s'] * len(names))})", names)
+        status = {row['Variable_name']: _to_number(row['Value']) for row in rows}
+        if status.get('Threads_running', 0) > self.max_threads_running:
+            return f"Threads_running {int(status['Threads_running'])} > {self.max_threads_running}"
+        io_pending = sum(status.get(name, 0) for name in self.IO_PENDING_COUNTERS)
+        if io_pending > self.max_io_pending:
+            return f"{int(io_pending)} pending InnoDB IO requests > {self.max_io_pending}"
+        
+        for replica in self.replicas:
+            if hasattr(replica, 'latest'):
+                lag_ms = replica.latest(max_age=2 * replica.interval)
+                lag = lag_ms / 1000 if lag_ms is not None else None
+                name = replica.client.host
+            else:
+                lag = replica.get_replication_status().get('Seconds_Behind_Master')
+                name = replica.host
+            if lag is None:
+                return f"Replica {name} lag unknown"
+            if float(lag) > self.max_replica_lag:
+                return f"Replica {name} lag {float(lag):.1f}s > {self.max_replica_lag}s"
+        return None
+    
+    def wait(self, stop: threading.Event = None) -> float:
+        """
+        Block until the load allows work to continue
+        
+        Args:
+            stop: Optional event that ends the wait early
+            
+        Returns:
+            float: Seconds spent paused
+            
+        Raises:
+            TimeoutError: If the load stayed too high for max_pause seconds
+        """
+        started = time.monotonic()
+        reason = self.check()
+        if reason is None:
+            return 0.0
+        logger.info(f"Throttling: {reason}")
+        while reason is not None:
+            if stop is not None and stop.is_set():
+                break
+            if self.max_pause is not None and time.monotonic() - started > self.max_pause:
+                raise TimeoutError(f"Load stayed too high for {self.max_pause}s: {reason}")
+            time.sleep(self.check_interval)
+            reason = self.check()
+        paused = time.monotonic() - started
+        with self._lock:
+            self.paused_seconds += paused
+        logger.info(f"Resuming after {paused:.1f}s pause")
+        return paused
+
+
+class MaintenanceRunner:
+    """Run OPTIMIZE or ANALYZE TABLE over many tables with bounded concurrency and load throttling"""
+    
+    OPERATIONS = ('optimize', 'analyze')
+    
+    def __init__(self, client: 'MySQLClient', tables: List[Any], operation: str = 'optimize',
+                 order_by: str = 'fragmentation', concurrency: int = 2, throttle: LoadThrottle = None,
+                 checkpoint_path: str = None, no_write_to_binlog: bool = False, min_free_mb: float = 0):
+        """
+        Initialize the maintenance runner
+        
+        Statements run on the client's connection pool (one is enabled if
+        the client has none), so the pool's read_timeout must allow for the
+        longest table.
+        
+        Args:
+            client: Client of the server
+            tables: 'database.table' names or rows from get_table_size
+            operation: 'optimize' or 'analyze'
+            order_by: 'fragmentation' (free space share), 'free' (free bytes)
+                      or 'size', largest first
+            concurrency: Number of tables processed at the same time
+            throttle: Load throttle checked before each table (default: thresholds of LoadThrottle)
+            checkpoint_path: JSON file recording finished tables, so a rerun skips them
+            no_write_to_binlog: Do not replicate the statements
+            min_free_mb: Skip tables with less free space than this (optimize only)
+        """
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}', expected one of {', '.join(self.OPERATIONS)}")
+        self.client = client
+        self.tables = [
+            (table['database'], table['table']) if isinstance(table, dict) else tuple(table.split('.', 1))
+            for table in tables
+        ]
+        self.operation = operation
+        self.order_by = order_by
+        self.concurrency = max(1, concurrency)
+        self.throttle = throttle or LoadThrottle(client)
+        self.checkpoint_path = checkpoint_path
+        self.no_write_to_binlog = no_write_to_binlog
+        self.min_free_mb = min_free_mb
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checkpoint = self._load_checkpoint()
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Read the checkpoint of an earlier run of the same operation"""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('operation') == self.operation:
+                return checkpoint
+        return {'operation': self.operation, 'completed': {}, 'failed': {}}
+    
+    def _save_checkpoint(self) -> None:
+        """Atomically write the checkpoint; the caller must hold the lock"""
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def plan(self) -> List[Dict[str, Any]]:
+        """
+        Order the pending tables by size or fragmentation
+        
+        Returns:
+            List[Dict]: Tables with data, index and free bytes and fragmentation, in run order
+        """
+        pending = [table for table in self.tables if '.'.join(table) not in self._checkpoint['completed']]
+        if not pending:
+            return []
+        rows = []
+        # Batch the lookups so a long table list does not become one huge IN list
+        for i in range(0, len(pending), 500):
+            batch = pending[i:i + 500]
+            rows.extend(self.client.execute_query(f"""
+                SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, COALESCE(DATA_LENGTH, 0) AS data_bytes,
+                       COALESCE(INDEX_LENGTH, 0) AS index_bytes, COALESCE(DATA_FREE, 0) AS free_bytes
+                FROM information_schema.TABLES
+                WHERE TABLE_TYPE = 'BASE TABLE' AND (TABLE_SCHEMA, TABLE_NAME) IN ({', '.join(['(%s, %s)'] * len(batch))})
+            """, tuple(value for table in batch for value in table)))
+        
+        plan = []
+        for row in rows:
+            size = int(row['data_bytes']) + int(row['index_bytes'])
+            free = int(row['free_bytes'])
+            if self.operation == 'optimize' and free < self.min_free_mb * 1024 * 1024:
+                continue
+            plan.append({'table': f"{row['db']}.{row['tbl']}", 'size_bytes': size, 'free_bytes': free,
+                         'fragmentation': round(free / (size + free), 4) if size + free else 0.0})
+        key = {'size': 'size_bytes', 'free': 'free_bytes'}.get(self.order_by, 'fragmentation')
+        return sorted(plan, key=lambda entry: entry[key], reverse=True)
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Process all pending tables
+        
+        Returns:
+            Dict: Per-table results of this run, counts and time spent paused
+        """
+        if self.client.pool is None:
+            # One spare connection keeps the throttle's load checks from queuing behind the workers
+            logger.info(f"Enabling a connection pool of {self.concurrency + 1} for table maintenance")
+            self.client.enable_pool(min_size=1, max_size=self.concurrency + 1)
+        plan = self.plan()
+        queue = Queue()
+        for entry in plan:
+            queue.put(entry)
+        
+        started = time.monotonic()
+        results = {}
+        threads = [
+            threading.Thread(target=self._worker, args=(queue, results), name=f'maintenance-{i}')
+            for i in range(min(self.concurrency, len(plan)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        summary = {
+            'operation': self.operation,
+            'tables': results,
+            'completed': sum(1 for result in results.values() if result['status'] == 'ok'),
+            'failed': sum(1 for result in results.values() if result['status'] == 'error'),
+            'skipped': len(self.tables) - len(plan),
+            'seconds': round(time.monotonic() - started, 3),
+            'paused_seconds': round(self.throttle.paused_seconds, 3)
+        }
+        logger.info(f"{self.operation.upper()} finished: {summary['completed']} ok, {summary['failed']} failed, "
+                    f"{summary['skipped']} skipped in {summary['seconds']}s")
+        return summary
+    
+    def stop(self) -> None:
+        """Stop after the tables currently being processed"""
+        self._stop.set()
+    
+    def _worker(self, queue: 'Queue', results: Dict[str, Any]) -> None:
+        """Process tables from the queue, waiting on the throttle before each one"""
+        while not self._stop.is_set():
+            try:
+                entry = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                self.throttle.wait(self._stop)
+            except TimeoutError as e:
+                logger.error(f"Stopping table maintenance: {e}")
+                self._stop.set()
+                return
+            if self._stop.is_set():
+                return
+            result = self._run_table(entry['table'])
+            with self._lock:
+                results[entry['table']] = result
+                bucket = 'completed' if result['status'] == 'ok' else 'failed'
+                self._checkpoint[bucket][entry['table']] = result
+                if bucket == 'completed':
+                    self._checkpoint['failed'].pop(entry['table'], None)
+                self._save_checkpoint()
+    
+    def _run_table(self, table: str) -> Dict[str, Any]:
+        """Run the statement on one table and read its result rows"""
+        database, name = table.split('.', 1)
+        local = " NO_WRITE_TO_BINLOG" if self.no_write_to_binlog else ""
+        started = time.monotonic()
+        try:
+            with self.client.connection() as conn:
+                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                    cursor.execute(f"{self.operation.upper()}{local} TABLE `{database}`.`{name}`")
+                    messages = cursor.fetchall()
+        except pymysql.Error as e:
+            logger.error(f"Failed to {self.operation} table '{table}': {e}")
+            return {'status': 'error', 'messages': [str(e)], 'seconds': round(time.monotonic() - started, 3)}
+        
+        # The statement reports problems as result rows rather than raising
+        errors = [row['Msg_text'] for row in messages if row['Msg_type'] == 'error']
+        result = {
+            'status': 'error' if errors else 'ok',
+            'messages': [f"{row['Msg_type']}: {row['Msg_text']}" for row in messages],
+            'seconds': round(time.monotonic() - started, 3),
+            'finished_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if errors:
+            logger.error(f"Failed to {self.operation} table '{table}': {'; '.join(errors)}")
+        else:
+            logger.info(f"Table '{table}' {self.operation}d in {result['seconds']}s")
+        return result
+
+
+class ChunkedDML:
+    """Apply an UPDATE or DELETE in primary key chunks with auto-tuned size, throttling and checkpoints"""
+    
+    RETRYABLE_ERRORS = (1205, 1213)  # lock wait timeout, deadlock
+    
+    def __init__(self, client: 'MySQLClient', database: str, table: str, template: str,
+                 params: tuple = None, chunk_seconds: float = 0.5, initial_chunk_size: int = 1000,
+                 max_chunk_size: int = 100000, throttle: LoadThrottle = None, sleep_ratio: float = 0.0,
+                 checkpoint_path: str = None, max_retries: int = 3):
+        """
+        Initialize the chunked DML job
+        
+        The template is a statement with a '{chunk}' placeholder that is
+        replaced by the chunk's primary key range condition and an optional
+        '{table}' placeholder for the quoted table name, e.g.
+        "DELETE FROM {table} WHERE {chunk} AND created_at < %s". The statement
+        is always formatted with parameters, so a literal '%' must be written
+        as '%%' (e.g. "LIKE 'tmp%%'").
+        
+        The checkpoint is written after each chunk commits, so a crash between
+        the two re-applies the last chunk on resume. Use templates that are
+        safe to repeat (e.g. "SET status = 'archived'", not "SET n = n + 1")
+        when resuming from a checkpoint.
+        
+        Args:
+            client: Client of the server
+            database: Database name
+            table: Table name (must have a primary key)
+            template: DML statement template
+            params: Parameters of the template's own placeholders
+            chunk_seconds: Target time per chunk (statement plus commit)
+            initial_chunk_size: Primary key rows in the first chunk
+            max_chunk_size: Largest chunk size
+            throttle: Load throttle checked before each chunk (default: thresholds of LoadThrottle)
+            sleep_ratio: Extra sleep after each chunk as a fraction of its time, giving replicas headroom
+            checkpoint_path: JSON file recording the last committed key, so a rerun resumes after it
+            max_retries: Retries of a chunk after a deadlock or lock wait timeout
+        """
+        if '{chunk}' not in template:
+            raise ValueError("The DML template needs a '{chunk}' placeholder")
+        self.client = client
+        self.database = database
+        self.table = table
+        self.template = template
+        self.params = tuple(params or ())
+        self.sizer = ChunkSizer(chunk_seconds, initial_chunk_size, maximum=max_chunk_size)
+        self.throttle = throttle or LoadThrottle(client)
+        self.sleep_ratio = sleep_ratio
+        self.checkpoint_path = checkpoint_path
+        self.max_retries = max_retries
+        self._stop = threading.Event()
+        self._template_digest = hashlib.sha1(f"{database}.{table}|{template}|{self.params!r}".encode()).hexdigest()
+    
+    def stop(self) -> None:
+        """Stop after the current chunk has been committed"""
+        self._stop.set()
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Read the checkpoint of an earlier run of the same statement"""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('digest') == self._template_digest:
+                return checkpoint
+            logger.warning(f"Ignoring checkpoint '{self.checkpoint_path}' of a different statement")
+        return {'digest': self._template_digest, 'lower': None, 'rows': 0, 'chunks': 0, 'done': False}
+    
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Atomically write the checkpoint"""
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2, default=str)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Walk the table and apply the statement chunk by chunk
+        
+        Returns:
+            Dict: Rows affected, chunks, time, rows/s, time paused and whether the table was completed
+            
+        Raises:
+            ValueError: If the table has no primary key
+            pymysql.Error: If a chunk failed for a non-retryable reason (committed
+                           chunks stay applied and are in the checkpoint)
+        """
+        columns = primary_key_columns(self.client, self.database, self.table)
+        if not columns:
+            raise ValueError(f"Table '{self.database}.{self.table}' has no primary key")
+        checkpoint = self._load_checkpoint()
+        if checkpoint['done']:
+            logger.info(f"'{self.database}.{self.table}' was already completed according to the checkpoint")
+            return {'rows': checkpoint['rows'], 'chunks': checkpoint['chunks'], 'completed': True,
+                    'seconds': 0.0, 'rows_per_sec': 0.0, 'paused_seconds': 0.0}
+        
+        statement = self.template.replace('{table}', f"`{self.database}`.`{self.table}`")
+        prefix_params = self.template.split('{chunk}', 1)[0].count('%s')
+        lower = tuple(checkpoint['lower']) if checkpoint['lower'] is not None else None
+        rows = chunks = 0
+        paused = 0.0
+        started = time.monotonic()
+        last_report = started
+        
+        conn = self.client.new_connection(self.database, autocommit=False)
+        try:
+            while not self._stop.is_set():
+                paused += self.throttle.wait(self._stop)
+                if self._stop.is_set():
+                    break
+                
+                for attempt in range(self.max_retries + 1):
+                    chunk_started = time.monotonic()
+                    try:
+                        upper = next_chunk_boundary(conn, self.database, self.table, columns, lower, self.sizer.size)
+                        condition, range_params = pk_range_condition(columns, lower, upper)
+                        with conn.cursor() as cursor:
+                            affected = cursor.execute(
+                                statement.replace('{chunk}', condition),
+                                self.params[:prefix_params] + tuple(range_params) + self.params[prefix_params:])
+                        conn.commit()
+                        break
+                    except pymysql.err.OperationalError as e:
+                        self.client._rollback(conn)
+                        if e.args[0] not in self.RETRYABLE_ERRORS or attempt == self.max_retries:
+                            raise
+                        # Smaller chunks hold fewer locks
+                        self.sizer.size = max(self.sizer.minimum, self.sizer.size // 2)
+                        logger.warning(f"Chunk after {lower} hit '{e}', retrying with {self.sizer.size} rows")
+                    except pymysql.Error:
+                        self.client._rollback(conn)
+                        raise
+                
+                elapsed = time.monotonic() - chunk_started
+                scanned = self.sizer.size
+                self.sizer.update(scanned, elapsed)
+                rows += affected
+                chunks += 1
+                checkpoint.update(lower=list(upper) if upper is not None else checkpoint['lower'],
+                                  rows=checkpoint['rows'] + affected, chunks=checkpoint['chunks'] + 1,
+                                  done=upper is None)
+                self._save_checkpoint(checkpoint)
+                
+                if time.monotonic() - last_report >= 10:
+                    last_report = time.monotonic()
+                    logger.info(f"'{self.database}.{self.table}': {rows} rows in {chunks} chunks, "
+                                f"{rows / (last_report - started):.0f} rows/s, chunk size {self.sizer.size}")
+                if upper is None:
+                    break
+                lower = upper
+                if self.sleep_ratio:
+                    self._stop.wait(elapsed * self.sleep_ratio)
+        finally:
+            conn.close()
+        
+        total = time.monotonic() - started
+        result = {
+            'rows': rows,
+            'chunks': chunks,
+            'completed': checkpoint['done'],
+            'seconds': round(total, 3),
+            'rows_per_sec': round(rows / total, 1) if total else 0.0,
+            'paused_seconds': round(paused, 3),
+            'chunk_size': self.sizer.size
+        }
+        logger.info(f"Chunked DML on '{self.database}.{self.table}' "
+                    f"{'finished' if result['completed'] else 'stopped'}: {rows} rows in {chunks} chunks, "
+                    f"{result['rows_per_sec']} rows/s")
+        return result
+
+
+class QueryKiller:
+    """Kill processlist entries matching declarative policies, concurrently and with an audit log"""
+    
+    POLICY_KEYS = ('name', 'user', 'host', 'db', 'command', 'state', 'min_time', 'digest', 'info_regex',
+                   'exclude_users', 'action', 'max_kills')
+    # Never touched regardless of policy
+    PROTECTED_USERS = ('system user', 'event_scheduler')
+    PROTECTED_COMMANDS = ('Binlog Dump', 'Binlog Dump GTID', 'Daemon')
+    
+    def __init__(self, client: 'MySQLClient', policies: List[Dict[str, Any]], dry_run: bool = True,
+                 concurrency: int = 8, audit_log: str = None, server: str = None):
+        """
+        Initialize the query killer
+        
+        A policy is a dict whose conditions must all match: 'user', 'host',
+        'db', 'command' and 'state' (a value or a list of values), 'min_time'
+        (seconds), 'digest' (statement digest hash or list), 'info_regex'
+        (searched in the statement text) and 'exclude_users'. 'action' is
+        'query' (KILL QUERY, the default) or 'connection' (KILL), 'max_kills'
+        caps the matches per run and 'name' labels the audit entries.
+        
+        Args:
+            client: Client of the server
+            policies: Kill policies, evaluated in order (first match wins)
+            dry_run: Only report and audit what would be killed
+            concurrency: Number of KILL statements issued at the same time
+            audit_log: JSON Lines file every decision is appended to
+            server: Name recorded in the audit log (default: host:port)
+        """
+        self.client = client
+        self.policies = [self._compile(policy, i) for i, policy in enumerate(policies)]
+        self.dry_run = dry_run
+        self.concurrency = max(1, concurrency)
+        self.audit_log = audit_log
+        self.server = server or f"{client.host}:{client.port}"
+        self._lock = threading.Lock()
+    
+    def _compile(self, policy: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Validate a policy and normalize its values to sets and compiled patterns"""
+        unknown = set(policy) - set(self.POLICY_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown policy key(s): {', '.join(sorted(unknown))}")
+        if policy.get('action', 'query') not in ('query', 'connection'):
+            raise ValueError(f"Invalid action '{policy['action']}', expected 'query' or 'connection'")
+        compiled = {'name': policy.get('name', f"policy-{index}"), 'action': policy.get('action', 'query'),
+                    'min_time': policy.get('min_time'), 'max_kills': policy.get('max_kills')}
+        for key in ('user', 'host', 'db', 'command', 'state', 'digest', 'exclude_users'):
+            if policy.get(key) is not None:
+                value = policy[key]
+                compiled[key] = {value} if isinstance(value, str) else set(value)
+        if policy.get('info_regex'):
+            compiled['info_regex'] = re.compile(policy['info_regex'], re.IGNORECASE | re.DOTALL)
+        return compiled
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Read the processlist once with statement digests
+        
+        Returns:
+            List[Dict]: Foreground threads other than this client's own connection
+            
+        Raises:
+            pymysql.Error: If the processlist could not be read
+        """
+        return self.client._execute_query("""
+            SELECT t.PROCESSLIST_ID AS id, t.PROCESSLIST_USER AS user, t.PROCESSLIST_HOST AS host,
+                   t.PROCESSLIST_DB AS db, t.PROCESSLIST_COMMAND AS command, t.PROCESSLIST_STATE AS state,
+                   t.PROCESSLIST_TIME AS time, t.PROCESSLIST_INFO AS info, s.DIGEST AS digest
+            FROM performance_schema.threads t
+            -- Only the top-level statement; stored programs and prepared statements add nested rows
+            LEFT JOIN performance_schema.events_statements_current s
+              ON s.THREAD_ID = t.THREAD_ID AND COALESCE(s.NESTING_EVENT_TYPE, '') <> 'STATEMENT'
+            WHERE t.TYPE = 'FOREGROUND' AND t.PROCESSLIST_ID <> CONNECTION_ID()
+        """)
+    
+    @staticmethod
+    def _matches(policy: Dict[str, Any], process: Dict[str, Any]) -> bool:
+        """Check whether a process satisfies every condition of a policy"""
+        for key in ('user', 'db', 'command', 'state', 'digest'):
+            if key in policy and process.get(key) not in policy[key]:
+                return False
+        if 'host' in policy and (process.get('host') or '').split(':', 1)[0] not in policy['host']:
+            return False
+        if 'exclude_users' in policy and process.get('user') in policy['exclude_users']:
+            return False
+        if policy['min_time'] is not None and (process.get('time') or 0) < policy['min_time']:
+            return False
+        if 'info_regex' in policy and not policy['info_regex'].search(process.get('info') or ''):
+            return False
+        return True
+    
+    def evaluate(self, processes: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Match a processlist snapshot against the policies
+        
+        Args:
+            processes: Snapshot to evaluate (default: a fresh snapshot)
+            
+        Returns:
+            List[Dict]: Matching processes with their 'policy' and 'action'
+            
+        Raises:
+            pymysql.Error: If a fresh snapshot could not be read
+        """
+        processes = self.snapshot() if processes is None else processes
+        counts = {}
+        matches = []
+        seen = set()
+        for process in processes:
+            # A thread is matched (and killed) at most once per snapshot
+            if process.get('id') in seen:
+                continue
+            seen.add(process.get('id'))
+            if process.get('user') in self.PROTECTED_USERS or process.get('command') in self.PROTECTED_COMMANDS:
+                continue
+            for policy in self.policies:
+                if not self._matches(policy, process):
+                    continue
+                if policy['max_kills'] is not None and counts.get(policy['name'], 0) >= policy['max_kills']:
+                    break
+                counts[policy['name']] = counts.get(policy['name'], 0) + 1
+                matches.append(dict(process, policy=policy['name'], action=policy['action']))
+                break
+        return matches
+    
+    def run(self, dry_run: bool = None) -> Dict[str, Any]:
+        """
+        Take one snapshot, kill every match concurrently and audit the outcome
+        
+        Args:
+            dry_run: Override the instance's dry_run setting
+            
+        Returns:
+            Dict: Counts of matched, killed, gone and failed processes and the audit entries
+            
+        Raises:
+            pymysql.Error: If the processlist could not be read, so that a
+                           failed snapshot is never reported as "0 matched"
+        """
+        dry_run = self.dry_run if dry_run is None else dry_run
+        started = time.monotonic()
+        matches = self.evaluate()
+        if matches and not dry_run and self.client.pool is None:
+            # KILLs run concurrently, so they need more than the client's single connection
+            self.client.enable_pool(min_size=1, max_size=self.concurrency)
+        
+        if dry_run or not matches:
+            entries = [self._audit(match, 'dry-run') for match in matches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='query-killer') as executor:
+                entries = list(executor.map(self._kill, matches))
+        
+        summary = {
+            'dry_run': dry_run,
+            'matched': len(matches),
+            'killed': sum(1 for entry in entries if entry['result'] == 'killed'),
+            'gone': sum(1 for entry in entries if entry['result'] == 'gone'),
+            'failed': sum(1 for entry in entries if entry['result'].startswith('failed')),
+            'seconds': round(time.monotonic() - started, 3),
+            'entries': entries
+        }
+        logger.info(f"Query killer on {self.server}: {summary['matched']} matched"
+                    + (" (dry run)" if dry_run else f", {summary['killed']} killed, {summary['failed']} failed"))
+        return summary
+    
+    def _kill(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        """Kill one process and audit the result"""
+        statement = f"KILL {'QUERY ' if match['action'] == 'query' else ''}{int(match['id'])}"
+        try:
+            self.client._execute_write(statement)
+            result = 'killed'
+        except pymysql.Error as e:
+            # ER_NO_SUCH_THREAD: it finished between the snapshot and the kill
+            result = 'gone' if e.args and e.args[0] == 1094 else f"failed: {e}"
+        return self._audit(match, result)
+    
+    def _audit(self, match: Dict[str, Any], result: str) -> Dict[str, Any]:
+        """Record a decision in the audit log"""
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'server': self.server,
+            'policy': match['policy'],
+            'action': match['action'],
+            'id': match['id'],
+            'user': match.get('user'),
+            'host': match.get('host'),
+            'db': match.get('db'),
+            'command': match.get('command'),
+            'time': match.get('time'),
+            'digest': match.get('digest'),
+            'info': (match.get('info') or '')[:1024],
+            'result': result
+        }
+        if self.audit_log:
+            with self._lock, open(self.audit_log, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+        return entry
+
+
+# Queried one by one, so a missing privilege on one source (INNODB_METRICS
+# needs PROCESS) only drops that source's metrics
+EXPORTER_SOURCES = {
+    'status': "SELECT VARIABLE_NAME AS name, VARIABLE_VALUE AS value FROM performance_schema.global_status",
+    'variable': "SELECT VARIABLE_NAME AS name, VARIABLE_VALUE AS value FROM performance_schema.global_variables",
+    'innodb': """
+        SELECT NAME AS name, COUNT AS value
+        FROM information_schema.INNODB_METRICS
+        WHERE STATUS = 'enabled'
+    """,
+    'replication': """
+        SELECT CHANNEL_NAME AS name, SERVICE_STATE AS value
+        FROM performance_schema.replication_connection_status
+    """
+}
+
+_BOOLEAN_VALUES = {'ON': 1.0, 'YES': 1.0, 'OFF': 0.0, 'NO': 0.0}
+
+
+def _metric_value(value: Any) -> Optional[float]:
+    """Convert a status or variable value to a float, None if it is not numeric"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if text.upper() in _BOOLEAN_VALUES:
+        return _BOOLEAN_VALUES[text.upper()]
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _metric_name(*parts: str) -> str:
+    """Build a Prometheus metric name from parts"""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', '_'.join(parts)).lower()
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Check whether an error means the server could not be reached or logged into"""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True
+    code = error.args[0] if error.args and isinstance(error.args[0], int) else None
+    # 2000-2999 are client-side (CR_*) errors such as lost connections; 1045 is a failed login
+    return code is not None and (code >= 2000 or code == 1045)
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusExporter:
+    """Collect metrics from many MySQL servers on a schedule and serve them in Prometheus text format"""
+    
+    def __init__(self, targets: List[Dict[str, Any]], defaults: Dict[str, Any] = None,
+                 interval: float = 15.0, max_workers: int = 16, collect_timeout: int = 10):
+        """
+        Initialize the exporter
+        
+        Scrapes only read the text rendered after the last collection round,
+        so the number of scrapers never changes the load on the servers. A
+        target whose previous collection is still running is skipped.
+        
+        Args:
+            targets: Servers to collect from; each entry holds MySQLClient
+                     arguments (host, port, user, password, ...) and an optional 'name'
+            defaults: MySQLClient arguments applied to every target
+            interval: Seconds between collection rounds
+            max_workers: Maximum number of targets collected at the same time
+            collect_timeout: Socket timeout in seconds for a target's queries
+        """
+        self.interval = interval
+        self.collect_timeout = collect_timeout
+        self._targets = {}
+        for entry in targets:
+            params = dict(defaults or {})
+            params.update({k: v for k, v in entry.items() if k != 'name'})
+            params.setdefault('connect_timeout', collect_timeout)
+            params.setdefault('read_timeout', collect_timeout)
+            client = MySQLClient(**params)
+            # One pooled connection per target is kept open between rounds
+            client.enable_pool(min_size=1, max_size=1)
+            name = entry.get('name') or f"{client.host}:{client.port}"
+            self._targets[name] = {'client': client, 'samples': [], 'future': None, 'errors': 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='exporter')
+        self._lock = threading.Lock()
+        self._rendered = b''
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+    
+    def collect(self, name: str) -> List[Tuple[str, str, Dict[str, str], float]]:
+        """
+        Collect the samples of one target
+        
+        Args:
+            name: Target name
+            
+        Returns:
+            List[Tuple]: (metric name, type, labels, value) samples
+        """
+        target = self._targets[name]
+        client = target['client']
+        started = time.monotonic()
+        up = True
+        errors = 0
+        replica = False
+        samples = []
+        for source, query in EXPORTER_SOURCES.items():
+            try:
+                rows = client._execute_query(query)
+            except pymysql.Error as e:
+                errors += 1
+                if _is_connection_error(e):
+                    logger.warning(f"Cannot reach {name}: {e}")
+                    up = False
+                    break
+                logger.warning(f"Failed to collect {source} metrics of {name}: {e}")
+                continue
+            for row in rows:
+                key = row['name']
+                if source == 'replication':
+                    replica = True
+                    continue
+                if source == 'variable' and key.lower() == 'version':
+                    samples.append(('mysql_version_info', 'gauge', {'version': row['value']}, 1.0))
+                    continue
+                value = _metric_value(row['value'])
+                if value is None:
+                    continue
+                if source == 'status':
+                    samples.append((_metric_name('mysql_global_status', key), 'untyped', {}, value))
+                elif source == 'variable':
+                    samples.append((_metric_name('mysql_global_variables', key), 'gauge', {}, value))
+                else:
+                    samples.append(('mysql_innodb_metrics', 'untyped', {'name': key.lower()}, value))
+        if not up:
+            samples = []
+        samples.insert(0, ('mysql_up', 'gauge', {}, 1.0 if up else 0.0))
+        
+        if up and replica:
+            status = client.get_replication_status()
+            if status:
+                labels = {'channel': status.get('Channel_Name', ''), 'master_host': status.get('Master_Host', '')}
+                lag = _metric_value(status.get('Seconds_Behind_Master'))
+                samples.extend([
+                    ('mysql_slave_status_slave_io_running', 'gauge', labels,
+                     1.0 if status.get('Slave_IO_Running') == 'Yes' else 0.0),
+                    ('mysql_slave_status_slave_sql_running', 'gauge', labels,
+                     1.0 if status.get('Slave_SQL_Running') == 'Yes' else 0.0),
+                    ('mysql_slave_status_last_errno', 'gauge', labels,
+                     _metric_value(status.get('Last_Errno')) or 0.0)
+                ])
+                if lag is not None:
+                    samples.append(('mysql_slave_status_seconds_behind_master', 'gauge', labels, lag))
+        
+        target['errors'] += errors
+        samples.extend([
+            ('mysql_exporter_collect_duration_seconds', 'gauge', {}, round(time.monotonic() - started, 6)),
+            ('mysql_exporter_last_collect_timestamp_seconds', 'gauge', {}, round(time.time(), 3)),
+            ('mysql_exporter_collect_errors_total', 'counter', {}, float(target['errors']))
+        ])
+        with self._lock:
+            target['samples'] = samples
+        return samples
+    
+    def collect_all(self) -> None:
+        """Run one collection round over all targets and re-render the cached output"""
+        futures = []
+        for name, target in self._targets.items():
+            if target['future'] is not None and not target['future'].done():
+                logger.warning(f"Collection of {name} is still running, skipping this round")
+                continue
+            target['future'] = self._executor.submit(self.collect, name)
+            futures.append((name, target['future']))
+        wait([future for _, future in futures], timeout=self.interval)
+        for name, future in futures:
+            if not future.done() or future.exception() is None:
+                continue
+            # Drop the previous round's samples rather than serving them as current
+            logger.error(f"Collection of {name} failed: {future.exception()}")
+            target = self._targets[name]
+            with self._lock:
+                target['errors'] += 1
+                target['samples'] = [
+                    ('mysql_exporter_collect_errors_total', 'counter', {}, float(target['errors']))
+                ]
+        self.render()
+    
+    def render(self) -> bytes:
+        """
+        Render the cached samples of all targets in Prometheus text format
+        
+        Returns:
+            bytes: Exposition text, also stored for scrapes
+        """
+        families = {}
+        with self._lock:
+            for name, target in self._targets.items():
+                for metric, metric_type, labels, value in target['samples']:
+                    family = families.setdefault(metric, (metric_type, []))
+                    family[1].append((dict(labels, instance=name), value))
+        
+        lines = []
+        for metric, (metric_type, series) in families.items():
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for labels, value in series:
+                label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in sorted(labels.items()))
+                text = str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+                lines.append(f"{metric}{{{label_text}}} {text}")
+        rendered = ('\n'.join(lines) + '\n').encode('utf-8')
+        with self._lock:
+            self._rendered = rendered
+        return rendered
+    
+    def metrics(self) -> bytes:
+        """Return the output rendered after the last collection round"""
+        with self._lock:
+            return self._rendered
+    
+    def start(self) -> None:
+        """Start collecting in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='exporter-scheduler', daemon=True)
+        self._thread.start()
+    
+    def _run(self) -> None:
+        """Collect on a fixed schedule until stopped"""
+        next_round = time.monotonic()
+        while not self._stop.is_set():
+            self.collect_all()
+            next_round += self.interval
+            self._stop.wait(max(0.0, next_round - time.monotonic()))
+    
+    def serve(self, address: str = '0.0.0.0', port: int = 9104) -> None:
+        """
+        Collect in the background and serve /metrics until stopped
+        
+        Args:
+            address: Address to listen on
+            port: Port to listen on
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        exporter = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] == '/metrics':
+                    body, content_type = exporter.metrics(), 'text/plain; version=0.0.4; charset=utf-8'
+                    status = 200
+                elif self.path == '/':
+                    body, content_type = b'<a href="/metrics">Metrics</a>\n', 'text/html'
+                    status = 200
+                else:
+                    body, content_type, status = b'Not found\n', 'text/plain', 404
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                logger.debug(f"Scrape from {self.address_string()}: {format % args}")
+        
+        self.start()
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        self._server.daemon_threads = True
+        logger.info(f"Serving metrics of {len(self._targets)} target(s) on http://{address}:{port}/metrics")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+    
+    def stop(self) -> None:
+        """Stop serving and collecting and close all target connections"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+        if self._thread:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+        for target in self._targets.values():
+            target['client'].disconnect()
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Command line entry point
+    
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+        
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="MySQL operations toolkit")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    exporter = commands.add_parser('exporter', help="Serve Prometheus metrics for one or more servers")
+    exporter.add_argument('--config', help="JSON file with 'targets' (MySQLClient arguments) and optional 'defaults'")
+    exporter.add_argument('--target', action='append', default=[], help="host[:port] to collect from (repeatable)")
+    exporter.add_argument('--user', default='root', help="MySQL user for --target entries")
+    exporter.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''),
+                          help="MySQL password for --target entries (default: $MYSQL_PWD)")
+    exporter.add_argument('--listen-address', default='0.0.0.0', help="Address to serve metrics on")
+    exporter.add_argument('--listen-port', type=int, default=9104, help="Port to serve metrics on")
+    exporter.add_argument('--interval', type=float, default=15.0, help="Seconds between collection rounds")
+    exporter.add_argument('--max-workers', type=int, default=16, help="Targets collected at the same time")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'exporter':
+        targets, defaults = [], {'user': args.user, 'password': args.password}
+        if args.config:
+            with open(args.config) as f:
+                config = json.load(f)
+            targets.extend(config.get('targets', []))
+            defaults.update(config.get('defaults', {}))
+        for target in args.target:
+            host, _, port = target.partition(':')
+            targets.append({'host': host, 'port': int(port) if port else 3306})
+        if not targets:
+            parser.error("exporter needs --config or at least one --target")
+        
+        service = PrometheusExporter(targets, defaults, interval=args.interval, max_workers=args.max_workers)
+        try:
+            service.serve(args.listen_address, args.listen_port)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.stop()
+    return 0
+
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+_BINARY_CHARSET = 63
+_STRING_FIELD_TYPES = {FIELD_TYPE.VARCHAR, FIELD_TYPE.VAR_STRING, FIELD_TYPE.STRING, FIELD_TYPE.TINY_BLOB,
+                       FIELD_TYPE.MEDIUM_BLOB, FIELD_TYPE.LONG_BLOB, FIELD_TYPE.BLOB, FIELD_TYPE.BIT}
+
+
+def _export_default(value: Any) -> str:
+    """Serialize values json cannot handle; binary values are written as hex"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def _arrow_type(field: tuple, packet: Any = None):
+    """Map a cursor.description entry (plus its field packet, if known) to a pyarrow type"""
+    type_code, length, scale = field[1], field[4] or 0, field[5] or 0
+    unsigned = packet is not None and bool(packet.flags & FLAG.UNSIGNED)
+    if type_code in _INTEGER_FIELD_TYPES:
+        return pa.uint64() if unsigned and type_code == FIELD_TYPE.LONGLONG else pa.int64()
+    if type_code == FIELD_TYPE.FLOAT:
+        return pa.float32()
+    if type_code == FIELD_TYPE.DOUBLE:
+        return pa.float64()
+    if type_code in (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL):
+        # The reported length includes sign and point, so it bounds the precision
+        return pa.decimal128(max(1, min(38, length)), min(scale, 38))
+    if type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE):
+        return pa.date32()
+    if type_code in (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        return pa.timestamp('us')
+    if type_code == FIELD_TYPE.TIME:
+        return pa.duration('us')
+    if type_code in _STRING_FIELD_TYPES and (type_code == FIELD_TYPE.BIT or
+                                              (packet is not None and packet.charsetnr == _BINARY_CHARSET)):
+        return pa.binary()
+    return pa.string()
+
+
+class QueryExporter:
+    """Stream a query's rows in batches to CSV, JSON Lines or Parquet with bounded memory"""
+    
+    def __init__(self, client: 'MySQLClient', query: str, path: str, params: tuple = None,
+                 format: str = None, compress: bool = None, batch_size: int = 10000,
+                 parquet_compression: str = 'zstd', progress_interval: float = 10.0):
+        """
+        Initialize the exporter
+        
+        Rows come from an unbuffered server-side cursor batch_size rows at a
+        time, so memory stays at one batch regardless of the result size.
+        The file is written under a temporary name and renamed when complete.
+        
+        Args:
+            client: Client to run the query on
+            query: SELECT statement
+            path: Output file
+            params: Parameters for the query
+            format: 'csv', 'jsonl' or 'parquet' (default: from the file extension)
+            compress: gzip-compress CSV/JSON Lines output (default: path ends in .gz)
+            batch_size: Rows fetched per round trip (and per Parquet row group)
+            parquet_compression: Parquet codec ('zstd', 'snappy', 'gzip', 'none')
+            progress_interval: Seconds between progress log lines
+        """
+        self.client = client
+        self.query = query
+        self.path = path
+        self.params = params
+        name = path[:-3] if path.endswith('.gz') else path
+        extension = os.path.splitext(name)[1].lstrip('.').lower()
+        self.format = format or {'ndjson': 'jsonl', 'json': 'jsonl'}.get(extension, extension)
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{self.format}', expected one of {', '.join(EXPORT_FORMATS)}")
+        if self.format == 'parquet' and pa is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.batch_size = batch_size
+        self.parquet_compression = parquet_compression
+        self.progress_interval = progress_interval
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the export
+        
+        Returns:
+            Dict: Path, format, rows, bytes written, seconds and rows/s
+            
+        Raises:
+            pymysql.Error: If the query fails
+            OSError: If the file cannot be written
+        """
+        started = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        rows = 0
+        try:
+            with self.client._stream_cursor(self.query, self.params, tuples=True) as cursor:
+                columns = [field[0] for field in cursor.description]
+                writer = getattr(self, f"_write_{self.format}")
+                last_report = started
+                for batch_rows in writer(cursor, columns, tmp_path):
+                    rows += batch_rows
+                    if time.monotonic() - last_report >= self.progress_interval:
+                        last_report = time.monotonic()
+                        logger.info(f"Exported {rows} rows to '{self.path}' "
+                                    f"({rows / (last_report - started):.0f} rows/s)")
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        elapsed = time.monotonic() - started
+        stats = {
+            'path': self.path,
+            'format': self.format,
+            'rows': rows,
+            'bytes': os.path.getsize(self.path),
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows / elapsed, 1) if elapsed else 0.0
+        }
+        logger.info(f"Exported {rows} rows to '{self.path}' in {stats['seconds']}s ({stats['rows_per_sec']} rows/s)")
+        return stats
+    
+    def _batches(self, cursor) -> Iterator[List[tuple]]:
+        """Yield batches of rows from the streaming cursor"""
+        while True:
+            batch = cursor.fetchmany(self.batch_size)
+            if not batch:
+                return
+            yield batch
+    
+    def _open_text(self, path: str):
+        """Open a text output file, gzip-compressed if requested"""
+        if self.compress:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+    
+    def _write_csv(self, cursor, columns: List[str], path: str) -> Iterator[int]:
+        """Write batches as CSV with a header row; NULL becomes an empty field"""
+        with self._open_text(path) as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for batch in self._batches(cursor):
+                writer.writerows(
+                    [value.hex() if isinstance(value, (bytes, bytearray)) else value for value in row]
+                    for row in batch
+                )
+                yield len(batch)
+    
+    def _write_jsonl(self, cursor, columns: List[str], path: str) -> Iterator[int]:
+        """Write batches as one JSON object per line"""
+        with self._open_text(path) as f:
+            for batch in self._batches(cursor):
+                f.write(''.join(json.dumps(dict(zip(columns, row)), default=_export_default) + '\n'
+                                for row in batch))
+                yield len(batch)
+    
+    def _write_parquet(self, cursor, columns: List[str], path: str) -> Iterator[int]:
+        """Write each batch as a Parquet row group with a schema from the cursor description"""
+        packets = getattr(getattr(cursor, '_result', None), 'fields', None) or [None] * len(columns)
+        schema = pa.schema([pa.field(name, _arrow_type(field, packet))
+                            for name, field, packet in zip(columns, cursor.description, packets)])
+        compression = None if self.parquet_compression == 'none' else self.parquet_compression
+        with pq.ParquetWriter(path, schema, compression=compression) as writer:
+            for batch in self._batches(cursor):
+                arrays = [self._arrow_array(values, field.type) for values, field in zip(zip(*batch), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                yield len(batch)
+    
+    @staticmethod
+    def _arrow_array(values: tuple, arrow_type) -> Any:
+        """Build one column of a batch, stringifying values of types mapped to string (JSON, ENUM, ...)"""
+        if arrow_type == pa.string():
+            values = [value if value is None or isinstance(value, str) else _export_default(value)
+                      for value in values]
+        return pa.array(values, type=arrow_type)
+
+# Usage example
+if __name__ == "__main__":
+    # Subcommands such as 'exporter' run the command line entry point
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    
+    # Create a MySQL client
+    mysql = MySQLClient(
+        host="localhost",
+        port=3306,
+        user="root",
+        password="password"
+    )
+    
+    # Optionally share a thread-safe connection pool between worker threads
+    # mysql.enable_pool(min_size=2, max_size=16)
     
     # Connect to the MySQL server
     if mysql.connect():